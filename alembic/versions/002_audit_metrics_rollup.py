@@ -0,0 +1,37 @@
+"""Audit metrics rollup table
+
+Revision ID: 002
+Revises: 001
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '002'
+down_revision = '001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Create audit_metrics_rollup table (one row per minute bucket)
+    op.create_table(
+        'audit_metrics_rollup',
+        sa.Column('bucket', sa.TIMESTAMP(), nullable=False),
+        sa.Column('total_events', sa.BigInteger(), nullable=False, server_default='0'),
+        sa.Column('decisions_made', sa.BigInteger(), nullable=False, server_default='0'),
+        sa.Column('confidence_sum', sa.Float(), nullable=False, server_default='0'),
+        sa.Column('human_reviews', sa.BigInteger(), nullable=False, server_default='0'),
+        sa.Column('rag_retrievals', sa.BigInteger(), nullable=False, server_default='0'),
+        sa.Column('similarity_sum', sa.Float(), nullable=False, server_default='0'),
+        sa.Column('low_quality_retrievals', sa.BigInteger(), nullable=False, server_default='0'),
+        sa.Column('high_quality_retrievals', sa.BigInteger(), nullable=False, server_default='0'),
+        sa.Column('updated_at', sa.TIMESTAMP(), nullable=False, server_default=sa.text('NOW()')),
+        sa.PrimaryKeyConstraint('bucket')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('audit_metrics_rollup')
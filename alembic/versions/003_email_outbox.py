@@ -0,0 +1,49 @@
+"""Email outbox table
+
+Revision ID: 003
+Revises: 002
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '003'
+down_revision = '002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Create email_outbox table
+    op.create_table(
+        'email_outbox',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('idempotency_key', sa.String(length=320), nullable=False),
+        sa.Column('dispute_id', sa.String(length=255), nullable=False),
+        sa.Column('to_email', sa.String(length=320), nullable=False),
+        sa.Column('customer_name', sa.String(length=255), nullable=False),
+        sa.Column('decision', sa.String(length=50), nullable=False),
+        sa.Column('reasoning', sa.Text(), nullable=False),
+        sa.Column('amount', sa.Numeric(precision=12, scale=2), nullable=False),
+        sa.Column('currency', sa.String(length=10), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False, server_default='pending'),
+        sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('next_attempt_at', sa.TIMESTAMP(), nullable=False, server_default=sa.text('NOW()')),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('provider', sa.String(length=50), nullable=True),
+        sa.Column('sent_at', sa.TIMESTAMP(), nullable=True),
+        sa.Column('created_at', sa.TIMESTAMP(), nullable=False, server_default=sa.text('NOW()')),
+        sa.Column('updated_at', sa.TIMESTAMP(), nullable=False, server_default=sa.text('NOW()')),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('idempotency_key')
+    )
+    op.create_index('idx_email_outbox_due', 'email_outbox', ['status', 'next_attempt_at'])
+    op.create_index('idx_email_outbox_dispute_id', 'email_outbox', ['dispute_id'])
+
+
+def downgrade() -> None:
+    op.drop_index('idx_email_outbox_dispute_id', table_name='email_outbox')
+    op.drop_index('idx_email_outbox_due', table_name='email_outbox')
+    op.drop_table('email_outbox')
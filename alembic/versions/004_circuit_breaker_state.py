@@ -0,0 +1,31 @@
+"""Shared circuit breaker state
+
+Revision ID: 004
+Revises: 003
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '004'
+down_revision = '003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # One row per breaker; workers publish transitions and adopt newer ones
+    op.create_table(
+        'circuit_breaker_state',
+        sa.Column('name', sa.String(length=100), nullable=False),
+        sa.Column('state', sa.String(length=20), nullable=False),
+        sa.Column('changed_at', sa.Float(), nullable=False),
+        sa.Column('updated_at', sa.TIMESTAMP(), nullable=False, server_default=sa.text('NOW()')),
+        sa.PrimaryKeyConstraint('name')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('circuit_breaker_state')
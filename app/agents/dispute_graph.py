@@ -1,29 +1,167 @@
 """LangGraph state machine for dispute resolution workflow"""
-from typing import Literal
+import time
+from typing import Any, Dict, List, Literal, Optional, Union
 from langgraph.graph import StateGraph, END
 from app.schema.state import DisputeState
-from app.schema.models import DisputeDecision, DisputeWebhook
+from app.agents.staged_pipeline import DONE, Stage, StagedPipeline
+from app.schema.models import DisputeWebhook, FraudAnalysis, TransactionData
 from app.tools.rag_retriever import RAGRetriever
 from app.tools.transaction_enrichment import TransactionEnrichment
+from app.tools.adjudicator import DEFERRED_REASONING, AdjudicationCascade, Adjudicator
+from app.tools.adjudication_batcher import AdjudicationBatcher
+from app.tools.decision_cache import DecisionCache
+from app.tools.decision_table import DecisionTable, load_decision_rules
+from app.tools.llm_pool import BoundLLMEndpointPool, LLMEndpointPool
+from app.tools.prompt_builder import RulesContextBuilder
+from app.tools.reasoning_writer import ReasoningWriter
+from app.tools.circuit_breaker import llm_circuit_breaker
+from app.tools.concurrency_limiter import AdaptiveLimiter, chroma_limiter, enrichment_limiter
+from app.tools.prefetcher import Prefetcher
+from app.tools.priority_scheduler import PriorityScheduler
+from app.tools.load_shedder import DegradationTrigger, LoadShedder, level_at_least
+from app.tools.deadline import NodeDeadlines
+from app.tools.artifact_store import artifact_store
 from app.db.audit_logger import audit_logger
 from app.db.human_review import add_to_review_queue
+from app.db.email_outbox import enqueue_email
+from app.db.connection import db_pool
+from app.db.vector_store import get_vector_store
 from app.config.settings import settings
 
 
-# Initialize LLM - using Ollama (free, local)
+# Initialize LLM - using Ollama (free, local), balanced across model servers
 from langchain_ollama import ChatOllama
-llm = ChatOllama(
-    model=settings.llm_model,
-    temperature=0,
-    base_url="http://host.docker.internal:11434"
-)
+
+# One endpoint pool per model, shared by every task using that model
+llm_pools: Dict[str, LLMEndpointPool] = {}
+
+
+def get_llm(model: str, shape: str) -> BoundLLMEndpointPool:
+    """
+    Get the endpoint pool serving a model, admitting calls through the
+    adaptive limiter of one call shape (e.g. short rewrites vs. long
+    adjudication streams) so each adapts to its own no-load latency
+    """
+    if model not in llm_pools:
+        urls = [url.strip() for url in settings.llm_base_urls.split(",") if url.strip()]
+        llm_pools[model] = LLMEndpointPool.from_urls(
+            urls,
+            lambda base_url: ChatOllama(
+                model=model,
+                temperature=0,
+                base_url=base_url,
+                keep_alive=settings.llm_keep_alive
+            ),
+            max_in_flight=settings.llm_max_in_flight,
+            eject_after=settings.llm_eject_after,
+            eject_seconds=settings.llm_eject_seconds,
+            health_check_interval=settings.llm_health_check_interval,
+            breaker=llm_circuit_breaker,
+            call_timeout=settings.llm_call_timeout,
+            hedge=settings.llm_hedge_enabled
+        )
+    pool = llm_pools[model]
+    capacity = sum(endpoint.max_in_flight for endpoint in pool.endpoints)
+    return pool.limited(AdaptiveLimiter(
+        f"llm:{model}:{shape}",
+        initial_limit=capacity,
+        max_limit=capacity,
+        max_queue=settings.llm_max_queue,
+        queue_timeout=settings.llm_call_timeout
+    ))
+
+
+rewrite_llm = get_llm(settings.llm_rewrite_model or settings.llm_model, "rewrite")
+reasoning_llm = get_llm(settings.llm_model, "reasoning")
+
+
+def _tier(model: str, max_attempts: int) -> Union[Adjudicator, AdjudicationBatcher]:
+    tier = Adjudicator(
+        get_llm(model, "verdict" if settings.llm_decision_first else "adjudication"),
+        provider=settings.llm_provider,
+        max_attempts=max_attempts,
+        streaming=settings.llm_streaming,
+        verdict_only=settings.llm_decision_first
+    )
+    if settings.llm_batch_enabled:
+        return AdjudicationBatcher(
+            tier,
+            batch_llm=get_llm(model, "batch"),
+            max_batch_size=settings.llm_batch_max_size,
+            max_wait=settings.llm_batch_max_wait
+        )
+    return tier
+
+
+# Adjudication cascade: the small model answers first and escalates to the
+# large model when unsure; it gets one attempt since invalid output escalates
+adjudication_tiers = [("large", _tier(settings.llm_model, settings.max_retry_attempts))]
+if settings.llm_small_model and settings.llm_small_model != settings.llm_model:
+    adjudication_tiers.insert(0, ("small", _tier(settings.llm_small_model, 1)))
 
 # Initialize tools
-rag_retriever = RAGRetriever(llm, similarity_threshold=settings.similarity_threshold)
+rag_retriever = RAGRetriever(rewrite_llm, similarity_threshold=settings.similarity_threshold)
+adjudicator = AdjudicationCascade(adjudication_tiers, settings.confidence_threshold)
+reasoning_writer = ReasoningWriter(reasoning_llm)
+decision_table = DecisionTable(load_decision_rules(settings.decision_table_path), settings.decision_table_mode)
+rules_context_builder = RulesContextBuilder(
+    token_budget=settings.prompt_rules_token_budget,
+    max_sentences_per_rule=settings.prompt_max_sentences_per_rule
+)
 transaction_enrichment = TransactionEnrichment(settings.enrichment_api_url)
+prefetcher = Prefetcher(
+    transaction_enrichment,
+    rag_retriever,
+    enrichment_limiter,
+    chroma_limiter,
+    ttl_seconds=settings.prefetch_ttl
+)
+decision_cache = DecisionCache(
+    lambda texts: get_vector_store().embed(texts),
+    lambda: get_vector_store().corpus_version(),
+    similarity_threshold=settings.decision_cache_similarity,
+    ttl_seconds=settings.decision_cache_ttl,
+    max_entries=settings.decision_cache_max_entries
+)
 
 
-async def input_node(state: DisputeState) -> DisputeState:
+node_deadlines = NodeDeadlines(
+    {
+        "enrichment_node": settings.enrichment_timeout,
+        "legal_research_node": settings.legal_research_timeout,
+        "adjudication_node": settings.adjudication_timeout,
+        "action_node": settings.action_timeout
+    },
+    deadline_seconds=settings.dispute_deadline_seconds
+)
+
+
+def _cache_thresholds() -> tuple:
+    """Settings a cached decision depends on beyond the corpus"""
+    return (settings.similarity_threshold, settings.confidence_threshold)
+
+
+def _max_query_attempts(state: DisputeState) -> int:
+    """Retrieval attempts allowed; query rewrites are the first thing shed under load"""
+    return 1 if level_at_least(state.get("degradation_level"), "no_rewrite") else 3
+
+
+def _transaction_history(state: DisputeState) -> List[TransactionData]:
+    return artifact_store.get(state.get("transaction_history_ref")) or []
+
+
+def _retrieved_rules(state: DisputeState) -> List[Dict[str, Any]]:
+    return artifact_store.get(state.get("retrieved_rules_ref")) or []
+
+
+def _analyze_fraud(state: DisputeState) -> Optional[FraudAnalysis]:
+    history = _transaction_history(state)
+    if not history:
+        return None
+    return transaction_enrichment.detect_fraud_patterns(history, state["payload"]["amount"])
+
+
+async def input_node(state: DisputeState) -> Dict[str, Any]:
     """Initialize state from webhook payload"""
     await audit_logger.log_node_entry(
         state["dispute_id"],
@@ -31,14 +169,10 @@ async def input_node(state: DisputeState) -> DisputeState:
         {"payload": state["payload"]}
     )
     
-    state["current_node"] = "input_node"
-    state["actions_taken"] = []
-    state["query_attempts"] = 0
-    
-    return state
+    return {"current_node": "input_node", "actions_taken": [], "query_attempts": 0}
 
 
-async def enrichment_node(state: DisputeState) -> DisputeState:
+async def enrichment_node(state: DisputeState) -> Dict[str, Any]:
     """Enrich dispute with transaction history"""
     await audit_logger.log_node_entry(
         state["dispute_id"],
@@ -46,13 +180,20 @@ async def enrichment_node(state: DisputeState) -> DisputeState:
         {"customer_id": state["payload"].get("customer_id")}
     )
     
+    update: Dict[str, Any] = {"actions_taken": list(state["actions_taken"])}
     try:
-        customer_id = state["payload"]["customer_id"]
-        transactions = await transaction_enrichment.fetch_history(customer_id, years=3)
+        # Use the history prefetched when the dispute was accepted, if any
+        transactions = await prefetcher.take_history(state["dispute_id"])
+        if transactions is None:
+            customer_id = state["payload"]["customer_id"]
+            transactions = await transaction_enrichment.fetch_history(customer_id, years=3)
         
-        state["transaction_history"] = transactions
-        state["current_node"] = "enrichment_node"
-        state["actions_taken"].append("transaction_history_fetched")
+        # The history stays out of the state; nodes look it up by reference
+        update["transaction_history_ref"] = artifact_store.put(
+            state["dispute_id"], "transaction_history", transactions
+        )
+        update["current_node"] = "enrichment_node"
+        update["actions_taken"].append("transaction_history_fetched")
         
     except Exception as e:
         await audit_logger.log_error(
@@ -61,12 +202,19 @@ async def enrichment_node(state: DisputeState) -> DisputeState:
             str(e),
             state
         )
-        state["error"] = f"Enrichment failed: {str(e)}"
+        update["error"] = f"Enrichment failed: {str(e)}"
     
-    return state
+    # Under the heaviest load, disputes go to human review before any LLM call
+    update["degradation_level"] = load_shedder.level
+    if level_at_least(update["degradation_level"], "human_review_only"):
+        prefetcher.discard(state["dispute_id"])
+        load_shedder.stats.shed_to_human_review += 1
+        update["actions_taken"].append("shed_to_human_review")
+    
+    return update
 
 
-async def legal_research_node(state: DisputeState) -> DisputeState:
+async def legal_research_node(state: DisputeState) -> Dict[str, Any]:
     """Perform RAG-based legal research"""
     await audit_logger.log_node_entry(
         state["dispute_id"],
@@ -74,36 +222,80 @@ async def legal_research_node(state: DisputeState) -> DisputeState:
         {"query_attempts": state["query_attempts"]}
     )
     
+    update: Dict[str, Any] = {
+        "actions_taken": list(state["actions_taken"]),
+        "degradation_level": load_shedder.level
+    }
+    
     try:
+        # Near-duplicates of a recent dispute reuse its retrieval and decision
+        if settings.decision_cache_enabled and state["query_attempts"] == 0:
+            hit = await decision_cache.lookup(
+                state["dispute_id"], state["payload"], _analyze_fraud(state), _cache_thresholds()
+            )
+            if hit:
+                prefetcher.discard(state["dispute_id"])
+                update["retrieved_rules_ref"] = artifact_store.put(
+                    state["dispute_id"], "retrieved_rules", hit.entry.retrieved_rules
+                )
+                update["similarity_scores"] = hit.entry.similarity_scores
+                update["query_attempts"] = 1
+                update["current_node"] = "legal_research_node"
+                update["actions_taken"].append("decision_cache_hit")
+                await audit_logger.log_cache_hit(
+                    state["dispute_id"],
+                    hit.entry.source_dispute_id,
+                    hit.similarity,
+                    decision_cache.get_stats()["corpus_version"]
+                )
+                return update
+        
         # Generate initial query from dispute details
-        dispute_desc = state["payload"].get("description", "")
-        reason_code = state["payload"].get("reason_code", "")
-        amount = state["payload"].get("amount", "")
+        initial_query = rag_retriever.initial_query(state["payload"])
         
-        initial_query = f"Visa dispute reason code {reason_code}: {dispute_desc}. Amount: {amount}"
+        # Perform retrieval with self-correction, starting from the prefetched first attempt
+        first_result = None
+        if state["query_attempts"] == 0:
+            first_result = await prefetcher.take_retrieval(state["dispute_id"])
         
-        # Perform retrieval with self-correction
+        # Under load, reuse the reason code's last good rules instead of querying Chroma
+        reason_code = state["payload"].get("reason_code", "")
+        if first_result is None and level_at_least(update["degradation_level"], "precomputed_rules"):
+            first_result = rag_retriever.precomputed_rules(reason_code)
+            if first_result is not None:
+                load_shedder.stats.rules_from_cache += 1
+                update["actions_taken"].append("rules_from_reason_code_cache")
+        
+        max_attempts = _max_query_attempts(update)
         result, attempts = await rag_retriever.retrieve_with_self_correction(
             initial_query,
             state["payload"],
-            max_attempts=3
+            max_attempts=max_attempts,
+            first_result=first_result
         )
+        rag_retriever.remember_rules(reason_code, result)
+        if max_attempts == 1 and not rag_retriever.evaluate_retrieval_quality(result):
+            load_shedder.stats.rewrites_skipped += 1
         
-        # Convert Document objects to dicts for JSON serialization
-        state["retrieved_rules"] = [
-            {"content": doc.content, "metadata": doc.metadata, "similarity_score": doc.similarity_score}
-            for doc in result.documents
-        ]
-        state["similarity_scores"] = [doc.similarity_score for doc in result.documents]
-        state["query_attempts"] = attempts
-        state["current_node"] = "legal_research_node"
-        state["actions_taken"].append(f"rag_retrieval_completed_{attempts}_attempts")
+        # Rule texts stay out of the state; nodes look them up by reference
+        update["retrieved_rules_ref"] = artifact_store.put(
+            state["dispute_id"],
+            "retrieved_rules",
+            [
+                {"content": doc.content, "metadata": doc.metadata, "similarity_score": doc.similarity_score}
+                for doc in result.documents
+            ]
+        )
+        update["similarity_scores"] = [doc.similarity_score for doc in result.documents]
+        update["query_attempts"] = attempts
+        update["current_node"] = "legal_research_node"
+        update["actions_taken"].append(f"rag_retrieval_completed_{attempts}_attempts")
         
         await audit_logger.log_retrieval(
             state["dispute_id"],
             result.query,
             [{"content": doc.content, "metadata": doc.metadata} for doc in result.documents],
-            state["similarity_scores"]
+            update["similarity_scores"]
         )
         
     except Exception as e:
@@ -113,33 +305,34 @@ async def legal_research_node(state: DisputeState) -> DisputeState:
             str(e),
             state
         )
-        state["error"] = f"Legal research failed: {str(e)}"
+        update["error"] = f"Legal research failed: {str(e)}"
     
-    return state
+    return update
 
 
-async def adjudication_node(state: DisputeState) -> DisputeState:
+async def adjudication_node(state: DisputeState) -> Dict[str, Any]:
     """Make adjudication decision using LLM with structured output and validation retry"""
+    # Compact retrieved rules (deduped, trimmed to relevant sentences, within the token budget)
+    payload = state["payload"]
+    retrieved_rules = _retrieved_rules(state)
+    rules_context = rules_context_builder.build(
+        retrieved_rules,
+        f"{payload.get('reason_code', '')} {payload.get('description', '')}"
+    )
+    
     await audit_logger.log_node_entry(
         state["dispute_id"],
         "adjudication_node",
-        {"num_rules": len(state.get("retrieved_rules", []))}
+        {
+            "num_rules": len(retrieved_rules),
+            **rules_context.get_stats()
+        }
     )
     
+    update: Dict[str, Any] = {"actions_taken": list(state["actions_taken"])}
     try:
-        # Build context from retrieved rules (now dicts)
-        rules_context = "\n\n".join([
-            f"Rule {i+1}: {doc['content']}"
-            for i, doc in enumerate(state.get("retrieved_rules", []))
-        ])
-        
         # Analyze fraud patterns
-        fraud_analysis = None
-        if state.get("transaction_history"):
-            fraud_analysis = transaction_enrichment.detect_fraud_patterns(
-                state["transaction_history"],
-                state["payload"]["amount"]
-            )
+        fraud_analysis = _analyze_fraud(state)
         
         fraud_context = ""
         if fraud_analysis:
@@ -151,102 +344,90 @@ Fraud Analysis:
 - Pattern Details: {', '.join(fraud_analysis.pattern_details) if fraud_analysis.pattern_details else 'None detected'}
 """
         
-        # Try to generate valid decision with retry logic
-        decision = None
-        max_attempts = 3
-        validation_errors = []
+        # Clear-cut cases are decided from structured signals before the LLM
+        cache_hit = decision_cache.claim(state["dispute_id"])
+        table_match = None if cache_hit else decision_table.evaluate(
+            state["dispute_id"],
+            payload,
+            fraud_analysis,
+            len(_transaction_history(state))
+        )
         
-        for attempt in range(max_attempts):
-            try:
-                # Create adjudication prompt
-                error_context = ""
-                if validation_errors:
-                    error_context = f"""
-IMPORTANT: Previous attempt failed validation with these errors:
-{chr(10).join(f'- {err}' for err in validation_errors)}
-
-Please correct these issues in your response.
-"""
-                
-                prompt = f"""You are a Visa dispute adjudication specialist. Analyze this dispute and make a decision.
-
-Dispute Details:
-- Dispute ID: {state['dispute_id']}
-- Customer ID: {state['payload']['customer_id']}
-- Transaction ID: {state['payload']['transaction_id']}
-- Amount: {state['payload']['amount']} {state['payload']['currency']}
-- Reason Code: {state['payload']['reason_code']}
-- Description: {state['payload']['description']}
-
-{fraud_context}
-
-Relevant Visa Rules:
-{rules_context}
-
-{error_context}
-
-Based on the evidence, make a decision:
-1. "accept" - Accept the dispute (refund customer)
-2. "reject" - Reject the dispute (merchant wins)
-3. "escalate" - Escalate to human review
-
-CRITICAL: Provide your response as VALID JSON ONLY, no additional text:
-{{
-    "decision": "accept|reject|escalate",
-    "confidence_score": 0.85,
-    "reasoning": "detailed explanation of at least 20 characters",
-    "supporting_rules": ["rule reference 1", "rule reference 2"],
-    "recommended_action": "specific action to take"
-}}
-
-Rules:
-- decision must be exactly one of: "accept", "reject", or "escalate"
-- confidence_score must be a number between 0.0 and 1.0
-- reasoning must be at least 20 characters
-- supporting_rules must be an array of strings
-- recommended_action must be a non-empty string"""
-                
-                # Generate decision
-                response = await llm.ainvoke(prompt)
-                
-                # Parse JSON response
-                import json
-                import re
-                
-                # Extract JSON from response (handle cases where LLM adds extra text)
-                content = response.content.strip()
-                json_match = re.search(r'\{.*\}', content, re.DOTALL)
-                if json_match:
-                    content = json_match.group(0)
-                
-                decision_data = json.loads(content)
-                decision_data["dispute_id"] = state["dispute_id"]
-                
-                # Validate with Pydantic
-                decision = DisputeDecision(**decision_data)
-                
-                # Success! Break out of retry loop
-                break
-                
-            except (json.JSONDecodeError, ValueError) as e:
-                validation_errors.append(f"JSON parsing error: {str(e)}")
-                if attempt == max_attempts - 1:
-                    raise ValueError(f"Failed to generate valid decision after {max_attempts} attempts: {validation_errors}")
-            except Exception as e:
-                validation_errors.append(f"Validation error: {str(e)}")
-                if attempt == max_attempts - 1:
-                    raise ValueError(f"Failed to generate valid decision after {max_attempts} attempts: {validation_errors}")
+        if cache_hit:
+            decision = cache_hit.decision_for(state["dispute_id"])
+            tier = "decision_cache"
+            print(f"Reusing decision for {state['dispute_id']} from {cache_hit.entry.source_dispute_id} "
+                  f"(similarity {cache_hit.similarity:.3f})")
+        elif table_match and (
+            decision_table.active or level_at_least(state.get("degradation_level"), "precomputed_rules")
+        ):
+            table_rule, decision = table_match
+            tier = "decision_table"
+            if not decision_table.active:
+                load_shedder.stats.decided_by_table += 1
+            print(f"Decision table rule '{table_rule.name}' decided {state['dispute_id']}")
+        else:
+            # Track prefill cost per dispute
+            prompt_tokens = adjudicator.estimate_prompt_tokens(
+                state["dispute_id"], payload, rules_context.text, fraud_context
+            )
+            print(f"Adjudication prompt for {state['dispute_id']}: ~{prompt_tokens} tokens "
+                  f"({rules_context.tokens} in {rules_context.rules_used} rules)")
+            
+            # Generate schema-constrained decision, escalating from the small to the large model if needed
+            decision, tier = await adjudicator.adjudicate(
+                state["dispute_id"],
+                payload,
+                rules_context.text,
+                fraud_context
+            )
+            
+            if table_match:
+                table_rule, table_decision = table_match
+                if not decision_table.record_shadow(table_rule, table_decision, decision):
+                    print(f"Decision table rule '{table_rule.name}' disagreed with the LLM on "
+                          f"{state['dispute_id']}: {table_decision.decision} vs {decision.decision}")
+            
+            # Only confident, automatically actioned decisions are reused for near-duplicates
+            if decision.decision != "escalate" and decision.confidence_score >= settings.confidence_threshold:
+                decision_cache.store(
+                    state["dispute_id"],
+                    retrieved_rules,
+                    state.get("similarity_scores") or [],
+                    decision
+                )
         
-        if not decision:
-            raise ValueError("Failed to generate decision")
+        decision_cache.discard(state["dispute_id"])
         
         # Convert DisputeDecision to dict for JSON serialization
-        state["decision"] = decision.model_dump()
-        state["confidence_score"] = decision.confidence_score
-        state["current_node"] = "adjudication_node"
-        state["actions_taken"].append("decision_made")
+        update["decision"] = decision.model_dump()
+        update["confidence_score"] = decision.confidence_score
+        update["current_node"] = "adjudication_node"
+        update["actions_taken"].append("decision_made")
+        update["actions_taken"].append(
+            f"decided_by_{tier}" if tier in ("decision_table", "decision_cache") else f"adjudicated_by_{tier}_model"
+        )
         
-        await audit_logger.log_decision(state["dispute_id"], decision)
+        # Decision-first: routing proceeds now; reasoning is written after the terminal node
+        if decision.reasoning == DEFERRED_REASONING:
+            reasoning_writer.prepare(
+                state["dispute_id"], payload, rules_context.text, fraud_context, update["decision"]
+            )
+            update["actions_taken"].append("reasoning_deferred")
+        
+        # Transactional outbox: an actioned decision's record and its email commit together
+        queue_email = route_by_confidence({**state, **update}) == "action"
+        async with db_pool.transaction() as conn:
+            await audit_logger.log_decision(
+                state["dispute_id"],
+                decision,
+                cached_from=cache_hit.entry.source_dispute_id if cache_hit else None,
+                conn=conn
+            )
+            if queue_email:
+                await enqueue_email(**_decision_email(state, update["decision"]), conn=conn)
+        if queue_email:
+            update["actions_taken"].append("email_queued")
         
     except Exception as e:
         await audit_logger.log_error(
@@ -255,99 +436,85 @@ Rules:
             str(e),
             state
         )
-        state["error"] = f"Adjudication failed: {str(e)}"
+        update["error"] = f"Adjudication failed: {str(e)}"
+    
+    return update
+
+
+def _reasoning_hold(dispute_id: str) -> Optional[float]:
+    """Hold a dispute's emails while its deferred reasoning is written"""
+    return settings.reasoning_hold_seconds if reasoning_writer.is_pending(dispute_id) else None
+
+
+def _decision_email(state: DisputeState, decision: Dict[str, Any]) -> Dict[str, Any]:
+    """Outbox entry for a dispute's decision email"""
+    amount = state["payload"].get("amount", 0)
+    # Convert amount to float if it's a string
+    try:
+        amount = float(amount)
+    except (ValueError, TypeError):
+        amount = 0.0
     
-    return state
+    return {
+        "dispute_id": state["dispute_id"],
+        "to_email": state["payload"].get("customer_email", "customer@example.com"),
+        "customer_name": state["payload"].get("customer_name", "Customer"),
+        "decision": decision["decision"],
+        "reasoning": decision["reasoning"],
+        "amount": amount,
+        "currency": state["payload"].get("currency", "INR"),
+        "hold_seconds": _reasoning_hold(state["dispute_id"])
+    }
 
 
-async def action_node(state: DisputeState) -> DisputeState:
-    """Execute actions (send email) with real email service"""
+async def action_node(state: DisputeState) -> Dict[str, Any]:
+    """Execute actions (queue decision email for the outbox dispatcher)"""
     await audit_logger.log_node_entry(
         state["dispute_id"],
         "action_node",
         {"decision": state.get("decision")}
     )
     
-    max_retries = 3
-    retry_count = 0
-    
-    while retry_count < max_retries:
-        try:
-            decision = state["decision"]  # Now a dict
-            
-            # Get customer email from payload
-            customer_email = state["payload"].get("customer_email", "customer@example.com")
-            customer_name = state["payload"].get("customer_name", "Customer")
-            amount = state["payload"].get("amount", 0)
-            currency = state["payload"].get("currency", "INR")
-            
-            # Convert amount to float if it's a string
-            try:
-                amount = float(amount)
-            except (ValueError, TypeError):
-                amount = 0.0
-            
-            # Send real email using unified email service (tries multiple providers)
-            from app.tools.unified_email_service import unified_email_service
-            
-            result = unified_email_service.send_dispute_decision(
-                to_email=customer_email,
-                dispute_id=state["dispute_id"],
-                customer_name=customer_name,
-                decision=decision['decision'],
-                reasoning=decision['reasoning'],
-                amount=amount,
-                currency=currency
-            )
-            
-            if result['success']:
-                # Email sent successfully
-                from datetime import datetime
-                email_metadata = {
-                    "recipient": customer_email,
-                    "subject": f"Dispute Resolution - {state['dispute_id']}",
-                    "sent_at": datetime.utcnow().isoformat(),
-                    "attempt": retry_count + 1,
-                    "method": "smtp_gmail",
-                    "status": "sent"
-                }
-                
-                state["actions_taken"].append(f"email_sent_attempt_{retry_count + 1}")
-                state["current_node"] = "action_node"
-                
-                await audit_logger.log_action(
-                    state["dispute_id"],
-                    "email_sent",
-                    email_metadata
-            )
-            
-            # Success - break out of retry loop
-            break
-            
-        except Exception as e:
-            retry_count += 1
-            await audit_logger.log_error(
-                state["dispute_id"],
-                "action_node",
-                f"Email send attempt {retry_count} failed: {str(e)}",
-                state
-            )
-            
-            if retry_count >= max_retries:
-                # All retries exhausted - route to human review
-                state["error"] = f"Action execution failed after {max_retries} attempts: {str(e)}"
-                state["actions_taken"].append("email_failed_routing_to_human_review")
-                # The routing logic will handle sending to human review
-                break
-            
-            # Exponential backoff
-            import asyncio
-            await asyncio.sleep(2 ** retry_count)
+    update: Dict[str, Any] = {"actions_taken": list(state["actions_taken"])}
+    try:
+        email = _decision_email(state, state["decision"])
+        
+        # Delivery and retries happen in the background email dispatcher,
+        # so graph completion does not wait on email providers. The email is
+        # normally queued with the decision record; queue it here otherwise
+        if "email_queued" not in state["actions_taken"]:
+            await enqueue_email(**email)
+            update["actions_taken"].append("email_queued")
+        
+        from datetime import datetime
+        await audit_logger.log_action(
+            state["dispute_id"],
+            "email_queued",
+            {
+                "recipient": email["to_email"],
+                "subject": f"Dispute Resolution - {state['dispute_id']}",
+                "queued_at": datetime.utcnow().isoformat(),
+                "status": "queued"
+            }
+        )
+        
+        update["current_node"] = "action_node"
+        
+    except Exception as e:
+        await audit_logger.log_error(
+            state["dispute_id"],
+            "action_node",
+            f"Email queueing failed: {str(e)}",
+            state
+        )
+        update["error"] = f"Action execution failed: {str(e)}"
+        update["actions_taken"].append("email_failed_routing_to_human_review")
     
-    return state
+    reasoning_writer.start(state["dispute_id"])
+    return update
 
 
-async def human_review_node(state: DisputeState) -> DisputeState:
+async def human_review_node(state: DisputeState) -> Dict[str, Any]:
     """Route to human review queue"""
     await audit_logger.log_node_entry(
         state["dispute_id"],
@@ -355,6 +522,7 @@ async def human_review_node(state: DisputeState) -> DisputeState:
         {"reason": "low_confidence" if state.get("confidence_score") else "error"}
     )
     
+    update: Dict[str, Any] = {"actions_taken": list(state["actions_taken"])}
     try:
         decision = state.get("decision")
         if not decision:
@@ -363,7 +531,11 @@ async def human_review_node(state: DisputeState) -> DisputeState:
                 "dispute_id": state["dispute_id"],
                 "decision": "escalate",
                 "confidence_score": 0.0,
-                "reasoning": state.get("error", "Processing error occurred - requires human review"),
+                "reasoning": state.get("error") or (
+                    "Routed to specialist review during high load"
+                    if "shed_to_human_review" in state["actions_taken"]
+                    else "Processing error occurred - requires human review"
+                ),
                 "supporting_rules": [],
                 "recommended_action": "human_review"
             }
@@ -378,36 +550,29 @@ async def human_review_node(state: DisputeState) -> DisputeState:
             state["payload"]
         )
         
-        # Send email notification for human review cases too
+        # Queue email notification for human review cases too
         customer_email = state["payload"].get("customer_email")
         if customer_email:
-            from app.tools.email_service import email_service
-            
             customer_name = state["payload"].get("customer_name", "Customer")
             amount = state["payload"].get("amount", 0)
             currency = state["payload"].get("currency", "INR")
             
             reasoning_text = decision.get("reasoning", "") if isinstance(decision, dict) else decision.reasoning
-            decision_value = decision.get("decision", "escalate") if isinstance(decision, dict) else decision.decision
-            
-            # Send email about escalation
-            from app.tools.unified_email_service import unified_email_service
             
-            email_result = unified_email_service.send_dispute_decision(
-                to_email=customer_email,
+            await enqueue_email(
                 dispute_id=state["dispute_id"],
+                to_email=customer_email,
                 customer_name=customer_name,
                 decision="under_review",  # Special status for human review
                 reasoning=f"Your dispute requires specialist review. {reasoning_text}\n\nExpected resolution within 24-48 hours.",
                 amount=float(amount),
-                currency=currency
+                currency=currency,
+                hold_seconds=_reasoning_hold(state["dispute_id"])
             )
-            
-            if email_result['success']:
-                state["actions_taken"].append("email_sent_human_review")
+            update["actions_taken"].append("email_queued_human_review")
         
-        state["actions_taken"].append("routed_to_human_review")
-        state["current_node"] = "human_review_node"
+        update["actions_taken"].append("routed_to_human_review")
+        update["current_node"] = "human_review_node"
         
     except Exception as e:
         await audit_logger.log_error(
@@ -417,7 +582,8 @@ async def human_review_node(state: DisputeState) -> DisputeState:
             state
         )
     
-    return state
+    reasoning_writer.start(state["dispute_id"])
+    return update
 
 
 # Conditional routing functions
@@ -434,7 +600,7 @@ def should_rewrite_query(state: DisputeState) -> Literal["rewrite", "proceed"]:
     query_attempts = state.get("query_attempts", 0)
     
     # If quality is low and haven't exhausted attempts, rewrite
-    if avg_similarity < settings.similarity_threshold and query_attempts < 3:
+    if avg_similarity < settings.similarity_threshold and query_attempts < _max_query_attempts(state):
         return "rewrite"
     
     # If exhausted attempts with low quality, escalate
@@ -444,6 +610,20 @@ def should_rewrite_query(state: DisputeState) -> Literal["rewrite", "proceed"]:
     return "proceed"
 
 
+def route_after_enrichment(state: DisputeState) -> Literal["legal_research", "human_review"]:
+    """Skip research for a dispute whose enrichment ran out of time or that load shedding diverts"""
+    if state.get("timed_out_node") or "shed_to_human_review" in state.get("actions_taken", []):
+        return "human_review"
+    return "legal_research"
+
+
+def route_after_action(state: DisputeState) -> Literal["done", "human_review"]:
+    """A timed-out action may not have queued the decision email"""
+    if state.get("timed_out_node") and "email_queued" not in state["actions_taken"]:
+        return "human_review"
+    return "done"
+
+
 def route_by_confidence(state: DisputeState) -> Literal["action", "human_review"]:
     """Route based on confidence score"""
     if state.get("error"):
@@ -464,16 +644,23 @@ def create_dispute_graph() -> StateGraph:
     
     # Add nodes
     workflow.add_node("input", input_node)
-    workflow.add_node("enrichment", enrichment_node)
-    workflow.add_node("legal_research", legal_research_node)
-    workflow.add_node("adjudication", adjudication_node)
-    workflow.add_node("action", action_node)
+    workflow.add_node("enrichment", node_deadlines.wrap("enrichment_node", enrichment_node))
+    workflow.add_node("legal_research", node_deadlines.wrap("legal_research_node", legal_research_node))
+    workflow.add_node("adjudication", node_deadlines.wrap("adjudication_node", adjudication_node))
+    workflow.add_node("action", node_deadlines.wrap("action_node", action_node))
     workflow.add_node("human_review", human_review_node)
     
     # Add edges
     workflow.set_entry_point("input")
     workflow.add_edge("input", "enrichment")
-    workflow.add_edge("enrichment", "legal_research")
+    workflow.add_conditional_edges(
+        "enrichment",
+        route_after_enrichment,
+        {
+            "legal_research": "legal_research",
+            "human_review": "human_review"
+        }
+    )
     
     # Conditional edge after legal research
     workflow.add_conditional_edges(
@@ -497,11 +684,97 @@ def create_dispute_graph() -> StateGraph:
     )
     
     # Terminal nodes
-    workflow.add_edge("action", END)
+    workflow.add_conditional_edges(
+        "action",
+        route_after_action,
+        {
+            "done": END,
+            "human_review": "human_review"
+        }
+    )
     workflow.add_edge("human_review", END)
     
     return workflow.compile()
 
 
+def create_dispute_pipeline() -> StagedPipeline:
+    """Create the staged pipeline running the same nodes and routing as the graph"""
+    enrichment = node_deadlines.wrap("enrichment_node", enrichment_node)
+    
+    async def intake(state: DisputeState) -> Dict[str, Any]:
+        update = await input_node(state)
+        return {**update, **await enrichment({**state, **update})}
+    
+    def after_research(state: DisputeState) -> str:
+        route = should_rewrite_query(state)
+        return {"proceed": "adjudication", "escalate": "human_review"}.get(route, route)
+    
+    def after_action(state: DisputeState) -> str:
+        return "human_review" if route_after_action(state) == "human_review" else DONE
+    
+    queue_size = settings.pipeline_queue_size
+    return StagedPipeline(
+        [
+            Stage("enrichment", intake, route_after_enrichment,
+                  settings.pipeline_enrichment_workers, queue_size),
+            Stage("legal_research", node_deadlines.wrap("legal_research_node", legal_research_node),
+                  after_research, settings.pipeline_retrieval_workers, queue_size,
+                  repeat_routes=("rewrite",)),
+            Stage("adjudication", node_deadlines.wrap("adjudication_node", adjudication_node),
+                  route_by_confidence, settings.pipeline_adjudication_workers, queue_size),
+            Stage("action", node_deadlines.wrap("action_node", action_node),
+                  after_action, settings.pipeline_action_workers, queue_size),
+            Stage("human_review", human_review_node,
+                  lambda state: DONE, settings.pipeline_human_review_workers, queue_size)
+        ],
+        entry="enrichment"
+    )
+
+
 # Global graph instance
 dispute_graph = create_dispute_graph()
+dispute_pipeline = create_dispute_pipeline()
+dispute_scheduler = PriorityScheduler(
+    max_active=settings.scheduler_max_active,
+    aging_rate=settings.scheduler_aging_rate,
+    max_wait=settings.scheduler_max_wait
+)
+load_shedder = LoadShedder(
+    [
+        DegradationTrigger("no_rewrite", settings.shed_no_rewrite_queue_depth, settings.shed_no_rewrite_p95),
+        DegradationTrigger("precomputed_rules", settings.shed_precomputed_rules_queue_depth,
+                           settings.shed_precomputed_rules_p95),
+        DegradationTrigger("human_review_only", settings.shed_human_review_queue_depth,
+                           settings.shed_human_review_p95)
+    ],
+    queue_depth=lambda: dispute_scheduler.waiting + dispute_pipeline.queue_depth(),
+    step_interval=settings.shed_step_interval,
+    recovery_interval=settings.shed_recovery_interval,
+    enabled=settings.load_shedding_enabled
+)
+
+
+async def process_dispute(state: DisputeState) -> DisputeState:
+    """Run a dispute through the configured execution mode once the scheduler admits it"""
+    load_shedder.evaluate()
+    async with dispute_scheduler.slot(state["dispute_id"], state["payload"]):
+        # The processing budget starts at admission; queue wait is bounded by max_wait
+        state["deadline"] = time.time() + settings.dispute_deadline_seconds
+        start = time.monotonic()
+        success = False
+        try:
+            if settings.execution_mode == "staged":
+                result = await dispute_pipeline.process(state)
+            else:
+                result = await dispute_graph.ainvoke(state)
+            success = True
+            artifact_store.record_state(result)
+            return result
+        finally:
+            load_shedder.record(time.monotonic() - start, success)
+            artifact_store.release(state["dispute_id"])
+            # Disputes that stop before adjudication never claim their cache hit
+            decision_cache.discard(state["dispute_id"])
+            # A terminal node that timed out or never ran did not start the deferred
+            # reasoning; start it now so held emails are not left for the hold timeout
+            reasoning_writer.start(state["dispute_id"])
@@ -0,0 +1,150 @@
+"""Staged (SEDA-style) execution of the dispute workflow"""
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from app.schema.state import DisputeState
+from app.tools.health_window import HealthWindow
+
+DONE = "done"
+
+# Handlers return the state keys they changed, like LangGraph nodes
+StageHandler = Callable[[DisputeState], Awaitable[Dict[str, Any]]]
+StageRouter = Callable[[DisputeState], str]
+
+
+@dataclass
+class Stage:
+    """One pipeline stage: a handler, where its output goes, and its worker pool"""
+    name: str
+    handler: StageHandler
+    router: StageRouter
+    workers: int
+    queue_size: int
+    # Routes that re-run this stage in the same worker (e.g. query rewriting)
+    repeat_routes: Tuple[str, ...] = ()
+    queue: Optional[asyncio.Queue] = field(default=None, repr=False)
+    busy: int = 0
+    processed: int = 0
+    failed: int = 0
+    queue_wait_seconds_total: float = 0.0
+    service_times: HealthWindow = field(default_factory=lambda: HealthWindow(300.0), repr=False)
+
+    def get_stats(self) -> Dict[str, Any]:
+        service = self.service_times.get_stats()
+        return {
+            "workers": self.workers,
+            "busy_workers": self.busy,
+            "queue_depth": self.queue.qsize() if self.queue else 0,
+            "queue_size": self.queue_size,
+            "processed": self.processed,
+            "failed": self.failed,
+            "avg_queue_wait_ms": (
+                round(self.queue_wait_seconds_total / self.processed * 1000, 1) if self.processed else 0.0
+            ),
+            "p50_service_ms": service["p50_latency_ms"],
+            "p95_service_ms": service["p95_latency_ms"]
+        }
+
+
+@dataclass
+class StagedItem:
+    """A dispute moving through the pipeline"""
+    state: DisputeState
+    future: asyncio.Future = field(repr=False)
+    enqueued_at: float = field(default_factory=time.monotonic)
+
+
+class StagedPipeline:
+    """
+    Runs the dispute workflow as separate stages instead of one coroutine
+    per dispute. Each stage has its own worker pool and bounded queue, so
+    a stage can be sized to its bottleneck; a full downstream queue blocks
+    the upstream workers feeding it, and ultimately `process`, giving
+    backpressure instead of disputes piling up mid-workflow. Stages use
+    the graph's node and routing functions, so both modes decide alike.
+    """
+
+    def __init__(self, stages: List[Stage], entry: str) -> None:
+        self.stages = {stage.name: stage for stage in stages}
+        self.entry = entry
+        self._tasks: List[asyncio.Task] = []
+
+    def start(self) -> None:
+        """Start every stage's workers"""
+        if self._tasks:
+            return
+        for stage in self.stages.values():
+            stage.queue = asyncio.Queue(maxsize=stage.queue_size)
+            for _ in range(stage.workers):
+                self._tasks.append(asyncio.create_task(self._worker(stage)))
+
+    async def stop(self) -> None:
+        """Stop all workers (disputes still queued are abandoned)"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def process(self, state: DisputeState) -> DisputeState:
+        """Run a dispute through the pipeline, waiting while the entry queue is full"""
+        self.start()
+        item = StagedItem(state, asyncio.get_running_loop().create_future())
+        await self.stages[self.entry].queue.put(item)
+        return await item.future
+
+    async def _worker(self, stage: Stage) -> None:
+        while True:
+            item: StagedItem = await stage.queue.get()
+            stage.queue_wait_seconds_total += time.monotonic() - item.enqueued_at
+            stage.busy += 1
+            start = time.monotonic()
+            success = False
+            try:
+                route = await self._run_stage(stage, item)
+                success = True
+            except Exception as e:
+                stage.failed += 1
+                route = self._on_stage_error(stage, item, e)
+            finally:
+                stage.busy -= 1
+                stage.processed += 1
+                stage.service_times.record(success, time.monotonic() - start)
+                stage.queue.task_done()
+
+            if route is None:
+                continue
+            if route == DONE:
+                if not item.future.done():
+                    item.future.set_result(item.state)
+                continue
+            item.enqueued_at = time.monotonic()
+            # Blocks while the next stage is saturated: backpressure
+            await self.stages[route].queue.put(item)
+
+    async def _run_stage(self, stage: Stage, item: StagedItem) -> str:
+        while True:
+            item.state.update(await stage.handler(item.state))
+            route = stage.router(item.state)
+            if route not in stage.repeat_routes:
+                return route
+
+    def _on_stage_error(self, stage: Stage, item: StagedItem, error: Exception) -> Optional[str]:
+        print(f"Pipeline stage {stage.name} failed for {item.state.get('dispute_id')}: {error}")
+        item.state["error"] = f"{stage.name} failed: {error}"
+        if "human_review" in self.stages and stage.name != "human_review":
+            return "human_review"
+        if not item.future.done():
+            item.future.set_exception(error)
+        return None
+
+    def queue_depth(self) -> int:
+        """Disputes queued across all stages"""
+        return sum(stage.queue.qsize() for stage in self.stages.values() if stage.queue)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get per-stage queue depth, utilization and service times"""
+        return {
+            "running": bool(self._tasks),
+            "stages": {name: stage.get_stats() for name, stage in self.stages.items()}
+        }
@@ -1,4 +1,5 @@
 """FastAPI server and endpoints"""
+import time
 from contextlib import asynccontextmanager
 from typing import List
 from fastapi import FastAPI, HTTPException, Request, status
@@ -11,8 +12,14 @@ from app.schema.models import (
     DisputeStatus,
     HumanReviewCase
 )
-from app.agents.dispute_graph import dispute_graph
+from app.agents.dispute_graph import (
+    dispute_pipeline, llm_pools, load_shedder, prefetcher, process_dispute, reasoning_writer
+)
 from app.db.connection import db_pool
+from app.db.metrics_rollup import metrics_rollup
+from app.tools.smtp_pool import close_all_pools
+from app.tools.circuit_breaker import circuit_breaker_sync
+from app.tools.email_dispatcher import email_dispatcher
 from app.db.vector_store import get_vector_store
 from app.db.human_review import get_pending_reviews
 from app.config.settings import settings
@@ -27,10 +34,26 @@ async def lifespan(app: FastAPI):
     await db_pool.connect(settings.database_url)
     vector_store = get_vector_store()
     vector_store.initialize()
+    metrics_rollup.start()
+    email_dispatcher.start()
+    for pool in llm_pools.values():
+        pool.start()
+    if settings.circuit_breaker_shared_state:
+        circuit_breaker_sync.start()
+    if settings.execution_mode == "staged":
+        dispute_pipeline.start()
     
     yield
     
     # Shutdown
+    await dispute_pipeline.stop()
+    await circuit_breaker_sync.stop()
+    await reasoning_writer.stop()
+    for pool in llm_pools.values():
+        await pool.stop()
+    await email_dispatcher.stop()
+    await metrics_rollup.stop()
+    await close_all_pools()
     await db_pool.close()
 
 
@@ -91,20 +114,29 @@ async def receive_dispute(request: Request, payload: DisputeWebhook) -> DisputeR
         initial_state = {
             "dispute_id": payload.dispute_id,
             "payload": payload_dict,
-            "transaction_history": None,
-            "retrieved_rules": None,
+            "transaction_history_ref": None,
+            "retrieved_rules_ref": None,
             "similarity_scores": None,
             "query_attempts": 0,
             "decision": None,
             "confidence_score": None,
             "actions_taken": [],
             "error": None,
-            "current_node": "initial"
+            "current_node": "initial",
+            "deadline": time.time() + settings.dispute_deadline_seconds,
+            "timed_out_node": None,
+            "degradation_level": None
         }
         
-        # Invoke the state graph (async execution)
+        # Start non-LLM I/O now; the nodes pick up the results when they run.
+        # The dispute deadline is reset at admission, so prefetches are bounded
+        # only by their own call timeouts rather than this provisional one
+        if settings.prefetch_enabled:
+            prefetcher.prefetch(payload.dispute_id, payload_dict)
+        
+        # Run the workflow (whole graph per dispute, or the staged pipeline)
         # In production, this should be queued for background processing
-        result = await dispute_graph.ainvoke(initial_state)
+        result = await process_dispute(initial_state)
         
         return DisputeResponse(
             status="accepted",
@@ -176,10 +208,18 @@ async def health_check() -> dict:
     except Exception as e:
         vector_status = f"unhealthy: {str(e)}"
     
+    # Shedding load is a degraded mode even when every dependency is up
+    degradation_level = load_shedder.evaluate()
+    
     return {
-        "status": "healthy" if db_status == "healthy" and "healthy" in vector_status else "degraded",
+        "status": (
+            "healthy"
+            if db_status == "healthy" and "healthy" in vector_status and degradation_level == "normal"
+            else "degraded"
+        ),
         "database": db_status,
         "vector_store": vector_status,
+        "degradation_level": degradation_level,
         "version": "0.1.0"
     }
 
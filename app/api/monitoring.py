@@ -2,42 +2,39 @@
 from fastapi import APIRouter
 from typing import Dict, List
 from datetime import datetime, timedelta
+from app.config.settings import settings
 from app.db.connection import db_pool
+from app.db.metrics_rollup import metrics_rollup
+from app.db.email_outbox import get_outbox_stats
+from app.tools.email_dispatcher import email_dispatcher
+from app.tools.unified_email_service import unified_email_service
 from app.tools.circuit_breaker import (
     enrichment_circuit_breaker,
     gmail_circuit_breaker,
     llm_circuit_breaker
 )
+from app.tools.concurrency_limiter import chroma_limiter, enrichment_limiter, smtp_limiter
 
 router = APIRouter(prefix="/monitoring", tags=["monitoring"])
 
 
 @router.get("/metrics")
 async def get_metrics() -> Dict:
-    """Get system metrics"""
-    # Query database for metrics
-    query = """
-        SELECT 
-            COUNT(*) as total_disputes,
-            COUNT(CASE WHEN event_type = 'decision_made' THEN 1 END) as decisions_made,
-            AVG(CASE WHEN event_type = 'decision_made' THEN confidence_score END) as avg_confidence,
-            COUNT(CASE WHEN node_name = 'human_review_node' THEN 1 END) as human_reviews
-        FROM audit_log
-        WHERE timestamp > NOW() - INTERVAL '24 hours'
-    """
-    
+    """Get system metrics from minute-bucketed rollups"""
+    from app.agents.dispute_graph import load_shedder
     try:
-        row = await db_pool.fetchrow(query)
+        window = await metrics_rollup.get_window(hours=24)
         
         return {
             "timestamp": datetime.utcnow().isoformat(),
             "period": "24_hours",
             "disputes": {
-                "total": row["total_disputes"] if row else 0,
-                "decisions_made": row["decisions_made"] if row else 0,
-                "human_reviews": row["human_reviews"] if row else 0,
-                "avg_confidence": float(row["avg_confidence"]) if row and row["avg_confidence"] else 0.0
-            }
+                "total": window.total_events,
+                "decisions_made": window.decisions_made,
+                "human_reviews": window.human_reviews,
+                "avg_confidence": window.avg_confidence
+            },
+            "load_shedding": load_shedder.get_state()
         }
     except Exception as e:
         return {
@@ -85,30 +82,111 @@ async def get_review_queue_stats() -> Dict:
         return {"error": str(e)}
 
 
+@router.get("/email/outbox")
+async def get_email_outbox_stats() -> Dict:
+    """Get email outbox backlog and dispatcher statistics"""
+    try:
+        return {
+            "outbox": await get_outbox_stats(),
+            "dispatcher": email_dispatcher.get_state()
+        }
+    except Exception as e:
+        return {"error": str(e)}
+
+
+@router.get("/email/providers")
+async def get_email_provider_stats() -> Dict:
+    """Get per-provider email delivery health and latency"""
+    return unified_email_service.get_provider_stats()
+
+
+@router.get("/adjudication")
+async def get_adjudication_stats() -> Dict:
+    """Get LLM adjudication counters, validation retries, model tier split, decision table coverage, decision cache and deferred reasoning"""
+    from app.agents.dispute_graph import adjudicator, decision_cache, decision_table, reasoning_writer
+    return {
+        **adjudicator.get_stats(),
+        "decision_table": decision_table.get_stats(),
+        "decision_cache": decision_cache.get_stats(),
+        "deferred_reasoning": reasoning_writer.get_stats()
+    }
+
+
+@router.get("/concurrency")
+async def get_concurrency_limits() -> Dict:
+    """Get adaptive concurrency limits, in-flight calls and queue waits per downstream"""
+    from app.agents.dispute_graph import llm_pools
+    limiters = [chroma_limiter, enrichment_limiter, smtp_limiter]
+    for pool in llm_pools.values():
+        limiters += ([pool.limiter] if pool.limiter else []) + list(pool.shape_limiters.values())
+    return {
+        "timestamp": datetime.utcnow().isoformat(),
+        "limiters": {limiter.name: limiter.get_state() for limiter in limiters}
+    }
+
+
+@router.get("/pipeline")
+async def get_pipeline_stats() -> Dict:
+    """Get staged pipeline queue depths, worker utilization and service times per stage"""
+    from app.agents.dispute_graph import dispute_pipeline
+    return {"execution_mode": settings.execution_mode, **dispute_pipeline.get_stats()}
+
+
+@router.get("/prefetch")
+async def get_prefetch_stats() -> Dict:
+    """Get enqueue-time prefetch usage and how often its I/O was already done"""
+    from app.agents.dispute_graph import prefetcher
+    return prefetcher.get_stats()
+
+
+@router.get("/scheduler")
+async def get_scheduler_stats() -> Dict:
+    """Get admission queue depth and queue latency per priority class"""
+    from app.agents.dispute_graph import dispute_scheduler
+    return dispute_scheduler.get_stats()
+
+
+@router.get("/load-shedding")
+async def get_load_shedding() -> Dict:
+    """Get the degradation level, the load signals driving it and work shed per level"""
+    from app.agents.dispute_graph import load_shedder
+    return load_shedder.get_state()
+
+
+@router.get("/state-size")
+async def get_state_size() -> Dict:
+    """Get per-dispute state size and bytes written to the audit log"""
+    from app.db.audit_logger import audit_logger
+    from app.tools.artifact_store import artifact_store
+    return {"state": artifact_store.get_stats(), "audit_log": audit_logger.get_stats()}
+
+
+@router.get("/timeouts")
+async def get_node_timeouts() -> Dict:
+    """Get per-node timeout counters and the dispute deadline budget"""
+    from app.agents.dispute_graph import node_deadlines
+    return node_deadlines.get_stats()
+
+
+@router.get("/llm/endpoints")
+async def get_llm_endpoints() -> Dict:
+    """Get per-endpoint load and health for each model's LLM pool"""
+    from app.agents.dispute_graph import llm_pools
+    return {model: pool.get_state() for model, pool in llm_pools.items()}
+
+
 @router.get("/rag/quality")
 async def get_rag_quality_metrics() -> Dict:
-    """Get RAG retrieval quality metrics"""
-    query = """
-        SELECT 
-            AVG((state_data->>'average_similarity')::float) as avg_similarity,
-            COUNT(*) as total_retrievals,
-            COUNT(CASE WHEN (state_data->>'average_similarity')::float < 0.7 THEN 1 END) as low_quality,
-            COUNT(CASE WHEN (state_data->>'average_similarity')::float >= 0.7 THEN 1 END) as high_quality
-        FROM audit_log
-        WHERE event_type = 'rag_retrieval'
-        AND timestamp > NOW() - INTERVAL '24 hours'
-        AND state_data->>'average_similarity' IS NOT NULL
-    """
-    
+    """Get RAG retrieval quality metrics from minute-bucketed rollups"""
     try:
-        row = await db_pool.fetchrow(query)
+        window = await metrics_rollup.get_window(hours=24)
         
         return {
             "period": "24_hours",
-            "avg_similarity": float(row["avg_similarity"]) if row and row["avg_similarity"] else 0.0,
-            "total_retrievals": row["total_retrievals"] if row else 0,
-            "low_quality_count": row["low_quality"] if row else 0,
-            "high_quality_count": row["high_quality"] if row else 0
+            "avg_similarity": window.avg_similarity,
+            "total_retrievals": window.rag_retrievals,
+            "low_quality_count": window.low_quality_retrievals,
+            "high_quality_count": window.high_quality_retrievals
         }
     except Exception as e:
         return {"error": str(e)}
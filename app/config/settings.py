@@ -24,10 +24,92 @@ class Settings(BaseSettings):
     smtp_email: str = ""
     smtp_password: str = ""
     
+    # Email Outbox Configuration
+    outbox_batch_size: int = 50  # Emails claimed per dispatcher batch
+    outbox_poll_interval: float = 2.0  # Seconds between polls when the outbox is drained
+    
+    # Email Provider Routing
+    email_provider_timeout: float = 15.0  # Per-provider send timeout in seconds
+    email_health_window: float = 300.0  # Seconds of history used to rank providers
+    email_hedge_enabled: bool = False  # May deliver duplicates when both providers succeed
+    
     # LLM Configuration
     llm_api_key: str = "not-needed-for-ollama"
     llm_model: str = "llama3.2"
     llm_provider: str = "ollama"  # "openai", "google", or "ollama"
+    llm_streaming: bool = True  # Stream adjudication and stop once the JSON object closes
+    llm_keep_alive: str = "30m"  # How long Ollama keeps the model (and its prompt cache) loaded; "-1" = forever
+    llm_rewrite_model: str = ""  # Model for RAG query rewriting (defaults to llm_model)
+    llm_small_model: str = ""  # First-pass adjudication model; empty disables the cascade
+    llm_decision_first: bool = False  # Generate the verdict inline and the reasoning in the background
+    reasoning_hold_seconds: float = 300.0  # Longest an email waits for deferred reasoning
+    llm_batch_enabled: bool = False  # Combine concurrent adjudications into multi-dispute prompts
+    llm_batch_max_size: int = 8  # Disputes per batched prompt
+    llm_batch_max_wait: float = 0.05  # Seconds a dispute waits for others to join its batch
+    
+    # LLM Endpoint Pool
+    llm_base_urls: str = "http://host.docker.internal:11434"  # Comma-separated model servers
+    llm_max_in_flight: int = 4  # Concurrent requests per endpoint
+    llm_eject_after: int = 3  # Consecutive failures before an endpoint is ejected
+    llm_eject_seconds: float = 30.0  # Minimum ejection time before readmission
+    llm_health_check_interval: float = 15.0  # Seconds between endpoint health checks
+    llm_call_timeout: float = 30.0  # Per-call deadline, well under the client's own timeout
+    llm_hedge_enabled: bool = False  # Duplicate slow calls to a second endpoint after its p95
+    llm_max_queue: int = 100  # Calls waiting for the adaptive concurrency limit before rejection
+    
+    # Prompt Configuration
+    prompt_rules_token_budget: int = 1500  # Token budget for the rules section of the adjudication prompt
+    prompt_max_sentences_per_rule: int = 4  # Most relevant sentences kept from each retrieved rule
+    
+    # Decision Table
+    decision_table_mode: str = "shadow"  # "off", "shadow" (compare with the LLM) or "active" (skip the LLM)
+    decision_table_path: Optional[str] = None  # JSON list of rules; defaults to the built-in table
+    
+    # Decision Cache
+    decision_cache_enabled: bool = False  # Reuse retrieval and decisions across near-duplicate disputes
+    decision_cache_similarity: float = 0.95  # Minimum description embedding similarity for a hit
+    decision_cache_ttl: float = 3600.0  # Seconds a cached decision stays reusable
+    decision_cache_max_entries: int = 1000
+    
+    # Deadlines
+    dispute_deadline_seconds: float = 180.0  # End-to-end budget for one dispute
+    enrichment_timeout: float = 25.0  # Per-node budgets; an overrun routes to human review
+    legal_research_timeout: float = 60.0
+    adjudication_timeout: float = 90.0
+    action_timeout: float = 15.0
+    
+    # Circuit Breakers
+    circuit_breaker_shared_state: bool = True  # Share open/closed transitions across workers via Postgres
+    circuit_breaker_sync_interval: float = 2.0  # Seconds between shared state syncs
+    
+    # Execution
+    execution_mode: str = "graph"  # "graph" (one coroutine per dispute) or "staged" (per-stage worker pools)
+    pipeline_queue_size: int = 100  # Bounded queue in front of each stage
+    pipeline_enrichment_workers: int = 16
+    pipeline_retrieval_workers: int = 8
+    pipeline_adjudication_workers: int = 8  # Size to the LLM pool's capacity
+    pipeline_action_workers: int = 4
+    pipeline_human_review_workers: int = 4
+    
+    # Prefetch
+    prefetch_enabled: bool = True  # Start history and initial retrieval when a dispute is accepted
+    prefetch_ttl: float = 300.0  # Seconds unused prefetched results are kept
+    
+    # Scheduling
+    scheduler_max_active: int = 32  # Disputes processed at once; the rest wait earliest-deadline-first
+    scheduler_aging_rate: float = 1440.0  # Deadline seconds credited per second waited (1 day per minute)
+    scheduler_max_wait: float = 300.0  # Seconds after which a waiting dispute is admitted next regardless
+    
+    # Load Shedding (each level switches on at its queue depth or end-to-end p95, whichever comes first)
+    load_shedding_enabled: bool = True
+    shed_no_rewrite_queue_depth: int = 50  # Skip query rewrites
+    shed_no_rewrite_p95: float = 60.0
+    shed_precomputed_rules_queue_depth: int = 150  # Reuse reason-code rules, trust the decision table
+    shed_precomputed_rules_p95: float = 110.0
+    shed_human_review_queue_depth: int = 400  # Route to human review without an LLM call
+    shed_human_review_p95: float = 160.0
+    shed_step_interval: float = 10.0  # Minimum seconds between stepping up a level
+    shed_recovery_interval: float = 30.0  # Seconds below a level's trigger before stepping down
     
     # Application Configuration
     log_level: str = "INFO"
@@ -35,6 +117,10 @@ class Settings(BaseSettings):
     confidence_threshold: float = 0.85
     similarity_threshold: float = 0.7
     
+    # Monitoring Configuration
+    metrics_flush_interval: float = 10.0  # Seconds between rollup flushes
+    metrics_cache_ttl: float = 15.0  # Seconds monitoring reads are cached
+    
     # Server Configuration
     host: str = "0.0.0.0"
     port: int = 8000
@@ -3,12 +3,26 @@ import json
 from datetime import datetime
 from typing import Any, Dict, List, Optional
 from app.db.connection import db_pool
+from app.db.metrics_rollup import metrics_rollup
 from app.schema.models import DisputeDecision
 
 
 class AuditLogger:
     """Handles audit trail logging to PostgreSQL"""
     
+    def __init__(self) -> None:
+        # JSON bytes written to audit_log, by event type
+        self.bytes_written: Dict[str, int] = {}
+        self.events_written: Dict[str, int] = {}
+    
+    def _serialize(self, event_type: str, data: Optional[Dict[str, Any]]) -> Optional[str]:
+        if data is None:
+            return None
+        text = json.dumps(data)
+        self.bytes_written[event_type] = self.bytes_written.get(event_type, 0) + len(text.encode())
+        self.events_written[event_type] = self.events_written.get(event_type, 0) + 1
+        return text
+    
     async def log_node_entry(
         self,
         dispute_id: str,
@@ -25,16 +39,22 @@ class AuditLogger:
             dispute_id,
             node_name,
             "node_entry",
-            json.dumps(state),
+            self._serialize("node_entry", state),
             datetime.utcnow()
         )
+        metrics_rollup.record(node_name, "node_entry")
     
     async def log_decision(
         self,
         dispute_id: str,
-        decision: DisputeDecision
+        decision: DisputeDecision,
+        cached_from: Optional[str] = None,
+        conn: Optional[Any] = None
     ) -> None:
-        """Log adjudication decision"""
+        """
+        Log adjudication decision (reused from `cached_from` on a decision cache hit).
+        Pass `conn` to write it inside the caller's transaction.
+        """
         query = """
             INSERT INTO audit_log (
                 dispute_id, node_name, event_type, reasoning,
@@ -42,16 +62,48 @@ class AuditLogger:
             )
             VALUES ($1, $2, $3, $4, $5, $6, $7)
         """
-        await db_pool.execute(
+        await (conn or db_pool).execute(
             query,
             dispute_id,
             "adjudication_node",
             "decision_made",
             decision.reasoning,
             decision.confidence_score,
-            json.dumps({"supporting_rules": decision.supporting_rules}),
+            self._serialize("decision_made", {
+                "supporting_rules": decision.supporting_rules,
+                **({"cached_from": cached_from} if cached_from else {})
+            }),
+            datetime.utcnow()
+        )
+        metrics_rollup.record(
+            "adjudication_node",
+            "decision_made",
+            confidence_score=decision.confidence_score
+        )
+    
+    async def log_reasoning(
+        self,
+        dispute_id: str,
+        reasoning: str,
+        generation_seconds: float
+    ) -> None:
+        """Log reasoning generated after a decision-first verdict"""
+        query = """
+            INSERT INTO audit_log (
+                dispute_id, node_name, event_type, reasoning, state_data, timestamp
+            )
+            VALUES ($1, $2, $3, $4, $5, $6)
+        """
+        await db_pool.execute(
+            query,
+            dispute_id,
+            "adjudication_node",
+            "reasoning_generated",
+            reasoning,
+            self._serialize("reasoning_generated", {"generation_seconds": round(generation_seconds, 3)}),
             datetime.utcnow()
         )
+        metrics_rollup.record("adjudication_node", "reasoning_generated")
     
     async def log_retrieval(
         self,
@@ -67,19 +119,53 @@ class AuditLogger:
             )
             VALUES ($1, $2, $3, $4, $5)
         """
+        average_similarity = sum(similarity_scores) / len(similarity_scores) if similarity_scores else 0.0
         await db_pool.execute(
             query,
             dispute_id,
             "legal_research_node",
             "rag_retrieval",
-            json.dumps({
+            self._serialize("rag_retrieval", {
                 "query": query_text,
                 "num_documents": len(documents),
                 "similarity_scores": similarity_scores,
-                "average_similarity": sum(similarity_scores) / len(similarity_scores) if similarity_scores else 0.0
+                "average_similarity": average_similarity
             }),
             datetime.utcnow()
         )
+        metrics_rollup.record(
+            "legal_research_node",
+            "rag_retrieval",
+            average_similarity=average_similarity
+        )
+    
+    async def log_cache_hit(
+        self,
+        dispute_id: str,
+        source_dispute_id: str,
+        similarity: float,
+        corpus_version: Optional[str]
+    ) -> None:
+        """Log reuse of a near-duplicate dispute's retrieval and decision"""
+        query = """
+            INSERT INTO audit_log (
+                dispute_id, node_name, event_type, state_data, timestamp
+            )
+            VALUES ($1, $2, $3, $4, $5)
+        """
+        await db_pool.execute(
+            query,
+            dispute_id,
+            "legal_research_node",
+            "decision_cache_hit",
+            self._serialize("decision_cache_hit", {
+                "source_dispute_id": source_dispute_id,
+                "similarity": round(similarity, 4),
+                "corpus_version": corpus_version
+            }),
+            datetime.utcnow()
+        )
+        metrics_rollup.record("legal_research_node", "decision_cache_hit")
     
     async def log_action(
         self,
@@ -99,9 +185,10 @@ class AuditLogger:
             dispute_id,
             "action_node",
             action_type,
-            json.dumps(metadata),
+            self._serialize(action_type, metadata),
             datetime.utcnow()
         )
+        metrics_rollup.record("action_node", action_type)
     
     async def log_error(
         self,
@@ -123,9 +210,25 @@ class AuditLogger:
             node_name,
             "error",
             error_message,
-            json.dumps(state) if state else None,
+            self._serialize("error", state or None),
             datetime.utcnow()
         )
+        metrics_rollup.record(node_name, "error")
+
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get JSON bytes written to the audit log per event type"""
+        return {
+            "bytes_total": sum(self.bytes_written.values()),
+            "events": {
+                event_type: {
+                    "count": count,
+                    "bytes": self.bytes_written[event_type],
+                    "avg_bytes": round(self.bytes_written[event_type] / count)
+                }
+                for event_type, count in self.events_written.items()
+            }
+        }
 
 
 # Global audit logger instance
@@ -0,0 +1,24 @@
+"""Circuit breaker state shared across workers"""
+from datetime import datetime
+from typing import Dict, Tuple
+from app.db.connection import db_pool
+
+
+async def publish_breaker_state(name: str, state: str, changed_at: float) -> None:
+    """Record a breaker transition unless another worker has published a newer one"""
+    query = """
+        INSERT INTO circuit_breaker_state (name, state, changed_at, updated_at)
+        VALUES ($1, $2, $3, $4)
+        ON CONFLICT (name) DO UPDATE SET
+            state = EXCLUDED.state,
+            changed_at = EXCLUDED.changed_at,
+            updated_at = EXCLUDED.updated_at
+        WHERE circuit_breaker_state.changed_at < EXCLUDED.changed_at
+    """
+    await db_pool.execute(query, name, state, changed_at, datetime.utcnow())
+
+
+async def fetch_breaker_states() -> Dict[str, Tuple[str, float]]:
+    """Get the latest published state and transition time of every breaker"""
+    rows = await db_pool.fetch("SELECT name, state, changed_at FROM circuit_breaker_state")
+    return {row["name"]: (row["state"], row["changed_at"]) for row in rows}
@@ -1,6 +1,7 @@
 """Database connection management"""
 import asyncpg
-from typing import Optional
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
 
 
 class DatabasePool:
@@ -33,6 +34,13 @@ class DatabasePool:
         async with self.pool.acquire() as conn:
             return await conn.fetch(query, *args)
     
+    @asynccontextmanager
+    async def transaction(self) -> AsyncIterator[asyncpg.Connection]:
+        """Run several statements atomically on one connection"""
+        async with self.pool.acquire() as conn:
+            async with conn.transaction():
+                yield conn
+    
     async def fetchrow(self, query: str, *args: any) -> Optional[asyncpg.Record]:
         """Execute a query and return a single row"""
         async with self.pool.acquire() as conn:
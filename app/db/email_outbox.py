@@ -0,0 +1,149 @@
+"""Transactional outbox for customer notification emails"""
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Any, Dict, List, Optional
+from app.db.connection import db_pool
+
+
+async def enqueue_email(
+    dispute_id: str,
+    to_email: str,
+    customer_name: str,
+    decision: str,
+    reasoning: str,
+    amount: float,
+    currency: str = "INR",
+    hold_seconds: Optional[float] = None,
+    conn: Optional[Any] = None
+) -> None:
+    """
+    Record a decision email for background delivery.
+    Re-running a dispute with the same decision does not queue a second email.
+    With `hold_seconds`, the email is held until attach_reasoning() fills in
+    the deferred reasoning, or is sent as-is once the hold expires.
+    Pass `conn` to insert it in the same transaction as the decision record.
+    """
+    query = """
+        INSERT INTO email_outbox (
+            idempotency_key, dispute_id, to_email, customer_name, decision,
+            reasoning, amount, currency, status, attempts, next_attempt_at,
+            created_at, updated_at
+        )
+        VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, 0, $10, $11, $11)
+        ON CONFLICT (idempotency_key) DO NOTHING
+    """
+    now = datetime.utcnow()
+    held = hold_seconds is not None
+    await (conn or db_pool).execute(
+        query,
+        f"{dispute_id}:{decision}",
+        dispute_id,
+        to_email,
+        customer_name,
+        decision,
+        reasoning,
+        Decimal(str(amount)),
+        currency,
+        "held" if held else "pending",
+        now + timedelta(seconds=hold_seconds) if held else now,
+        now
+    )
+
+
+async def attach_reasoning(dispute_id: str, placeholder: str, reasoning: str) -> int:
+    """
+    Replace the deferred-reasoning placeholder in a dispute's held emails
+    and release them for sending. Returns the number of emails released.
+    """
+    query = """
+        UPDATE email_outbox
+        SET reasoning = REPLACE(reasoning, $2, $3), status = 'pending',
+            next_attempt_at = $4, updated_at = $4
+        WHERE dispute_id = $1 AND status = 'held'
+    """
+    result = await db_pool.execute(query, dispute_id, placeholder, reasoning, datetime.utcnow())
+    # asyncpg returns the command tag, e.g. "UPDATE 1"
+    try:
+        return int(str(result).split()[-1])
+    except (ValueError, IndexError):
+        return 0
+
+
+async def claim_batch(limit: int, lease_seconds: int = 300) -> List[Dict[str, Any]]:
+    """
+    Atomically claim due emails for sending.
+    Rows stuck in 'sending' past their lease (e.g. a crashed dispatcher) are reclaimed,
+    and held rows whose reasoning never arrived are sent with the placeholder.
+    """
+    query = """
+        UPDATE email_outbox
+        SET status = 'sending', attempts = attempts + 1, updated_at = $2
+        WHERE id IN (
+            SELECT id FROM email_outbox
+            WHERE (status IN ('pending', 'held') AND next_attempt_at <= $2)
+               OR (status = 'sending' AND updated_at < $3)
+            ORDER BY next_attempt_at ASC
+            LIMIT $1
+            FOR UPDATE SKIP LOCKED
+        )
+        RETURNING id, dispute_id, to_email, customer_name, decision, reasoning,
+                  amount, currency, attempts, created_at
+    """
+    now = datetime.utcnow()
+    rows = await db_pool.fetch(query, limit, now, now - timedelta(seconds=lease_seconds))
+    return [dict(row) for row in rows]
+
+
+async def mark_sent(email_id: int, provider: Optional[str]) -> None:
+    """Mark an outbox email as delivered"""
+    query = """
+        UPDATE email_outbox
+        SET status = 'sent', provider = $1, sent_at = $2, updated_at = $2, last_error = NULL
+        WHERE id = $3
+    """
+    await db_pool.execute(query, provider, datetime.utcnow(), email_id)
+
+
+async def mark_failed(
+    email_id: int,
+    error: str,
+    retry_at: Optional[datetime]
+) -> None:
+    """Schedule a retry, or dead-letter the email when retry_at is None"""
+    query = """
+        UPDATE email_outbox
+        SET status = $1, last_error = $2, next_attempt_at = COALESCE($3, next_attempt_at),
+            updated_at = $4
+        WHERE id = $5
+    """
+    await db_pool.execute(
+        query,
+        "pending" if retry_at else "dead",
+        error,
+        retry_at,
+        datetime.utcnow(),
+        email_id
+    )
+
+
+async def get_outbox_stats() -> Dict[str, Any]:
+    """Count outbox emails by delivery status"""
+    query = """
+        SELECT
+            COUNT(CASE WHEN status = 'pending' THEN 1 END) as pending,
+            COUNT(CASE WHEN status = 'held' THEN 1 END) as held,
+            COUNT(CASE WHEN status = 'sending' THEN 1 END) as sending,
+            COUNT(CASE WHEN status = 'dead' THEN 1 END) as dead,
+            MIN(CASE WHEN status = 'pending' THEN created_at END) as oldest_pending
+        FROM email_outbox
+        WHERE status <> 'sent'
+    """
+    row = await db_pool.fetchrow(query)
+
+    return {
+        "pending": row["pending"] if row else 0,
+        "held": row["held"] if row else 0,
+        "sending": row["sending"] if row else 0,
+        "dead": row["dead"] if row else 0,
+        "oldest_pending": row["oldest_pending"].isoformat() if row and row["oldest_pending"] else None
+    }
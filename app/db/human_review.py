@@ -51,6 +51,16 @@ async def add_to_review_queue(
     )
 
 
+async def update_review_reasoning(dispute_id: str, reasoning: str) -> None:
+    """Attach reasoning generated after the case was queued (decision-first mode)"""
+    query = """
+        UPDATE human_review_queue
+        SET reasoning = $2, updated_at = $3
+        WHERE dispute_id = $1 AND status = 'pending_review'
+    """
+    await db_pool.execute(query, dispute_id, reasoning, datetime.utcnow())
+
+
 async def get_pending_reviews() -> List[HumanReviewCase]:
     """Retrieve all pending human review cases"""
     query = """
@@ -0,0 +1,258 @@
+"""Minute-bucketed metrics rollups maintained incrementally from audit events"""
+import asyncio
+import time
+from dataclasses import dataclass, fields
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Tuple
+from app.db.connection import db_pool
+from app.config.settings import settings
+
+
+# Similarity cut-off used to split retrievals into low/high quality
+RAG_QUALITY_THRESHOLD = 0.7
+
+
+@dataclass
+class RollupBucket:
+    """Aggregated counters for one minute of audit events"""
+    total_events: int = 0
+    decisions_made: int = 0
+    confidence_sum: float = 0.0
+    human_reviews: int = 0
+    rag_retrievals: int = 0
+    similarity_sum: float = 0.0
+    low_quality_retrievals: int = 0
+    high_quality_retrievals: int = 0
+
+    def merge(self, other: "RollupBucket") -> None:
+        """Add another bucket's counters into this one"""
+        for f in fields(self):
+            setattr(self, f.name, getattr(self, f.name) + getattr(other, f.name))
+
+    @property
+    def avg_confidence(self) -> float:
+        return self.confidence_sum / self.decisions_made if self.decisions_made else 0.0
+
+    @property
+    def avg_similarity(self) -> float:
+        return self.similarity_sum / self.rag_retrievals if self.rag_retrievals else 0.0
+
+
+class MetricsRollup:
+    """
+    Maintains per-minute counters as audit events are logged and flushes them
+    to the audit_metrics_rollup table. Dashboards read O(buckets) rows instead
+    of scanning audit_log.
+    """
+
+    def __init__(
+        self,
+        flush_interval: float = 10.0,
+        cache_ttl: float = 15.0,
+        retention_days: int = 7
+    ) -> None:
+        self.flush_interval = flush_interval
+        self.cache_ttl = cache_ttl
+        self.retention_days = retention_days
+        self._pending: Dict[datetime, RollupBucket] = {}
+        # Buckets taken by an in-progress flush but not yet written
+        self._flushing: Dict[datetime, RollupBucket] = {}
+        self._flushes = 0
+        self._cache: Dict[int, Tuple[float, RollupBucket]] = {}
+        self._refresh_locks: Dict[int, asyncio.Lock] = {}
+        self._flusher_task: Optional[asyncio.Task] = None
+        self._last_prune: float = 0.0
+
+    def record(
+        self,
+        node_name: str,
+        event_type: str,
+        confidence_score: Optional[float] = None,
+        average_similarity: Optional[float] = None
+    ) -> None:
+        """Count a logged audit event in the current minute bucket"""
+        minute = datetime.utcnow().replace(second=0, microsecond=0)
+        bucket = self._pending.get(minute)
+        if bucket is None:
+            bucket = self._pending[minute] = RollupBucket()
+
+        bucket.total_events += 1
+        if node_name == "human_review_node":
+            bucket.human_reviews += 1
+        if event_type == "decision_made":
+            bucket.decisions_made += 1
+            bucket.confidence_sum += float(confidence_score or 0.0)
+        if event_type == "rag_retrieval" and average_similarity is not None:
+            bucket.rag_retrievals += 1
+            bucket.similarity_sum += average_similarity
+            if average_similarity < RAG_QUALITY_THRESHOLD:
+                bucket.low_quality_retrievals += 1
+            else:
+                bucket.high_quality_retrievals += 1
+
+    async def flush(self) -> None:
+        """Upsert pending buckets into the rollup table"""
+        if not self._pending:
+            return
+
+        # Swap out pending buckets before awaiting so new events land in a fresh dict
+        pending, self._pending = self._pending, {}
+        self._flushing = pending
+
+        query = """
+            INSERT INTO audit_metrics_rollup (
+                bucket, total_events, decisions_made, confidence_sum, human_reviews,
+                rag_retrievals, similarity_sum, low_quality_retrievals,
+                high_quality_retrievals, updated_at
+            )
+            VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10)
+            ON CONFLICT (bucket) DO UPDATE SET
+                total_events = audit_metrics_rollup.total_events + EXCLUDED.total_events,
+                decisions_made = audit_metrics_rollup.decisions_made + EXCLUDED.decisions_made,
+                confidence_sum = audit_metrics_rollup.confidence_sum + EXCLUDED.confidence_sum,
+                human_reviews = audit_metrics_rollup.human_reviews + EXCLUDED.human_reviews,
+                rag_retrievals = audit_metrics_rollup.rag_retrievals + EXCLUDED.rag_retrievals,
+                similarity_sum = audit_metrics_rollup.similarity_sum + EXCLUDED.similarity_sum,
+                low_quality_retrievals = audit_metrics_rollup.low_quality_retrievals + EXCLUDED.low_quality_retrievals,
+                high_quality_retrievals = audit_metrics_rollup.high_quality_retrievals + EXCLUDED.high_quality_retrievals,
+                updated_at = EXCLUDED.updated_at
+        """
+
+        try:
+            while pending:
+                minute, bucket = next(iter(pending.items()))
+                try:
+                    await db_pool.execute(
+                        query,
+                        minute,
+                        bucket.total_events,
+                        bucket.decisions_made,
+                        bucket.confidence_sum,
+                        bucket.human_reviews,
+                        bucket.rag_retrievals,
+                        bucket.similarity_sum,
+                        bucket.low_quality_retrievals,
+                        bucket.high_quality_retrievals,
+                        datetime.utcnow()
+                    )
+                except Exception:
+                    # Put unflushed buckets back so the next flush retries them
+                    for unflushed_minute, unflushed in pending.items():
+                        self._pending.setdefault(unflushed_minute, RollupBucket()).merge(unflushed)
+                    raise
+                del pending[minute]
+                # Cached windows predate this bucket; drop them so reads don't undercount
+                self._flushes += 1
+                self._cache.clear()
+        finally:
+            self._flushing = {}
+
+        await self._prune()
+
+    async def _prune(self) -> None:
+        """Drop rollup rows older than the retention period (at most hourly)"""
+        now = time.monotonic()
+        if now - self._last_prune < 3600:
+            return
+        self._last_prune = now
+        await db_pool.execute(
+            "DELETE FROM audit_metrics_rollup WHERE bucket < $1",
+            datetime.utcnow() - timedelta(days=self.retention_days)
+        )
+
+    async def run_flusher(self) -> None:
+        """Flush pending buckets periodically until cancelled"""
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"Metrics rollup flush failed: {e}")
+
+    def start(self) -> None:
+        """Start the background flusher"""
+        if self._flusher_task is None or self._flusher_task.done():
+            self._flusher_task = asyncio.create_task(self.run_flusher())
+
+    async def stop(self) -> None:
+        """Stop the background flusher and flush remaining buckets"""
+        if self._flusher_task:
+            self._flusher_task.cancel()
+            try:
+                await self._flusher_task
+            except asyncio.CancelledError:
+                pass
+            self._flusher_task = None
+        await self.flush()
+
+    async def get_window(self, hours: int = 24) -> RollupBucket:
+        """
+        Aggregate the last `hours` of rollups.
+        Database reads are cached for `cache_ttl` seconds and only one caller
+        per window refreshes an expired entry; others wait for its result.
+        """
+        totals = RollupBucket()
+        totals.merge(await self._get_flushed_window(hours))
+
+        # Include this worker's events that have not been flushed yet
+        cutoff = datetime.utcnow() - timedelta(hours=hours)
+        for minute, bucket in [*self._pending.items(), *self._flushing.items()]:
+            if minute >= cutoff:
+                totals.merge(bucket)
+
+        return totals
+
+    async def _get_flushed_window(self, hours: int) -> RollupBucket:
+        cached = self._cache.get(hours)
+        if cached and time.monotonic() - cached[0] < self.cache_ttl:
+            return cached[1]
+
+        lock = self._refresh_locks.setdefault(hours, asyncio.Lock())
+        async with lock:
+            # Another caller may have refreshed while we waited
+            cached = self._cache.get(hours)
+            if cached and time.monotonic() - cached[0] < self.cache_ttl:
+                return cached[1]
+
+            flushes = self._flushes
+            bucket = await self._fetch_window(hours)
+            # A flush during the query may have moved buckets out of pending after it read
+            if self._flushes == flushes:
+                self._cache[hours] = (time.monotonic(), bucket)
+            return bucket
+
+    async def _fetch_window(self, hours: int) -> RollupBucket:
+        query = """
+            SELECT
+                COALESCE(SUM(total_events), 0) as total_events,
+                COALESCE(SUM(decisions_made), 0) as decisions_made,
+                COALESCE(SUM(confidence_sum), 0) as confidence_sum,
+                COALESCE(SUM(human_reviews), 0) as human_reviews,
+                COALESCE(SUM(rag_retrievals), 0) as rag_retrievals,
+                COALESCE(SUM(similarity_sum), 0) as similarity_sum,
+                COALESCE(SUM(low_quality_retrievals), 0) as low_quality_retrievals,
+                COALESCE(SUM(high_quality_retrievals), 0) as high_quality_retrievals
+            FROM audit_metrics_rollup
+            WHERE bucket >= $1
+        """
+        row = await db_pool.fetchrow(query, datetime.utcnow() - timedelta(hours=hours))
+        if not row:
+            return RollupBucket()
+
+        return RollupBucket(
+            total_events=int(row["total_events"]),
+            decisions_made=int(row["decisions_made"]),
+            confidence_sum=float(row["confidence_sum"]),
+            human_reviews=int(row["human_reviews"]),
+            rag_retrievals=int(row["rag_retrievals"]),
+            similarity_sum=float(row["similarity_sum"]),
+            low_quality_retrievals=int(row["low_quality_retrievals"]),
+            high_quality_retrievals=int(row["high_quality_retrievals"])
+        )
+
+
+# Global metrics rollup instance
+metrics_rollup = MetricsRollup(
+    flush_interval=settings.metrics_flush_interval,
+    cache_ttl=settings.metrics_cache_ttl
+)
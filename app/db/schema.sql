@@ -53,3 +53,49 @@ CREATE TABLE IF NOT EXISTS dispute_history (
 CREATE INDEX idx_dispute_history_dispute_id ON dispute_history(dispute_id);
 CREATE INDEX idx_dispute_history_status ON dispute_history(status);
 CREATE INDEX idx_dispute_history_created_at ON dispute_history(created_at);
+
+
+-- Minute-bucketed rollups of audit events for monitoring dashboards
+CREATE TABLE IF NOT EXISTS audit_metrics_rollup (
+    bucket TIMESTAMP PRIMARY KEY,
+    total_events BIGINT NOT NULL DEFAULT 0,
+    decisions_made BIGINT NOT NULL DEFAULT 0,
+    confidence_sum DOUBLE PRECISION NOT NULL DEFAULT 0,
+    human_reviews BIGINT NOT NULL DEFAULT 0,
+    rag_retrievals BIGINT NOT NULL DEFAULT 0,
+    similarity_sum DOUBLE PRECISION NOT NULL DEFAULT 0,
+    low_quality_retrievals BIGINT NOT NULL DEFAULT 0,
+    high_quality_retrievals BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP NOT NULL DEFAULT NOW()
+);
+
+-- Outbox of customer emails awaiting background delivery
+CREATE TABLE IF NOT EXISTS email_outbox (
+    id SERIAL PRIMARY KEY,
+    idempotency_key VARCHAR(320) UNIQUE NOT NULL,
+    dispute_id VARCHAR(255) NOT NULL,
+    to_email VARCHAR(320) NOT NULL,
+    customer_name VARCHAR(255) NOT NULL,
+    decision VARCHAR(50) NOT NULL,
+    reasoning TEXT NOT NULL,
+    amount DECIMAL(12, 2) NOT NULL,
+    currency VARCHAR(10) NOT NULL,
+    status VARCHAR(20) NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    last_error TEXT,
+    provider VARCHAR(50),
+    sent_at TIMESTAMP,
+    created_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    updated_at TIMESTAMP NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX idx_email_outbox_due ON email_outbox(status, next_attempt_at);
+CREATE INDEX idx_email_outbox_dispute_id ON email_outbox(dispute_id);
+-- Shared circuit breaker state: one row per breaker, keyed (and indexed) by name
+CREATE TABLE IF NOT EXISTS circuit_breaker_state (
+    name VARCHAR(100) PRIMARY KEY,
+    state VARCHAR(20) NOT NULL,
+    changed_at DOUBLE PRECISION NOT NULL,
+    updated_at TIMESTAMP NOT NULL DEFAULT NOW()
+);
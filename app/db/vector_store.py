@@ -1,7 +1,9 @@
 """ChromaDB vector store management"""
 import chromadb
 import os
+from datetime import datetime
 from chromadb.config import Settings
+from chromadb.utils import embedding_functions
 from typing import List, Optional
 from app.schema.models import Document
 
@@ -23,6 +25,7 @@ class VectorStore:
         )
         self.collection_name = "visa_rules"
         self.collection: Optional[chromadb.Collection] = None
+        self._embedding_function = None
     
     def initialize(self) -> None:
         """Initialize or get the Visa rules collection"""
@@ -46,6 +49,12 @@ class VectorStore:
             metadatas=metadatas,
             ids=ids
         )
+        
+        # Stamp a new corpus version so caches built on older rules are invalidated
+        self.collection.modify(metadata={
+            **(self.collection.metadata or {}),
+            "corpus_version": datetime.utcnow().isoformat()
+        })
     
     def query(
         self,
@@ -70,6 +79,18 @@ class VectorStore:
         
         return documents, metadatas, similarity_scores
     
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        """Embed texts with the same model the collection uses for queries"""
+        if self._embedding_function is None:
+            self._embedding_function = embedding_functions.DefaultEmbeddingFunction()
+        return [list(vector) for vector in self._embedding_function(texts)]
+    
+    def corpus_version(self) -> str:
+        """Identify the current rules corpus (re-read so other writers' changes are seen)"""
+        collection = self.client.get_collection(self.collection_name)
+        version = (collection.metadata or {}).get("corpus_version", "unversioned")
+        return f"{version}:{collection.count()}"
+    
     def get_collection_count(self) -> int:
         """Get the number of documents in the collection"""
         if not self.collection:
@@ -23,6 +23,7 @@ class DisputeWebhook(BaseModel):
     transaction_date: Optional[str] = Field(None, description="Transaction date")
     merchant_name: Optional[str] = Field(None, description="Merchant name")
     card_number: Optional[str] = Field(None, description="Card number (last 4 digits)")
+    sla_class: Optional[str] = Field(None, description="Customer SLA class (platinum, gold, standard)")
 
 
 class DisputeDecision(BaseModel):
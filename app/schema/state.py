@@ -1,14 +1,19 @@
 """LangGraph state definitions"""
 from typing import Any, Dict, List, Optional, TypedDict
-from app.schema.models import DisputeDecision, Document, TransactionData
+from app.schema.models import DisputeDecision
 
 
 class DisputeState(TypedDict):
-    """State definition for LangGraph dispute processing workflow"""
+    """
+    State definition for LangGraph dispute processing workflow.
+    Nodes return only the keys they change. Large artifacts (transaction
+    history, retrieved rule texts) are held in the artifact store and
+    referenced here by key.
+    """
     dispute_id: str
     payload: Dict[str, Any]
-    transaction_history: Optional[List[TransactionData]]
-    retrieved_rules: Optional[List[Document]]
+    transaction_history_ref: Optional[str]  # artifact_store key for the List[TransactionData]
+    retrieved_rules_ref: Optional[str]  # artifact_store key for the retrieved rule dicts
     similarity_scores: Optional[List[float]]
     query_attempts: int
     decision: Optional[DisputeDecision]
@@ -16,3 +21,6 @@ class DisputeState(TypedDict):
     actions_taken: List[str]
     error: Optional[str]
     current_node: str
+    deadline: Optional[float]  # Epoch seconds by which processing must finish
+    timed_out_node: Optional[str]
+    degradation_level: Optional[str]  # Load-shedding level the dispute was processed under
@@ -0,0 +1,246 @@
+"""Cross-dispute micro-batching of LLM adjudication"""
+import asyncio
+import contextvars
+import copy
+import json
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Optional, Set
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
+from pydantic import ValidationError
+from app.schema.models import DisputeDecision
+from app.tools.adjudicator import Adjudicator, bind_json_schema
+from app.tools.deadline import dispute_deadline
+
+
+BATCH_SYSTEM_PROMPT = """You are a Visa dispute adjudication specialist. Analyze each of the disputes in the user message independently and make a decision for each.
+
+For each dispute, decide:
+1. "accept" - Accept the dispute (refund customer)
+2. "reject" - Reject the dispute (merchant wins)
+3. "escalate" - Escalate to human review
+
+CRITICAL: Provide your response as VALID JSON ONLY, no additional text, with exactly one entry per dispute:
+{
+    "decisions": [
+        {
+            "dispute_id": "the Dispute ID this decision is for",
+            "decision": "accept|reject|escalate",
+            "confidence_score": 0.85,
+            "reasoning": "detailed explanation of at least 20 characters",
+            "supporting_rules": ["rule reference 1", "rule reference 2"],
+            "recommended_action": "specific action to take"
+        }
+    ]
+}
+
+Rules:
+- dispute_id must match a Dispute ID in the user message exactly
+- decision must be exactly one of: "accept", "reject", or "escalate"
+- confidence_score must be a number between 0.0 and 1.0
+- reasoning must be at least 20 characters
+- supporting_rules must be an array of strings
+- recommended_action must be a non-empty string"""
+
+
+def batch_decision_json_schema() -> Dict[str, Any]:
+    """JSON schema for a multi-dispute response: one decision per dispute_id"""
+    item = copy.deepcopy(DisputeDecision.model_json_schema())
+    item["additionalProperties"] = False
+    return {
+        "type": "object",
+        "properties": {"decisions": {"type": "array", "items": item}},
+        "required": ["decisions"],
+        "additionalProperties": False
+    }
+
+
+@dataclass
+class PendingAdjudication:
+    """One dispute waiting for the next batch"""
+    dispute_id: str
+    payload: Dict[str, Any]
+    rules_context: str
+    fraud_context: str
+    future: asyncio.Future = field(repr=False)
+    deadline: Optional[float] = None  # The dispute's own deadline (epoch seconds)
+
+
+@dataclass
+class BatchStats:
+    """Counters showing how much traffic is batched and how often it falls back"""
+    requests: int = 0
+    batches: int = 0
+    batched_items: int = 0
+    single_items: int = 0
+    batch_valid_items: int = 0
+    fallbacks: int = 0
+    batch_failures: int = 0
+
+
+class AdjudicationBatcher:
+    """
+    Groups concurrent adjudications into one multi-dispute generation.
+    Requests arriving within `max_wait` of each other share a prompt whose
+    response is a JSON array of decisions keyed by dispute_id. Disputes the
+    batch response omits or gets wrong are adjudicated individually.
+    Exposes the same adjudicate/get_stats interface as Adjudicator.
+    """
+
+    def __init__(
+        self,
+        adjudicator: Adjudicator,
+        max_batch_size: int = 8,
+        max_wait: float = 0.05,
+        batch_llm: Optional[Any] = None
+    ) -> None:
+        self.adjudicator = adjudicator
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        # Batched prompts may run on their own view of the model (e.g. a separate limiter)
+        self.batch_llm = bind_json_schema(
+            batch_llm or adjudicator.llm, adjudicator.provider, batch_decision_json_schema()
+        )
+        self.stats = BatchStats()
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._running: Set[asyncio.Task] = set()
+
+    def build_batch_prompt(self, items: List[PendingAdjudication]) -> List[BaseMessage]:
+        """Create one prompt covering several disputes, behind the static batch prefix"""
+        sections = "\n\n".join(
+            f"=== Dispute {i + 1} of {len(items)} ===\n"
+            + Adjudicator.dispute_section(item.dispute_id, item.payload, item.rules_context, item.fraud_context)
+            for i, item in enumerate(items)
+        )
+        return [SystemMessage(content=BATCH_SYSTEM_PROMPT), HumanMessage(content=sections)]
+
+    @staticmethod
+    def parse_batch(content: str, dispute_ids: List[str]) -> Dict[str, DisputeDecision]:
+        """Parse a batch response, keeping only valid decisions for requested disputes"""
+        data = json.loads(content.strip())
+        entries = data.get("decisions", []) if isinstance(data, dict) else data
+        decisions: Dict[str, DisputeDecision] = {}
+        for entry in entries if isinstance(entries, list) else []:
+            if not isinstance(entry, dict) or entry.get("dispute_id") not in dispute_ids:
+                continue
+            try:
+                decisions.setdefault(entry["dispute_id"], DisputeDecision(**entry))
+            except (ValidationError, TypeError):
+                continue
+        return decisions
+
+    async def adjudicate(
+        self,
+        dispute_id: str,
+        payload: Dict[str, Any],
+        rules_context: str,
+        fraud_context: str
+    ) -> DisputeDecision:
+        """Queue a dispute for the next batch and wait for its decision"""
+        self.stats.requests += 1
+        self._ensure_running()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put(PendingAdjudication(
+            dispute_id, payload, rules_context, fraud_context, future, dispute_deadline.get()
+        ))
+        return await future
+
+    def _ensure_running(self) -> None:
+        if self._task is None or self._task.done():
+            self._queue = asyncio.Queue()
+            # A fresh context: the loop outlives the dispute that happened to start it,
+            # so it must not inherit that dispute's deadline
+            self._task = asyncio.create_task(self._batch_loop(), context=contextvars.Context())
+
+    async def _batch_loop(self) -> None:
+        """Collect queued disputes for up to max_wait, then adjudicate them together"""
+        while True:
+            pending: List[PendingAdjudication] = [await self._queue.get()]
+
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + self.max_wait
+            while len(pending) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    pending.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            # Generation runs concurrently so the next batch can form meanwhile
+            task = asyncio.create_task(self._run_batch(pending), context=contextvars.Context())
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def _run_batch(self, items: List[PendingAdjudication]) -> None:
+        if len(items) == 1:
+            self.stats.single_items += 1
+            await self._adjudicate_individually(items)
+            return
+
+        self.stats.batches += 1
+        self.stats.batched_items += len(items)
+        decisions: Dict[str, DisputeDecision] = {}
+        # The shared call is bounded by the most urgent dispute in the batch
+        deadlines = [item.deadline for item in items if item.deadline is not None]
+        dispute_deadline.set(min(deadlines) if deadlines else None)
+        try:
+            response = await self.batch_llm.ainvoke(self.build_batch_prompt(items))
+            decisions = self.parse_batch(response.content, [item.dispute_id for item in items])
+        except Exception as e:
+            self.stats.batch_failures += 1
+            print(f"Batched adjudication of {len(items)} disputes failed, falling back: {e}")
+
+        fallback = []
+        for item in items:
+            decision = decisions.get(item.dispute_id)
+            if decision is None:
+                fallback.append(item)
+            elif not item.future.done():
+                self.stats.batch_valid_items += 1
+                item.future.set_result(decision)
+
+        self.stats.fallbacks += len(fallback)
+        await self._adjudicate_individually(fallback)
+
+    async def _adjudicate_individually(self, items: List[PendingAdjudication]) -> None:
+        async def _one(item: PendingAdjudication) -> None:
+            # Runs as its own task under gather, so this only bounds this dispute's calls
+            dispute_deadline.set(item.deadline)
+            try:
+                decision = await self.adjudicator.adjudicate(
+                    item.dispute_id, item.payload, item.rules_context, item.fraud_context
+                )
+            except Exception as e:
+                if not item.future.done():
+                    item.future.set_exception(e)
+                return
+            if not item.future.done():
+                item.future.set_result(decision)
+
+        await asyncio.gather(*(_one(item) for item in items))
+
+    def estimate_prompt_tokens(
+        self,
+        dispute_id: str,
+        payload: Dict[str, Any],
+        rules_context: str,
+        fraud_context: str
+    ) -> int:
+        """Approximate prefill size of this dispute's single-dispute prompt"""
+        return self.adjudicator.estimate_prompt_tokens(dispute_id, payload, rules_context, fraud_context)
+
+    async def close(self) -> None:
+        """Stop collecting batches"""
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get adjudication counters plus batching counters"""
+        batching = asdict(self.stats)
+        batching["avg_batch_size"] = (
+            self.stats.batched_items / self.stats.batches if self.stats.batches else 0.0
+        )
+        return {**self.adjudicator.get_stats(), "batching": batching}
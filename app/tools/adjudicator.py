@@ -0,0 +1,424 @@
+"""LLM adjudication with schema-constrained output and validation retry"""
+import copy
+import json
+import re
+import time
+from dataclasses import asdict, dataclass
+from typing import Annotated, Any, Dict, List, Tuple
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
+from pydantic import TypeAdapter, ValidationError
+from app.schema.models import DisputeDecision
+from app.tools.json_stream import IncrementalJSONObjectParser
+from app.tools.prompt_builder import estimate_tokens
+
+
+# Identical for every dispute and placed first, so model servers that cache
+# prompt prefixes (e.g. Ollama/llama.cpp) only prefill the dispute details
+ADJUDICATION_SYSTEM_PROMPT = """You are a Visa dispute adjudication specialist. Analyze the dispute in the user message and make a decision.
+
+Based on the evidence, make a decision:
+1. "accept" - Accept the dispute (refund customer)
+2. "reject" - Reject the dispute (merchant wins)
+3. "escalate" - Escalate to human review
+
+CRITICAL: Provide your response as VALID JSON ONLY, no additional text:
+{
+    "decision": "accept|reject|escalate",
+    "confidence_score": 0.85,
+    "reasoning": "detailed explanation of at least 20 characters",
+    "supporting_rules": ["rule reference 1", "rule reference 2"],
+    "recommended_action": "specific action to take"
+}
+
+Rules:
+- decision must be exactly one of: "accept", "reject", or "escalate"
+- confidence_score must be a number between 0.0 and 1.0
+- reasoning must be at least 20 characters
+- supporting_rules must be an array of strings
+- recommended_action must be a non-empty string"""
+
+
+# Decision-first mode: only the verdict is generated inline; the reasoning is
+# written afterwards and replaces this text in the outbox email and review queue
+VERDICT_SYSTEM_PROMPT = """You are a Visa dispute adjudication specialist. Analyze the dispute in the user message and make a decision.
+
+Based on the evidence, make a decision:
+1. "accept" - Accept the dispute (refund customer)
+2. "reject" - Reject the dispute (merchant wins)
+3. "escalate" - Escalate to human review
+
+CRITICAL: Provide your verdict as VALID JSON ONLY, no explanation and no additional text:
+{
+    "decision": "accept|reject|escalate",
+    "confidence_score": 0.85,
+    "supporting_rules": ["rule reference 1", "rule reference 2"],
+    "recommended_action": "specific action to take"
+}
+
+Rules:
+- decision must be exactly one of: "accept", "reject", or "escalate"
+- confidence_score must be a number between 0.0 and 1.0
+- supporting_rules must be an array of strings
+- recommended_action must be a non-empty string"""
+
+DEFERRED_REASONING = "A detailed explanation of this decision will follow from our dispute team."
+
+
+def prompt_tokens(messages: List[BaseMessage]) -> int:
+    """Approximate prefill size of a chat prompt"""
+    return sum(estimate_tokens(message.content) for message in messages)
+
+
+def decision_json_schema(include_reasoning: bool = True) -> Dict[str, Any]:
+    """
+    JSON schema the LLM must fill, derived from DisputeDecision.
+    dispute_id is excluded because it is set from state, not generated;
+    reasoning is excluded for verdict-only (decision-first) generation.
+    """
+    excluded = {"dispute_id"} if include_reasoning else {"dispute_id", "reasoning"}
+    schema = copy.deepcopy(DisputeDecision.model_json_schema())
+    for name in excluded:
+        schema["properties"].pop(name, None)
+    schema["required"] = [field for field in schema.get("required", []) if field not in excluded]
+    schema["additionalProperties"] = False
+    return schema
+
+
+def bind_json_schema(llm: Any, provider: str, schema: Dict[str, Any]) -> Any:
+    """
+    Bind the schema as a decoding constraint for providers that support it.
+    Ollama takes the schema as `format`; OpenAI takes a strict `response_format`.
+    Other providers fall back to prompt-only JSON instructions.
+    """
+    if provider == "ollama":
+        return llm.bind(format=schema)
+    if provider == "openai":
+        return llm.bind(response_format={
+            "type": "json_schema",
+            "json_schema": {"name": "dispute_decision", "schema": schema, "strict": True}
+        })
+    return llm
+
+
+def decision_field_adapters() -> Dict[str, TypeAdapter]:
+    """Per-field validators so streamed fields can be checked as they complete"""
+    adapters = {}
+    for name, field in DisputeDecision.model_fields.items():
+        if name == "dispute_id":
+            continue
+        annotation = Annotated[(field.annotation, *field.metadata)] if field.metadata else field.annotation
+        adapters[name] = TypeAdapter(annotation)
+    return adapters
+
+
+class StreamAbort(ValueError):
+    """Raised when a streamed field is invalid before generation finishes"""
+
+
+@dataclass
+class AdjudicationStats:
+    """Counters showing how often the validation-retry path still runs"""
+    adjudications: int = 0
+    generations: int = 0
+    first_attempt_valid: int = 0
+    retries: int = 0
+    json_errors: int = 0
+    validation_errors: int = 0
+    exhausted: int = 0
+    streamed: int = 0
+    stopped_at_object_close: int = 0
+    early_aborts: int = 0
+    prompt_tokens_total: int = 0
+    prompt_tokens_max: int = 0
+    decisions: int = 0
+    decision_seconds_total: float = 0.0
+
+
+class Adjudicator:
+    """Generates validated DisputeDecisions from the LLM"""
+
+    def __init__(
+        self,
+        llm: Any,
+        provider: str = "ollama",
+        max_attempts: int = 3,
+        streaming: bool = False,
+        verdict_only: bool = False
+    ) -> None:
+        self.llm = llm
+        self.provider = provider
+        self.max_attempts = max_attempts
+        self.streaming = streaming
+        self.verdict_only = verdict_only
+        self.system_prompt = VERDICT_SYSTEM_PROMPT if verdict_only else ADJUDICATION_SYSTEM_PROMPT
+        self.schema = decision_json_schema(include_reasoning=not verdict_only)
+        self.field_adapters = decision_field_adapters()
+        self.structured_llm = bind_json_schema(llm, provider, self.schema)
+        self.stats = AdjudicationStats()
+
+    @staticmethod
+    def dispute_section(
+        dispute_id: str,
+        payload: Dict[str, Any],
+        rules_context: str,
+        fraud_context: str
+    ) -> str:
+        """Dispute details, fraud analysis and rules for one dispute"""
+        return f"""Dispute Details:
+- Dispute ID: {dispute_id}
+- Customer ID: {payload['customer_id']}
+- Transaction ID: {payload['transaction_id']}
+- Amount: {payload['amount']} {payload['currency']}
+- Reason Code: {payload['reason_code']}
+- Description: {payload['description']}
+
+{fraud_context}
+
+Relevant Visa Rules:
+{rules_context}"""
+
+    def build_prompt(
+        self,
+        dispute_id: str,
+        payload: Dict[str, Any],
+        rules_context: str,
+        fraud_context: str,
+        validation_errors: List[str]
+    ) -> List[BaseMessage]:
+        """
+        Create adjudication prompt: the static system prefix followed by the
+        per-dispute details, so the model server can reuse the cached prefix
+        """
+        error_context = ""
+        if validation_errors:
+            error_context = f"""
+
+IMPORTANT: Previous attempt failed validation with these errors:
+{chr(10).join(f'- {err}' for err in validation_errors)}
+
+Please correct these issues in your response."""
+
+        return [
+            SystemMessage(content=self.system_prompt),
+            HumanMessage(content=(
+                self.dispute_section(dispute_id, payload, rules_context, fraud_context)
+                + error_context
+            ))
+        ]
+
+    def estimate_prompt_tokens(
+        self,
+        dispute_id: str,
+        payload: Dict[str, Any],
+        rules_context: str,
+        fraud_context: str
+    ) -> int:
+        """Approximate prefill size of the first-attempt prompt"""
+        return prompt_tokens(self.build_prompt(dispute_id, payload, rules_context, fraud_context, []))
+
+    @staticmethod
+    def parse_decision(content: str, dispute_id: str, verdict_only: bool = False) -> DisputeDecision:
+        """Parse and validate an LLM response"""
+        content = content.strip()
+
+        # Constrained output is pure JSON; unconstrained models may add extra text
+        json_match = re.search(r'\{.*\}', content, re.DOTALL)
+        if json_match:
+            content = json_match.group(0)
+
+        decision_data = json.loads(content)
+        decision_data["dispute_id"] = dispute_id
+        if verdict_only:
+            decision_data["reasoning"] = DEFERRED_REASONING
+        return DisputeDecision(**decision_data)
+
+    def _check_field(self, name: str, value: Any) -> None:
+        adapter = self.field_adapters.get(name)
+        if adapter is None:
+            return
+        try:
+            adapter.validate_python(value)
+        except ValidationError as e:
+            self.stats.early_aborts += 1
+            raise StreamAbort(f"Field '{name}' is invalid: {e.errors()[0]['msg']}") from e
+
+    async def _generate_streaming(self, prompt: List[BaseMessage]) -> str:
+        """
+        Stream the response through an incremental parser.
+        Generation stops as soon as the top-level object closes, or as soon
+        as a completed field fails validation (raising StreamAbort).
+        """
+        self.stats.streamed += 1
+        parser = IncrementalJSONObjectParser()
+        stream = self.structured_llm.astream(prompt)
+        try:
+            async for chunk in stream:
+                for name, value in parser.feed(chunk.content).items():
+                    self._check_field(name, value)
+                if parser.complete:
+                    self.stats.stopped_at_object_close += 1
+                    break
+        finally:
+            # Closing the stream drops the connection, which stops generation
+            aclose = getattr(stream, "aclose", None)
+            if aclose:
+                await aclose()
+
+        return parser.object_text or parser.buffer
+
+    async def _generate(self, prompt: List[BaseMessage]) -> str:
+        if self.streaming:
+            return await self._generate_streaming(prompt)
+        response = await self.structured_llm.ainvoke(prompt)
+        return response.content
+
+    async def adjudicate(
+        self,
+        dispute_id: str,
+        payload: Dict[str, Any],
+        rules_context: str,
+        fraud_context: str
+    ) -> DisputeDecision:
+        """Generate a valid decision, retrying with error feedback on invalid output"""
+        self.stats.adjudications += 1
+        started = time.monotonic()
+        validation_errors: List[str] = []
+
+        for attempt in range(self.max_attempts):
+            if attempt > 0:
+                self.stats.retries += 1
+
+            # Only the latest failure is fed back; earlier ones no longer describe the output
+            prompt = self.build_prompt(
+                dispute_id, payload, rules_context, fraud_context, validation_errors[-1:]
+            )
+            tokens = prompt_tokens(prompt)
+            self.stats.generations += 1
+            self.stats.prompt_tokens_total += tokens
+            self.stats.prompt_tokens_max = max(self.stats.prompt_tokens_max, tokens)
+
+            try:
+                content = await self._generate(prompt)
+                decision = self.parse_decision(content, dispute_id, self.verdict_only)
+            except json.JSONDecodeError as e:
+                self.stats.json_errors += 1
+                validation_errors.append(f"JSON parsing error: {str(e)}")
+                continue
+            except (ValidationError, ValueError, TypeError) as e:
+                self.stats.validation_errors += 1
+                validation_errors.append(f"Validation error: {str(e)}")
+                continue
+
+            if attempt == 0:
+                self.stats.first_attempt_valid += 1
+            self.stats.decisions += 1
+            self.stats.decision_seconds_total += time.monotonic() - started
+            return decision
+
+        self.stats.exhausted += 1
+        raise ValueError(
+            f"Failed to generate valid decision after {self.max_attempts} attempts: {validation_errors}"
+        )
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get adjudication counters and retry rate"""
+        stats = asdict(self.stats)
+        stats["retry_rate"] = (
+            self.stats.retries / self.stats.adjudications if self.stats.adjudications else 0.0
+        )
+        stats["avg_prompt_tokens"] = (
+            self.stats.prompt_tokens_total / self.stats.generations if self.stats.generations else 0.0
+        )
+        stats["avg_time_to_decision_ms"] = (
+            round(self.stats.decision_seconds_total / self.stats.decisions * 1000, 1)
+            if self.stats.decisions else 0.0
+        )
+        stats["schema_constrained"] = self.structured_llm is not self.llm
+        stats["verdict_only"] = self.verdict_only
+        return stats
+
+
+@dataclass
+class TierStats:
+    """Traffic counters for one cascade tier"""
+    calls: int = 0
+    served: int = 0
+    escalated_low_confidence: int = 0
+    escalated_invalid: int = 0
+    escalated_error: int = 0
+
+
+class AdjudicationCascade:
+    """
+    Runs adjudication through model tiers, smallest first.
+    A tier's decision is kept when its confidence reaches the threshold;
+    otherwise, or when its output fails validation, the next tier runs.
+    The last tier's decision is always kept. A tier is anything with
+    Adjudicator's adjudicate/get_stats interface (e.g. a batcher).
+    """
+
+    def __init__(self, tiers: List[Tuple[str, Any]], confidence_threshold: float) -> None:
+        if not tiers:
+            raise ValueError("Adjudication cascade requires at least one tier")
+        self.tiers = tiers
+        self.confidence_threshold = confidence_threshold
+        self.tier_stats = {name: TierStats() for name, _ in tiers}
+
+    async def adjudicate(
+        self,
+        dispute_id: str,
+        payload: Dict[str, Any],
+        rules_context: str,
+        fraud_context: str
+    ) -> Tuple[DisputeDecision, str]:
+        """Return the first sufficiently confident decision and the tier that made it"""
+        last = len(self.tiers) - 1
+        for index, (name, adjudicator) in enumerate(self.tiers):
+            stats = self.tier_stats[name]
+            stats.calls += 1
+
+            if index == last:
+                decision = await adjudicator.adjudicate(dispute_id, payload, rules_context, fraud_context)
+                stats.served += 1
+                return decision, name
+
+            try:
+                decision = await adjudicator.adjudicate(dispute_id, payload, rules_context, fraud_context)
+            except ValueError:
+                # Covers exhausted validation retries
+                stats.escalated_invalid += 1
+                continue
+            except Exception as e:
+                print(f"Adjudication tier '{name}' failed, escalating: {e}")
+                stats.escalated_error += 1
+                continue
+
+            if decision.confidence_score >= self.confidence_threshold:
+                stats.served += 1
+                return decision, name
+            stats.escalated_low_confidence += 1
+
+    def estimate_prompt_tokens(
+        self,
+        dispute_id: str,
+        payload: Dict[str, Any],
+        rules_context: str,
+        fraud_context: str
+    ) -> int:
+        """Approximate prefill size of the first tier's prompt"""
+        return self.tiers[0][1].estimate_prompt_tokens(dispute_id, payload, rules_context, fraud_context)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get per-tier adjudication stats and how traffic splits between tiers"""
+        total = sum(stats.served for stats in self.tier_stats.values())
+        return {
+            "confidence_threshold": self.confidence_threshold,
+            "traffic_split": {
+                name: round(stats.served / total, 4) if total else 0.0
+                for name, stats in self.tier_stats.items()
+            },
+            "tiers": {
+                name: {**asdict(self.tier_stats[name]), **adjudicator.get_stats()}
+                for name, adjudicator in self.tiers
+            }
+        }
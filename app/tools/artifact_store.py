@@ -0,0 +1,86 @@
+"""In-process store for large per-dispute artifacts referenced from DisputeState"""
+import json
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+
+
+def state_size(state: Dict[str, Any]) -> int:
+    """Bytes a state (or state update) takes when JSON-serialized, as the audit log would store it"""
+    return len(json.dumps(state, default=str).encode())
+
+
+@dataclass
+class StoredArtifact:
+    """One artifact and when it was stored"""
+    dispute_id: str
+    value: Any
+    created_at: float = field(default_factory=time.monotonic)
+
+
+class ArtifactStore:
+    """
+    Holds transaction histories and retrieved rules outside DisputeState.
+    Nodes store an artifact and put only its reference in the state, so
+    state updates, audit log snapshots and pipeline hand-offs stay small
+    no matter how long a customer's history is. A dispute's artifacts are
+    released when it finishes; anything left behind expires after
+    `ttl_seconds`.
+    """
+
+    def __init__(self, ttl_seconds: float = 900.0) -> None:
+        self.ttl_seconds = ttl_seconds
+        self._artifacts: Dict[str, StoredArtifact] = {}
+        self.disputes_measured = 0
+        self.state_bytes_total = 0
+        self.state_bytes_max = 0
+
+    def put(self, dispute_id: str, kind: str, value: Any) -> str:
+        """Store an artifact, replacing the dispute's previous one of this kind; returns its reference"""
+        self._expire()
+        ref = f"{kind}:{dispute_id}"
+        # Re-insert so the dict stays in creation order for expiry
+        self._artifacts.pop(ref, None)
+        self._artifacts[ref] = StoredArtifact(dispute_id, value)
+        return ref
+
+    def get(self, ref: Optional[str]) -> Any:
+        """Artifact for a reference, or None if unset or already released"""
+        artifact = self._artifacts.get(ref) if ref else None
+        return artifact.value if artifact else None
+
+    def release(self, dispute_id: str) -> None:
+        """Drop every artifact of a finished dispute"""
+        for ref in [ref for ref, artifact in self._artifacts.items() if artifact.dispute_id == dispute_id]:
+            del self._artifacts[ref]
+
+    def _expire(self) -> None:
+        cutoff = time.monotonic() - self.ttl_seconds
+        # Dicts keep insertion order, so expired artifacts are at the front
+        while self._artifacts:
+            ref, artifact = next(iter(self._artifacts.items()))
+            if artifact.created_at >= cutoff:
+                break
+            del self._artifacts[ref]
+
+    def record_state(self, state: Dict[str, Any]) -> None:
+        """Measure a finished dispute's final state"""
+        size = state_size(state)
+        self.disputes_measured += 1
+        self.state_bytes_total += size
+        self.state_bytes_max = max(self.state_bytes_max, size)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get artifacts held and per-dispute state size"""
+        return {
+            "artifacts_held": len(self._artifacts),
+            "disputes_measured": self.disputes_measured,
+            "avg_state_bytes": (
+                round(self.state_bytes_total / self.disputes_measured) if self.disputes_measured else 0
+            ),
+            "max_state_bytes": self.state_bytes_max
+        }
+
+
+# Global instance
+artifact_store = ArtifactStore()
@@ -1,9 +1,14 @@
 """Circuit breaker pattern for external service protection"""
 import asyncio
-from datetime import datetime, timedelta
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from datetime import datetime
 from enum import Enum
-from typing import Callable, Any, Optional
-from dataclasses import dataclass, field
+from typing import AsyncIterator, Callable, Any, Deque, Dict, List, Optional, Tuple
+from dataclasses import dataclass
+from app.config.settings import settings
+from app.db.breaker_state import fetch_breaker_states, publish_breaker_state
 
 
 class CircuitState(Enum):
@@ -16,10 +21,16 @@ class CircuitState(Enum):
 @dataclass
 class CircuitBreakerConfig:
     """Configuration for circuit breaker"""
-    failure_threshold: int = 5  # Number of failures before opening
+    failure_threshold: int = 5  # Consecutive failures before opening
     success_threshold: int = 3  # Number of successes to close from half-open
     timeout: int = 60  # Seconds before trying half-open
     expected_exception: type = Exception
+    window_seconds: float = 60.0  # Rolling window for failure and slow-call rates
+    window_buckets: int = 10
+    minimum_calls: int = 20  # Calls in the window before rates can trip the breaker
+    failure_rate_threshold: float = 0.5  # Open when this fraction of windowed calls fail
+    slow_call_duration: Optional[float] = None  # Calls at least this long (seconds) count as slow
+    slow_call_rate_threshold: float = 0.8  # Open when this fraction of windowed calls are slow
 
 
 @dataclass
@@ -32,6 +43,9 @@ class CircuitBreakerStats:
     total_calls: int = 0
     total_failures: int = 0
     total_successes: int = 0
+    total_slow_calls: int = 0
+    total_rejections: int = 0
+    shared_transitions_applied: int = 0
 
 
 class CircuitBreakerError(Exception):
@@ -39,8 +53,47 @@ class CircuitBreakerError(Exception):
     pass
 
 
+class RollingWindow:
+    """Time-bucketed call, failure and slow-call counts over the last window_seconds"""
+    
+    def __init__(self, window_seconds: float, buckets: int) -> None:
+        self.bucket_seconds = window_seconds / buckets
+        self._counts: Deque[List[float]] = deque(maxlen=buckets)  # [bucket_start, calls, failures, slow]
+    
+    def record(self, failed: bool, slow: bool) -> None:
+        now = time.monotonic()
+        start = now - now % self.bucket_seconds
+        if not self._counts or self._counts[-1][0] != start:
+            self._counts.append([start, 0, 0, 0])
+        bucket = self._counts[-1]
+        bucket[1] += 1
+        bucket[2] += failed
+        bucket[3] += slow
+    
+    def totals(self) -> Tuple[int, int, int]:
+        """Calls, failures and slow calls within the window"""
+        cutoff = time.monotonic() - self.bucket_seconds * self._counts.maxlen
+        calls = failures = slow = 0
+        for start, bucket_calls, bucket_failures, bucket_slow in self._counts:
+            if start > cutoff:
+                calls += bucket_calls
+                failures += bucket_failures
+                slow += bucket_slow
+        return int(calls), int(failures), int(slow)
+    
+    def clear(self) -> None:
+        self._counts.clear()
+
+
 class CircuitBreaker:
-    """Circuit breaker for protecting external service calls"""
+    """
+    Circuit breaker for protecting external service calls.
+    Opens on consecutive failures, or when the failure rate or slow-call
+    rate over a rolling window crosses its threshold. Bookkeeping never
+    awaits, so the hot path needs no lock on the single-threaded event
+    loop. Transitions carry a wall-clock timestamp so CircuitBreakerSync
+    can share them with other workers.
+    """
     
     def __init__(
         self,
@@ -52,23 +105,52 @@ class CircuitBreaker:
         self.config = config or CircuitBreakerConfig()
         self.state = CircuitState.CLOSED
         self.stats = CircuitBreakerStats()
-        self._lock = asyncio.Lock()
+        self.window = RollingWindow(self.config.window_seconds, self.config.window_buckets)
+        self.changed_at = 0.0  # Epoch seconds of the last transition
+        self._half_open_calls = 0
+    
+    def _transition(self, state: CircuitState, changed_at: Optional[float] = None) -> None:
+        self.state = state
+        self.changed_at = changed_at or time.time()
+        self.stats.success_count = 0
+        self._half_open_calls = 0
+        if state == CircuitState.CLOSED:
+            self.stats.failure_count = 0
+            self.window.clear()
+    
+    def _before_call(self) -> None:
+        """Count the call and reject it if the circuit is open"""
+        self.stats.total_calls += 1
+        
+        # Check if circuit is open
+        if self.state == CircuitState.OPEN:
+            if self._should_attempt_reset():
+                self._transition(CircuitState.HALF_OPEN)
+            else:
+                self.stats.total_rejections += 1
+                raise CircuitBreakerError(
+                    f"Circuit breaker '{self.name}' is OPEN. "
+                    f"Last failure: {self.stats.last_failure_time}"
+                )
+        
+        # Only a few probes at a time while half-open
+        if self.state == CircuitState.HALF_OPEN:
+            if self._half_open_calls >= self.config.success_threshold:
+                self.stats.total_rejections += 1
+                raise CircuitBreakerError(f"Circuit breaker '{self.name}' is HALF_OPEN and probing")
+            self._half_open_calls += 1
+    
+    def _on_abandoned(self, probe_epoch: float) -> None:
+        """A call ended without an outcome (cancelled, or an unexpected exception type)"""
+        # Free its half-open probe slot, unless the circuit has moved on since it started
+        if self.state == CircuitState.HALF_OPEN and self.changed_at == probe_epoch:
+            self._half_open_calls = max(0, self._half_open_calls - 1)
     
     async def call(self, func: Callable, *args: Any, **kwargs: Any) -> Any:
         """Execute function with circuit breaker protection"""
-        async with self._lock:
-            self.stats.total_calls += 1
-            
-            # Check if circuit is open
-            if self.state == CircuitState.OPEN:
-                if self._should_attempt_reset():
-                    self.state = CircuitState.HALF_OPEN
-                    self.stats.success_count = 0
-                else:
-                    raise CircuitBreakerError(
-                        f"Circuit breaker '{self.name}' is OPEN. "
-                        f"Last failure: {self.stats.last_failure_time}"
-                    )
+        self._before_call()
+        start = time.monotonic()
+        epoch = self.changed_at
         
         # Try to execute the function
         try:
@@ -77,71 +159,197 @@ class CircuitBreaker:
             else:
                 result = func(*args, **kwargs)
             
-            await self._on_success()
+            self._on_success(time.monotonic() - start)
             return result
             
         except self.config.expected_exception as e:
-            await self._on_failure()
+            self._on_failure(time.monotonic() - start)
+            raise
+        except BaseException:
+            self._on_abandoned(epoch)
             raise
     
-    async def _on_success(self) -> None:
+    @asynccontextmanager
+    async def protect(self) -> AsyncIterator[None]:
+        """Circuit breaker protection for calls that are not a single function (e.g. streams)"""
+        self._before_call()
+        start = time.monotonic()
+        epoch = self.changed_at
+        try:
+            yield
+        except GeneratorExit:
+            # The consumer stopped reading a stream early; the call did not fail
+            self._on_success(time.monotonic() - start)
+            raise
+        except self.config.expected_exception:
+            self._on_failure(time.monotonic() - start)
+            raise
+        except BaseException:
+            self._on_abandoned(epoch)
+            raise
+        self._on_success(time.monotonic() - start)
+    
+    def _is_slow(self, latency: float) -> bool:
+        return self.config.slow_call_duration is not None and latency >= self.config.slow_call_duration
+    
+    def _on_success(self, latency: float = 0.0) -> None:
         """Handle successful call"""
-        async with self._lock:
-            self.stats.success_count += 1
-            self.stats.total_successes += 1
-            self.stats.failure_count = 0
-            self.stats.last_success_time = datetime.utcnow()
-            
-            if self.state == CircuitState.HALF_OPEN:
-                if self.stats.success_count >= self.config.success_threshold:
-                    self.state = CircuitState.CLOSED
-                    self.stats.success_count = 0
+        slow = self._is_slow(latency)
+        self.stats.success_count += 1
+        self.stats.total_successes += 1
+        self.stats.total_slow_calls += slow
+        self.stats.failure_count = 0
+        self.stats.last_success_time = datetime.utcnow()
+        
+        if self.state == CircuitState.HALF_OPEN:
+            self._half_open_calls = max(0, self._half_open_calls - 1)
+            if slow:
+                # A recovering service that is still slow is not recovered
+                self._transition(CircuitState.OPEN)
+            elif self.stats.success_count >= self.config.success_threshold:
+                self._transition(CircuitState.CLOSED)
+            return
+        
+        self.window.record(failed=False, slow=slow)
+        self._check_window()
     
-    async def _on_failure(self) -> None:
+    def _on_failure(self, latency: float = 0.0) -> None:
         """Handle failed call"""
-        async with self._lock:
-            self.stats.failure_count += 1
-            self.stats.total_failures += 1
-            self.stats.success_count = 0
-            self.stats.last_failure_time = datetime.utcnow()
-            
-            if self.stats.failure_count >= self.config.failure_threshold:
-                self.state = CircuitState.OPEN
+        self.stats.failure_count += 1
+        self.stats.total_failures += 1
+        self.stats.success_count = 0
+        self.stats.last_failure_time = datetime.utcnow()
+        
+        if self.state == CircuitState.HALF_OPEN:
+            self._transition(CircuitState.OPEN)
+            return
+        
+        self.window.record(failed=True, slow=self._is_slow(latency))
+        if self.stats.failure_count >= self.config.failure_threshold:
+            self._transition(CircuitState.OPEN)
+        else:
+            self._check_window()
+    
+    def _check_window(self) -> None:
+        """Open on a high failure or slow-call rate across the rolling window"""
+        if self.state != CircuitState.CLOSED:
+            return
+        calls, failures, slow = self.window.totals()
+        if calls < self.config.minimum_calls:
+            return
+        if (failures / calls >= self.config.failure_rate_threshold
+                or slow / calls >= self.config.slow_call_rate_threshold):
+            self._transition(CircuitState.OPEN)
     
     def _should_attempt_reset(self) -> bool:
         """Check if enough time has passed to try half-open state"""
-        if not self.stats.last_failure_time:
-            return True
-        
-        time_since_failure = datetime.utcnow() - self.stats.last_failure_time
-        return time_since_failure.total_seconds() >= self.config.timeout
+        return time.time() - self.changed_at >= self.config.timeout
+    
+    def apply_shared_state(self, state: str, changed_at: float) -> bool:
+        """Adopt another worker's newer open/closed transition"""
+        if changed_at <= self.changed_at or state == CircuitState.HALF_OPEN.value:
+            return False
+        self._transition(CircuitState(state), changed_at)
+        self.stats.shared_transitions_applied += 1
+        return True
     
     def get_state(self) -> dict:
         """Get current circuit breaker state"""
+        calls, failures, slow = self.window.totals()
         return {
             "name": self.name,
             "state": self.state.value,
+            "changed_at": datetime.utcfromtimestamp(self.changed_at).isoformat() if self.changed_at else None,
             "stats": {
                 "failure_count": self.stats.failure_count,
                 "success_count": self.stats.success_count,
                 "total_calls": self.stats.total_calls,
                 "total_failures": self.stats.total_failures,
                 "total_successes": self.stats.total_successes,
+                "total_slow_calls": self.stats.total_slow_calls,
+                "total_rejections": self.stats.total_rejections,
+                "shared_transitions_applied": self.stats.shared_transitions_applied,
                 "last_failure_time": self.stats.last_failure_time.isoformat() if self.stats.last_failure_time else None,
                 "last_success_time": self.stats.last_success_time.isoformat() if self.stats.last_success_time else None
             },
+            "window": {
+                "calls": calls,
+                "failure_rate": round(failures / calls, 4) if calls else 0.0,
+                "slow_call_rate": round(slow / calls, 4) if calls else 0.0
+            },
             "config": {
                 "failure_threshold": self.config.failure_threshold,
                 "success_threshold": self.config.success_threshold,
-                "timeout": self.config.timeout
+                "timeout": self.config.timeout,
+                "window_seconds": self.config.window_seconds,
+                "minimum_calls": self.config.minimum_calls,
+                "failure_rate_threshold": self.config.failure_rate_threshold,
+                "slow_call_duration": self.config.slow_call_duration,
+                "slow_call_rate_threshold": self.config.slow_call_rate_threshold
             }
         }
     
     async def reset(self) -> None:
         """Manually reset circuit breaker"""
-        async with self._lock:
-            self.state = CircuitState.CLOSED
-            self.stats = CircuitBreakerStats()
+        self._transition(CircuitState.CLOSED)
+        self.stats = CircuitBreakerStats()
+
+
+class CircuitBreakerSync:
+    """
+    Shares breaker transitions across worker processes through Postgres.
+    Every interval each worker publishes transitions it made since the
+    last sync and adopts newer ones published by other workers, so one
+    worker discovering an outage opens the breaker everywhere.
+    """
+    
+    def __init__(self, breakers: List[CircuitBreaker], interval: float = 2.0) -> None:
+        self.breakers = breakers
+        self.interval = interval
+        self._published: Dict[str, float] = {}
+        self._task: Optional[asyncio.Task] = None
+    
+    def add(self, breaker: CircuitBreaker) -> None:
+        if breaker not in self.breakers:
+            self.breakers.append(breaker)
+    
+    async def sync(self) -> int:
+        """Publish local transitions and apply remote ones; returns transitions applied"""
+        for breaker in self.breakers:
+            if breaker.changed_at > self._published.get(breaker.name, 0.0) and breaker.state != CircuitState.HALF_OPEN:
+                await publish_breaker_state(breaker.name, breaker.state.value, breaker.changed_at)
+                self._published[breaker.name] = breaker.changed_at
+        
+        shared = await fetch_breaker_states()
+        applied = 0
+        for breaker in self.breakers:
+            if breaker.name in shared and breaker.apply_shared_state(*shared[breaker.name]):
+                self._published[breaker.name] = breaker.changed_at
+                applied += 1
+        return applied
+    
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.sync()
+            except Exception as e:
+                print(f"Circuit breaker state sync failed: {e}")
+            await asyncio.sleep(self.interval)
+    
+    def start(self) -> None:
+        """Start background state sync"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+    
+    async def stop(self) -> None:
+        """Stop background state sync"""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
 
 
 # Global circuit breakers for external services
@@ -157,5 +365,10 @@ gmail_circuit_breaker = CircuitBreaker(
 
 llm_circuit_breaker = CircuitBreaker(
     "llm_api",
-    CircuitBreakerConfig(failure_threshold=10, timeout=120)
+    CircuitBreakerConfig(failure_threshold=10, timeout=120, slow_call_duration=20.0)
+)
+
+circuit_breaker_sync = CircuitBreakerSync(
+    [enrichment_circuit_breaker, gmail_circuit_breaker, llm_circuit_breaker],
+    interval=settings.circuit_breaker_sync_interval
 )
@@ -0,0 +1,217 @@
+"""Adaptive concurrency limits (bulkheads) for downstream services"""
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import asdict, dataclass
+from typing import Any, AsyncIterator, Callable, Deque, Dict, Optional
+from app.tools.deadline import deadline_timeout
+
+
+class ConcurrencyLimitExceeded(Exception):
+    """Raised when a limiter's queue is full or a queued call waits too long"""
+    pass
+
+
+@dataclass
+class LimiterStats:
+    """Counters for admitted, queued and rejected calls"""
+    admitted: int = 0
+    queued: int = 0
+    rejected_queue_full: int = 0
+    rejected_queue_timeout: int = 0
+    limit_increases: int = 0
+    limit_decreases: int = 0
+    queue_wait_seconds_total: float = 0.0
+    queue_wait_seconds_max: float = 0.0
+
+
+class AdaptiveLimiter:
+    """
+    AIMD concurrency limit for one downstream, driven by observed latency.
+    The limit grows by about one per limit's worth of successful calls
+    while the downstream is busy, and is cut by `backoff_ratio` when a
+    call fails or takes longer than `latency_tolerance` times the
+    downstream's no-load latency (the fastest recent call). Decreases are
+    spaced by at least one no-load latency so a burst of slow calls
+    counts once. Calls over the limit wait in a bounded FIFO queue.
+    With `latency_tolerance=None` only failures cut the limit, for
+    downstreams whose calls differ too much in length for one no-load
+    latency to mean anything.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        initial_limit: int = 10,
+        min_limit: int = 1,
+        max_limit: int = 100,
+        backoff_ratio: float = 0.9,
+        latency_tolerance: Optional[float] = 2.0,
+        max_queue: int = 100,
+        queue_timeout: Optional[float] = 10.0,
+        latency_window: int = 100,
+        min_samples: int = 10
+    ) -> None:
+        self.name = name
+        self.limit = float(initial_limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff_ratio = backoff_ratio
+        self.latency_tolerance = latency_tolerance
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.min_samples = min_samples
+        self.in_flight = 0
+        self.stats = LimiterStats()
+        self._latencies: Deque[float] = deque(maxlen=latency_window)
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._last_decrease = 0.0
+
+    @property
+    def current_limit(self) -> int:
+        return max(self.min_limit, int(self.limit))
+
+    @property
+    def has_spare_capacity(self) -> bool:
+        """Whether a call could start now without queueing"""
+        return self.in_flight < self.current_limit and not self._waiters
+
+    def no_load_latency(self) -> Optional[float]:
+        """Fastest recent successful call, once there are enough samples"""
+        if len(self._latencies) < self.min_samples:
+            return None
+        return min(self._latencies)
+
+    async def acquire(self) -> None:
+        """Take a slot, waiting in the queue if the limit is reached"""
+        if self.in_flight < self.current_limit and not self._waiters:
+            self.in_flight += 1
+            self.stats.admitted += 1
+            return
+
+        if len(self._waiters) >= self.max_queue:
+            self.stats.rejected_queue_full += 1
+            raise ConcurrencyLimitExceeded(
+                f"Limiter '{self.name}' queue is full ({self.max_queue} waiting, limit {self.current_limit})"
+            )
+
+        timeout = deadline_timeout(self.queue_timeout)
+        self.stats.queued += 1
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        start = time.monotonic()
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed over just as we gave up; pass it on
+                self._release_slot()
+            else:
+                waiter.cancel()
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            self.stats.rejected_queue_timeout += 1
+            raise ConcurrencyLimitExceeded(
+                f"Limiter '{self.name}' queue wait exceeded {self.queue_timeout}s"
+            ) from e
+        finally:
+            waited = time.monotonic() - start
+            self.stats.queue_wait_seconds_total += waited
+            self.stats.queue_wait_seconds_max = max(self.stats.queue_wait_seconds_max, waited)
+        self.stats.admitted += 1
+
+    def release(self, latency: float, success: bool, record: bool = True) -> None:
+        """Return a slot and adjust the limit from the call's outcome"""
+        if record:
+            self._adjust(latency, success)
+        self._release_slot()
+
+    def _release_slot(self) -> None:
+        self.in_flight -= 1
+        self._wake()
+
+    def _wake(self) -> None:
+        # Hand free slots straight to waiters so new arrivals cannot jump the queue
+        while self._waiters and self.in_flight < self.current_limit:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(None)
+
+    def _adjust(self, latency: float, success: bool) -> None:
+        baseline = self.no_load_latency()
+        slow = (
+            self.latency_tolerance is not None
+            and baseline is not None
+            and latency > self.latency_tolerance * baseline
+        )
+        overloaded = not success or slow
+        if success:
+            self._latencies.append(latency)
+
+        now = time.monotonic()
+        if overloaded:
+            if now - self._last_decrease >= (baseline or 0.0):
+                self.limit = max(float(self.min_limit), self.limit * self.backoff_ratio)
+                self._last_decrease = now
+                self.stats.limit_decreases += 1
+        elif self.in_flight * 2 >= self.current_limit and self.limit < self.max_limit:
+            # Only grow while the limit is actually being used
+            self.limit = min(float(self.max_limit), self.limit + 1.0 / self.limit)
+            self.stats.limit_increases += 1
+            self._wake()
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """Hold a slot for the duration of a call (or a stream) and learn from its latency"""
+        await self.acquire()
+        start = time.monotonic()
+        success = False
+        record = True
+        try:
+            yield
+            success = True
+        except GeneratorExit:
+            # The consumer stopped reading a stream early; the call did not fail
+            success = True
+            raise
+        except asyncio.CancelledError:
+            # Abandoned by the caller; says nothing about the downstream
+            record = False
+            raise
+        finally:
+            self.release(time.monotonic() - start, success, record=record)
+
+    async def call(self, func: Callable, *args: Any, **kwargs: Any) -> Any:
+        """Execute a coroutine function within the limit"""
+        async with self.slot():
+            return await func(*args, **kwargs)
+
+    def get_state(self) -> Dict[str, Any]:
+        """Get the current limit, load, queue and wait metrics"""
+        stats = asdict(self.stats)
+        baseline = self.no_load_latency()
+        stats["avg_queue_wait_ms"] = (
+            round(self.stats.queue_wait_seconds_total / self.stats.queued * 1000, 1)
+            if self.stats.queued else 0.0
+        )
+        return {
+            "name": self.name,
+            "limit": self.current_limit,
+            "in_flight": self.in_flight,
+            "queue_depth": len(self._waiters),
+            "max_queue": self.max_queue,
+            "no_load_latency_ms": round(baseline * 1000, 1) if baseline is not None else None,
+            "stats": stats
+        }
+
+
+# Global limiters for external services
+chroma_limiter = AdaptiveLimiter("chromadb", initial_limit=8, max_limit=32, max_queue=200)
+
+enrichment_limiter = AdaptiveLimiter("enrichment_service", initial_limit=10, max_limit=50, max_queue=200)
+
+smtp_limiter = AdaptiveLimiter("smtp", initial_limit=5, max_limit=20, max_queue=500, queue_timeout=30.0)
@@ -0,0 +1,119 @@
+"""Per-dispute deadlines and per-node time budgets"""
+import asyncio
+import time
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass
+from typing import Any, Awaitable, Callable, Dict, Optional
+from app.db.audit_logger import audit_logger
+
+# Absolute (epoch) deadline of the dispute being processed, seen by every downstream call
+dispute_deadline: ContextVar[Optional[float]] = ContextVar("dispute_deadline", default=None)
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when the current dispute's deadline has already passed"""
+    pass
+
+
+def remaining() -> Optional[float]:
+    """Seconds left before the current dispute's deadline, or None without one"""
+    deadline = dispute_deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.time()
+
+
+def deadline_timeout(timeout: Optional[float]) -> Optional[float]:
+    """Shrink a call's timeout to fit the current dispute's deadline"""
+    left = remaining()
+    if left is None:
+        return timeout
+    if left <= 0:
+        raise DeadlineExceeded("Dispute deadline exceeded")
+    return left if timeout is None else min(timeout, left)
+
+
+@dataclass
+class NodeTimeoutStats:
+    """Per-node run and timeout counters"""
+    runs: int = 0
+    timeouts: int = 0
+    deadline_exhausted: int = 0
+    seconds_total: float = 0.0
+
+
+class NodeDeadlines:
+    """
+    Runs graph nodes within their time budget.
+    Each node gets the lesser of its own timeout and what is left of the
+    dispute's deadline (set on first use from `deadline_seconds`). A node
+    that overruns is cancelled, along with the calls it is waiting on, and
+    marked with `timed_out_node` so routing can send it to human review.
+    """
+
+    def __init__(self, timeouts: Dict[str, float], deadline_seconds: float = 180.0) -> None:
+        self.timeouts = timeouts
+        self.deadline_seconds = deadline_seconds
+        self.stats: Dict[str, NodeTimeoutStats] = {name: NodeTimeoutStats() for name in timeouts}
+
+    def wrap(self, node_name: str, node: Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]]):
+        """Bound a node by its timeout and the dispute deadline"""
+        timeout = self.timeouts[node_name]
+        stats = self.stats[node_name]
+
+        async def _run(state: Dict[str, Any]) -> Dict[str, Any]:
+            # A deadline set here is part of the node's update
+            started: Dict[str, Any] = {}
+            if state.get("deadline") is None:
+                state["deadline"] = started["deadline"] = time.time() + self.deadline_seconds
+            stats.runs += 1
+
+            budget = min(timeout, state["deadline"] - time.time())
+            if budget <= 0:
+                stats.deadline_exhausted += 1
+                return {**started, **await self._timed_out(
+                    state, node_name, "dispute deadline exhausted before the node started"
+                )}
+
+            token = dispute_deadline.set(state["deadline"])
+            start = time.monotonic()
+            try:
+                return {**started, **await asyncio.wait_for(node(state), budget)}
+            except asyncio.TimeoutError:
+                stats.timeouts += 1
+                return {**started, **await self._timed_out(state, node_name, f"exceeded its {budget:.1f}s budget")}
+            finally:
+                stats.seconds_total += time.monotonic() - start
+                dispute_deadline.reset(token)
+
+        _run.__name__ = node.__name__
+        return _run
+
+    async def _timed_out(self, state: Dict[str, Any], node_name: str, detail: str) -> Dict[str, Any]:
+        print(f"{node_name} timed out for {state['dispute_id']}: {detail}")
+        update = {
+            "error": f"{node_name} timed out: {detail}",
+            "timed_out_node": node_name,
+            "actions_taken": [*state["actions_taken"], f"{node_name}_timed_out"]
+        }
+        try:
+            await audit_logger.log_error(state["dispute_id"], node_name, update["error"])
+        except Exception:
+            pass
+        return update
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get per-node timeout counters and budgets"""
+        return {
+            "deadline_seconds": self.deadline_seconds,
+            "nodes": {
+                name: {
+                    **asdict(stats),
+                    "timeout_seconds": self.timeouts[name],
+                    "timeout_rate": round(
+                        (stats.timeouts + stats.deadline_exhausted) / stats.runs, 4
+                    ) if stats.runs else 0.0
+                }
+                for name, stats in self.stats.items()
+            }
+        }
@@ -0,0 +1,237 @@
+"""Semantic cache of retrieval and adjudication results for near-duplicate disputes"""
+import asyncio
+import math
+import re
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field
+from decimal import Decimal, InvalidOperation
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from app.schema.models import DisputeDecision, FraudAnalysis
+from app.tools.adjudicator import DEFERRED_REASONING
+
+_NON_WORD = re.compile(r"[^a-z0-9]+")
+
+# Verdict fields that carry over to a near-duplicate; the reasoning names the
+# source dispute's customer and transaction, so it is never reused
+REUSABLE_DECISION_FIELDS = ("decision", "confidence_score", "supporting_rules", "recommended_action")
+
+
+def amount_bucket(amount: Any) -> int:
+    """Power-of-two amount band, so similar amounts share a signature"""
+    try:
+        value = float(Decimal(str(amount)))
+    except (InvalidOperation, ValueError):
+        return -1
+    return int(math.log2(value)) if value >= 1 else 0
+
+
+def risk_bucket(fraud: Optional[FraudAnalysis]) -> str:
+    """Coarse fraud profile; disputes with different risk never share a decision"""
+    if fraud is None:
+        return "none"
+    return f"{round(fraud.risk_score, 1)}:{int(fraud.chargeback_rate > 0)}:{int(fraud.has_suspicious_patterns)}"
+
+
+def feature_signature(payload: Dict[str, Any], fraud: Optional[FraudAnalysis]) -> Tuple[str, ...]:
+    """Normalized structured features a cached decision must match exactly"""
+    merchant = _NON_WORD.sub(" ", str(payload.get("merchant_name") or "").lower()).strip()
+    return (
+        str(payload.get("reason_code", "")).strip(),
+        str(payload.get("currency", "")).upper(),
+        merchant,
+        str(amount_bucket(payload.get("amount", 0))),
+        risk_bucket(fraud)
+    )
+
+
+def cosine_similarity(a: List[float], b: List[float]) -> float:
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
+
+
+@dataclass
+class CacheEntry:
+    """A prior dispute's retrieval and decision"""
+    source_dispute_id: str
+    embedding: List[float] = field(repr=False)
+    retrieved_rules: List[Dict[str, Any]] = field(repr=False)
+    similarity_scores: List[float]
+    decision: Dict[str, Any]
+    created_at: float = field(default_factory=time.monotonic)
+
+
+@dataclass
+class CacheHit:
+    """A cache lookup that found a near-duplicate dispute"""
+    entry: CacheEntry
+    similarity: float
+
+    def decision_for(self, dispute_id: str) -> DisputeDecision:
+        """The cached verdict for another dispute; its reasoning is written afresh"""
+        return DisputeDecision(
+            **self.entry.decision,
+            dispute_id=dispute_id,
+            reasoning=DEFERRED_REASONING
+        )
+
+
+@dataclass
+class DecisionCacheStats:
+    """Counters for cache effectiveness and invalidation"""
+    lookups: int = 0
+    hits: int = 0
+    misses: int = 0
+    stores: int = 0
+    expired: int = 0
+    invalidations: int = 0
+    embedding_failures: int = 0
+
+
+class DecisionCache:
+    """
+    Reuses retrieval and adjudication across near-duplicate disputes.
+    A dispute hits when its feature signature (reason code, currency,
+    merchant, amount band, fraud profile) matches a cached dispute exactly
+    and their description embeddings are at least `similarity_threshold`
+    apart. legal_research_node looks disputes up before retrieval;
+    adjudication_node claims the hit, or stores its own result on a miss.
+    The cache is cleared whenever the rules corpus version or the
+    thresholds it was filled under change.
+    """
+
+    def __init__(
+        self,
+        embed: Callable[[List[str]], List[List[float]]],
+        corpus_version: Callable[[], str],
+        similarity_threshold: float = 0.95,
+        ttl_seconds: float = 3600.0,
+        max_entries: int = 1000,
+        version_check_interval: float = 30.0
+    ) -> None:
+        self.embed = embed
+        self.corpus_version = corpus_version
+        self.similarity_threshold = similarity_threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.version_check_interval = version_check_interval
+        self.stats = DecisionCacheStats()
+        self._entries: "OrderedDict[Tuple[str, ...], List[CacheEntry]]" = OrderedDict()
+        self._pending: "OrderedDict[str, Tuple[Tuple[str, ...], List[float]]]" = OrderedDict()
+        self._hits: Dict[str, CacheHit] = {}
+        self._generation: Optional[Tuple[Any, ...]] = None
+        self._version_checked_at = 0.0
+
+    def __len__(self) -> int:
+        return sum(len(entries) for entries in self._entries.values())
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._pending.clear()
+        self._hits.clear()
+
+    async def _check_generation(self, thresholds: Tuple[float, ...]) -> None:
+        """Drop every entry if the corpus or the thresholds have moved on"""
+        now = time.monotonic()
+        corpus = self._generation[0] if self._generation else None
+        if corpus is None or now - self._version_checked_at >= self.version_check_interval:
+            corpus = await asyncio.to_thread(self.corpus_version)
+            self._version_checked_at = now
+        generation = (corpus, self.similarity_threshold, *thresholds)
+        if self._generation is not None and generation != self._generation:
+            self.stats.invalidations += 1
+            print(f"Decision cache invalidated: {self._generation} -> {generation}")
+            self.clear()
+        self._generation = generation
+
+    async def lookup(
+        self,
+        dispute_id: str,
+        payload: Dict[str, Any],
+        fraud: Optional[FraudAnalysis],
+        thresholds: Tuple[float, ...] = ()
+    ) -> Optional[CacheHit]:
+        """Find a near-duplicate dispute's result, remembering this dispute's key on a miss"""
+        self.stats.lookups += 1
+        try:
+            await self._check_generation(thresholds)
+            embedding = (await asyncio.to_thread(self.embed, [str(payload.get("description", ""))]))[0]
+        except Exception as e:
+            self.stats.embedding_failures += 1
+            print(f"Decision cache lookup failed for {dispute_id}: {e}")
+            return None
+
+        signature = feature_signature(payload, fraud)
+        embedding = [float(x) for x in embedding]
+        now = time.monotonic()
+        best: Optional[CacheHit] = None
+        entries = self._entries.get(signature, [])
+        for entry in list(entries):
+            if now - entry.created_at > self.ttl_seconds:
+                entries.remove(entry)
+                self.stats.expired += 1
+                continue
+            similarity = cosine_similarity(embedding, entry.embedding)
+            if similarity >= self.similarity_threshold and (best is None or similarity > best.similarity):
+                best = CacheHit(entry, similarity)
+
+        if best is None:
+            self.stats.misses += 1
+            self._pending[dispute_id] = (signature, embedding)
+            while len(self._pending) > self.max_entries:
+                self._pending.popitem(last=False)
+            return None
+
+        self.stats.hits += 1
+        self._entries.move_to_end(signature)
+        self._hits[dispute_id] = best
+        while len(self._hits) > self.max_entries:
+            self._hits.pop(next(iter(self._hits)))
+        return best
+
+    def claim(self, dispute_id: str) -> Optional[CacheHit]:
+        """Take the hit recorded for a dispute by lookup, if any"""
+        return self._hits.pop(dispute_id, None)
+
+    def store(
+        self,
+        dispute_id: str,
+        retrieved_rules: List[Dict[str, Any]],
+        similarity_scores: List[float],
+        decision: DisputeDecision
+    ) -> bool:
+        """Cache a missed dispute's retrieval and decision for its near-duplicates"""
+        key = self._pending.pop(dispute_id, None)
+        if key is None:
+            return False
+        signature, embedding = key
+        self._entries.setdefault(signature, []).append(CacheEntry(
+            source_dispute_id=dispute_id,
+            embedding=embedding,
+            retrieved_rules=retrieved_rules,
+            similarity_scores=similarity_scores,
+            decision=decision.model_dump(include=set(REUSABLE_DECISION_FIELDS))
+        ))
+        self._entries.move_to_end(signature)
+        self.stats.stores += 1
+        while len(self) > self.max_entries:
+            oldest = next(iter(self._entries))
+            self._entries[oldest].pop(0)
+            if not self._entries[oldest]:
+                del self._entries[oldest]
+        return True
+
+    def discard(self, dispute_id: str) -> None:
+        """Forget a dispute that will not be stored"""
+        self._pending.pop(dispute_id, None)
+        self._hits.pop(dispute_id, None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get hit rate, size and invalidation counters"""
+        stats = asdict(self.stats)
+        stats["entries"] = len(self)
+        stats["signatures"] = len(self._entries)
+        stats["hit_rate"] = round(self.stats.hits / self.stats.lookups, 4) if self.stats.lookups else 0.0
+        stats["corpus_version"] = self._generation[0] if self._generation else None
+        return stats
@@ -0,0 +1,178 @@
+"""Deterministic decision table evaluated before LLM adjudication"""
+import json
+from collections import deque
+from dataclasses import asdict, dataclass, field
+from decimal import Decimal
+from typing import Any, Deque, Dict, List, Optional, Tuple
+from app.schema.models import DisputeDecision, FraudAnalysis
+
+DECISION_TABLE_MODES = ("off", "shadow", "active")
+
+
+@dataclass(frozen=True)
+class DecisionRule:
+    """
+    One row of the decision table.
+    Every condition that is set must hold for the rule to match; rules are
+    evaluated in order and the first match wins.
+    """
+    name: str
+    decision: str
+    confidence_score: float
+    reasoning: str
+    recommended_action: str
+    reason_codes: Tuple[str, ...] = ()
+    max_risk_score: Optional[float] = None
+    max_chargeback_rate: Optional[float] = None
+    no_suspicious_patterns: bool = False
+    min_history: int = 0
+    max_amount: Optional[float] = None
+
+    def matches(self, payload: Dict[str, Any], fraud: Optional[FraudAnalysis], history_count: int) -> bool:
+        if self.reason_codes and str(payload.get("reason_code", "")) not in self.reason_codes:
+            return False
+        if history_count < self.min_history:
+            return False
+        if self.max_amount is not None and float(Decimal(str(payload.get("amount", 0)))) > self.max_amount:
+            return False
+        needs_fraud = (
+            self.max_risk_score is not None
+            or self.max_chargeback_rate is not None
+            or self.no_suspicious_patterns
+        )
+        if needs_fraud and fraud is None:
+            return False
+        if self.max_risk_score is not None and fraud.risk_score > self.max_risk_score:
+            return False
+        if self.max_chargeback_rate is not None and fraud.chargeback_rate > self.max_chargeback_rate:
+            return False
+        if self.no_suspicious_patterns and fraud.has_suspicious_patterns:
+            return False
+        return True
+
+    def to_decision(self, dispute_id: str, payload: Dict[str, Any]) -> DisputeDecision:
+        return DisputeDecision(
+            dispute_id=dispute_id,
+            decision=self.decision,
+            confidence_score=self.confidence_score,
+            reasoning=self.reasoning.format(**payload),
+            supporting_rules=[f"Visa Reason Code {payload.get('reason_code', '')}", f"Decision table: {self.name}"],
+            recommended_action=self.recommended_action
+        )
+
+
+# Clear-cut card-absent fraud: an established customer with a spotless history
+DEFAULT_DECISION_RULES = [
+    DecisionRule(
+        name="card_absent_fraud_clean_history",
+        decision="accept",
+        confidence_score=0.95,
+        reasoning=(
+            "Reason code {reason_code} (card-absent fraud) claim from a customer with an established "
+            "transaction history, no prior chargebacks and no suspicious activity patterns. "
+            "The claim is consistent with genuine third-party fraud."
+        ),
+        recommended_action="Refund customer and reissue card",
+        reason_codes=("10.4",),
+        max_risk_score=0.0,
+        max_chargeback_rate=0.0,
+        no_suspicious_patterns=True,
+        min_history=5,
+        max_amount=1000.0
+    )
+]
+
+
+def load_decision_rules(path: Optional[str]) -> List[DecisionRule]:
+    """Load rules from a JSON list of DecisionRule fields, or use the defaults"""
+    if not path:
+        return list(DEFAULT_DECISION_RULES)
+    with open(path) as f:
+        rows = json.load(f)
+    return [
+        DecisionRule(**{**row, "reason_codes": tuple(row.get("reason_codes", ()))})
+        for row in rows
+    ]
+
+
+@dataclass
+class DecisionTableStats:
+    """Coverage and shadow-agreement counters"""
+    evaluated: int = 0
+    covered: int = 0
+    shadow_compared: int = 0
+    shadow_agreed: int = 0
+    rule_hits: Dict[str, int] = field(default_factory=dict)
+
+
+class DecisionTable:
+    """
+    Decides clear-cut disputes from structured signals without the LLM.
+    In "active" mode a matching rule's decision is used directly; in
+    "shadow" mode the LLM still decides and the table's answer is only
+    compared with it, so coverage and agreement can be measured first.
+    """
+
+    def __init__(self, rules: List[DecisionRule], mode: str = "shadow", max_disagreements: int = 50) -> None:
+        if mode not in DECISION_TABLE_MODES:
+            raise ValueError(f"Decision table mode must be one of {DECISION_TABLE_MODES}, got '{mode}'")
+        self.rules = rules
+        self.mode = mode
+        self.stats = DecisionTableStats()
+        self.disagreements: Deque[Dict[str, Any]] = deque(maxlen=max_disagreements)
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode != "off"
+
+    @property
+    def active(self) -> bool:
+        return self.mode == "active"
+
+    def evaluate(
+        self,
+        dispute_id: str,
+        payload: Dict[str, Any],
+        fraud: Optional[FraudAnalysis],
+        history_count: int
+    ) -> Optional[Tuple[DecisionRule, DisputeDecision]]:
+        """Return the first matching rule and its decision, if any"""
+        if not self.enabled:
+            return None
+        self.stats.evaluated += 1
+        for rule in self.rules:
+            if rule.matches(payload, fraud, history_count):
+                self.stats.covered += 1
+                self.stats.rule_hits[rule.name] = self.stats.rule_hits.get(rule.name, 0) + 1
+                return rule, rule.to_decision(dispute_id, payload)
+        return None
+
+    def record_shadow(self, rule: DecisionRule, table_decision: DisputeDecision, llm_decision: DisputeDecision) -> bool:
+        """Compare a shadow-mode table decision with the LLM's; returns whether they agree"""
+        self.stats.shadow_compared += 1
+        agreed = table_decision.decision == llm_decision.decision
+        if agreed:
+            self.stats.shadow_agreed += 1
+        else:
+            self.disagreements.append({
+                "dispute_id": table_decision.dispute_id,
+                "rule": rule.name,
+                "table_decision": table_decision.decision,
+                "llm_decision": llm_decision.decision,
+                "llm_confidence": llm_decision.confidence_score
+            })
+        return agreed
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get coverage rate, per-rule hits and shadow agreement"""
+        stats = asdict(self.stats)
+        stats["mode"] = self.mode
+        stats["coverage_rate"] = (
+            round(self.stats.covered / self.stats.evaluated, 4) if self.stats.evaluated else 0.0
+        )
+        stats["shadow_agreement_rate"] = (
+            round(self.stats.shadow_agreed / self.stats.shadow_compared, 4)
+            if self.stats.shadow_compared else None
+        )
+        stats["recent_disagreements"] = list(self.disagreements)
+        return stats
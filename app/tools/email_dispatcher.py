@@ -0,0 +1,138 @@
+"""Background dispatcher that drains the email outbox in batches"""
+import asyncio
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional, Sequence
+from app.db import email_outbox
+from app.db.audit_logger import audit_logger
+from app.tools.unified_email_service import unified_email_service
+from app.config.settings import settings
+
+
+# Seconds to wait before each retry; an email is dead-lettered once these run out
+DEFAULT_RETRY_SCHEDULE = (30, 120, 600, 1800, 3600)
+
+
+class EmailOutboxDispatcher:
+    """Delivers queued decision emails independently of graph execution"""
+
+    def __init__(
+        self,
+        batch_size: int = 50,
+        poll_interval: float = 2.0,
+        retry_schedule: Sequence[int] = DEFAULT_RETRY_SCHEDULE
+    ) -> None:
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.retry_schedule = tuple(retry_schedule)
+        self._task: Optional[asyncio.Task] = None
+        self.stats = {"batches": 0, "sent": 0, "retried": 0, "dead_lettered": 0}
+
+    def retry_delay(self, attempts: int) -> Optional[int]:
+        """Delay before the next attempt, or None when retries are exhausted"""
+        if attempts > len(self.retry_schedule):
+            return None
+        return self.retry_schedule[attempts - 1]
+
+    async def dispatch_once(self) -> int:
+        """Claim and send one batch; returns the number of emails claimed"""
+        batch = await email_outbox.claim_batch(self.batch_size)
+        if not batch:
+            return 0
+
+        results = await unified_email_service.send_batch([
+            {
+                "to_email": row["to_email"],
+                "dispute_id": row["dispute_id"],
+                "customer_name": row["customer_name"],
+                "decision": row["decision"],
+                "reasoning": row["reasoning"],
+                "amount": float(row["amount"]),
+                "currency": row["currency"]
+            }
+            for row in batch
+        ])
+        self.stats["batches"] += 1
+
+        for row, result in zip(batch, results):
+            await self._record_result(row, result)
+
+        return len(batch)
+
+    async def _record_result(self, row: Dict[str, Any], result: Dict[str, Any]) -> None:
+        if result.get("success"):
+            await email_outbox.mark_sent(row["id"], result.get("provider"))
+            self.stats["sent"] += 1
+            await audit_logger.log_action(
+                row["dispute_id"],
+                "email_sent",
+                {
+                    "recipient": row["to_email"],
+                    "subject": f"Dispute Resolution - {row['dispute_id']}",
+                    "sent_at": datetime.utcnow().isoformat(),
+                    "attempt": row["attempts"],
+                    "method": result.get("provider"),
+                    "queued_seconds": (datetime.utcnow() - row["created_at"]).total_seconds(),
+                    "status": "sent"
+                }
+            )
+            return
+
+        error = result.get("error", "Unknown error")
+        delay = self.retry_delay(row["attempts"])
+        if delay is None:
+            await email_outbox.mark_failed(row["id"], error, None)
+            self.stats["dead_lettered"] += 1
+            await audit_logger.log_error(
+                row["dispute_id"],
+                "action_node",
+                f"Email dead-lettered after {row['attempts']} attempts: {error}"
+            )
+        else:
+            await email_outbox.mark_failed(
+                row["id"], error, datetime.utcnow() + timedelta(seconds=delay)
+            )
+            self.stats["retried"] += 1
+
+    async def run(self) -> None:
+        """Drain the outbox until cancelled"""
+        while True:
+            try:
+                claimed = await self.dispatch_once()
+            except Exception as e:
+                print(f"Email outbox dispatch failed: {e}")
+                claimed = 0
+
+            # Keep draining while batches come back full
+            if claimed < self.batch_size:
+                await asyncio.sleep(self.poll_interval)
+
+    def start(self) -> None:
+        """Start the background dispatcher"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        """Stop the background dispatcher"""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def get_state(self) -> dict:
+        """Get dispatcher configuration and counters"""
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "batch_size": self.batch_size,
+            "retry_schedule": list(self.retry_schedule),
+            "stats": dict(self.stats)
+        }
+
+
+# Global dispatcher instance
+email_dispatcher = EmailOutboxDispatcher(
+    batch_size=settings.outbox_batch_size,
+    poll_interval=settings.outbox_poll_interval
+)
@@ -1,9 +1,11 @@
 """Real-time email service using Gmail SMTP"""
-import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from typing import Dict, Any
 import os
+from app.tools.smtp_pool import get_smtp_pool
+from app.tools.concurrency_limiter import smtp_limiter
+from app.tools.email_templates import RenderedEmail, email_renderer
 
 
 class EmailService:
@@ -15,8 +17,9 @@ class EmailService:
         self.smtp_port = int(os.getenv("SMTP_PORT", "587"))
         self.sender_email = os.getenv("SMTP_EMAIL", "")
         self.sender_password = os.getenv("SMTP_PASSWORD", "")
+        self.pool_size = int(os.getenv("SMTP_POOL_SIZE", "4"))
         
-    def send_dispute_decision(
+    async def send_dispute_decision(
         self,
         to_email: str,
         dispute_id: str,
@@ -26,30 +29,24 @@ class EmailService:
         amount: float,
         currency: str = "INR"
     ) -> Dict[str, Any]:
-        """Send dispute decision email"""
-        
-        # Create email content
-        email_content = f"""
-To: {to_email}
-Subject: Dispute Resolution - {dispute_id}
-
-Dear {customer_name},
-
-Your dispute has been processed:
-
-Dispute ID: {dispute_id}
-Decision: {decision.upper()}
-Amount: {currency} {amount:,.2f}
-
-Reasoning:
-{reasoning}
-
-Thank you for using our dispute resolution system.
-"""
+        """Render and send dispute decision email"""
+        rendered = email_renderer.render(
+            dispute_id=dispute_id,
+            customer_name=customer_name,
+            decision=decision,
+            reasoning=reasoning,
+            amount=amount,
+            currency=currency
+        )
+        return await self.send_rendered(to_email, rendered)
+    
+    async def send_rendered(self, to_email: str, rendered: RenderedEmail) -> Dict[str, Any]:
+        """Send an already rendered email"""
         
         if not self.sender_email or not self.sender_password or \
            self.sender_email == "your-email@gmail.com":
             # Log email instead of sending
+            email_content = f"To: {to_email}\nSubject: {rendered.subject}\n\n{rendered.text}"
             print("\n" + "="*60)
             print("📧 EMAIL NOTIFICATION (Not sent - SMTP not configured)")
             print("="*60)
@@ -67,77 +64,23 @@ Thank you for using our dispute resolution system.
         try:
             # Create message
             message = MIMEMultipart("alternative")
-            message["Subject"] = f"Dispute Resolution - {dispute_id}"
+            message["Subject"] = rendered.subject
             message["From"] = f"Dispute Resolution System <{self.sender_email}>"
             message["To"] = to_email
             
-            # Create HTML email body
-            html_body = f"""
-            <!DOCTYPE html>
-            <html>
-            <head>
-                <style>
-                    body {{ font-family: Arial, sans-serif; line-height: 1.6; color: #333; }}
-                    .container {{ max-width: 600px; margin: 0 auto; padding: 20px; }}
-                    .header {{ background: #1a1f36; color: white; padding: 20px; text-align: center; }}
-                    .content {{ background: #f9f9f9; padding: 20px; border: 1px solid #ddd; }}
-                    .detail {{ margin: 10px 0; padding: 10px; background: white; border-left: 3px solid #0066cc; }}
-                    .footer {{ text-align: center; padding: 20px; color: #666; font-size: 12px; }}
-                    .decision-box {{ padding: 15px; margin: 15px 0; border-radius: 5px; }}
-                    .approved {{ background: #d4edda; border: 2px solid #28a745; color: #155724; }}
-                    .rejected {{ background: #f8d7da; border: 2px solid #dc3545; color: #721c24; }}
-                    .review {{ background: #fff3cd; border: 2px solid #ffc107; color: #856404; }}
-                </style>
-            </head>
-            <body>
-                <div class="container">
-                    <div class="header">
-                        <h1>Dispute Resolution System</h1>
-                        <p>Automated Decision Notification</p>
-                    </div>
-                    
-                    <div class="content">
-                        <p>Dear {customer_name},</p>
-                        
-                        <p>Your dispute has been processed. Please find the details below:</p>
-                        
-                        <div class="detail">
-                            <strong>Dispute ID:</strong> {dispute_id}
-                        </div>
-                        
-                        <div class="detail">
-                            <strong>Amount:</strong> {currency} {amount:,.2f}
-                        </div>
-                        
-                        <div class="decision-box {'approved' if decision.lower() == 'accept' else 'rejected' if decision.lower() == 'reject' else 'review'}">
-                            <h3>Decision: {decision.upper()}</h3>
-                            <p><strong>Reasoning:</strong></p>
-                            <p>{reasoning}</p>
-                        </div>
-                        
-                        <p>If you have any questions or concerns, please contact our support team.</p>
-                        
-                        <p>Thank you for using our dispute resolution system.</p>
-                    </div>
-                    
-                    <div class="footer">
-                        <p>This is an automated email. Please do not reply.</p>
-                        <p>&copy; 2024 Dispute Resolution System. All rights reserved.</p>
-                    </div>
-                </div>
-            </body>
-            </html>
-            """
-            
-            # Attach HTML body
-            html_part = MIMEText(html_body, "html")
-            message.attach(html_part)
+            # Attach plain-text and HTML bodies
+            message.attach(MIMEText(rendered.text, "plain"))
+            message.attach(MIMEText(rendered.html, "html"))
             
-            # Send email
-            with smtplib.SMTP(self.smtp_server, self.smtp_port) as server:
-                server.starttls()
-                server.login(self.sender_email, self.sender_password)
-                server.send_message(message)
+            # Send email over a pooled, already-authenticated connection
+            pool = get_smtp_pool(
+                self.smtp_server,
+                self.smtp_port,
+                self.sender_email,
+                self.sender_password,
+                max_connections=self.pool_size
+            )
+            await smtp_limiter.call(pool.send_message, message)
             
             return {
                 "success": True,
@@ -0,0 +1,237 @@
+"""Precompiled email templates shared by all email providers"""
+import html
+from dataclasses import dataclass, field
+from string import Template
+from typing import Any, Dict, List
+
+
+@dataclass(frozen=True)
+class RenderedEmail:
+    """A fully rendered email, reusable across provider fallbacks"""
+    subject: str
+    html: str
+    text: str
+
+
+@dataclass
+class BulkRenderGroup:
+    """
+    Messages sharing one template body.
+    The body contains substitution tags (e.g. -reasoning-) that batch APIs
+    fill in per recipient from `substitutions`.
+    """
+    kind: str
+    template: RenderedEmail
+    indices: List[int] = field(default_factory=list)
+    substitutions: List[Dict[str, str]] = field(default_factory=list)
+
+
+_LAYOUT = """
+<!DOCTYPE html>
+<html>
+<head>
+    <style>
+        body { font-family: Arial, sans-serif; line-height: 1.6; color: #333; }
+        .container { max-width: 600px; margin: 0 auto; padding: 20px; }
+        .header { background: #1a1f36; color: white; padding: 20px; text-align: center; }
+        .content { background: #f9f9f9; padding: 20px; border: 1px solid #ddd; }
+        .detail { margin: 10px 0; padding: 10px; background: white; border-left: 3px solid #0066cc; }
+        .footer { text-align: center; padding: 20px; color: #666; font-size: 12px; }
+        .decision-box { padding: 15px; margin: 15px 0; border-radius: 5px; }
+        .approved { background: #d4edda; border: 2px solid #28a745; color: #155724; }
+        .rejected { background: #f8d7da; border: 2px solid #dc3545; color: #721c24; }
+        .review { background: #fff3cd; border: 2px solid #ffc107; color: #856404; }
+    </style>
+</head>
+<body>
+    <div class="container">
+        <div class="header">
+            <h1>Dispute Resolution System</h1>
+            <p>Automated Decision Notification</p>
+        </div>
+
+        <div class="content">
+            <p>Dear $customer_name,</p>
+
+            <p>$intro</p>
+
+            <div class="detail">
+                <strong>Dispute ID:</strong> $dispute_id
+            </div>
+
+            <div class="detail">
+                <strong>Amount:</strong> $amount
+            </div>
+
+            <div class="decision-box $box_class">
+                <h3>$heading</h3>
+                <p><strong>Reasoning:</strong></p>
+                <p>$reasoning</p>
+            </div>
+
+            <p>If you have any questions or concerns, please contact our support team.</p>
+
+            <p>Thank you for using our dispute resolution system.</p>
+        </div>
+
+        <div class="footer">
+            <p>This is an automated email. Please do not reply.</p>
+            <p>&copy; 2024 Dispute Resolution System. All rights reserved.</p>
+        </div>
+    </div>
+</body>
+</html>
+"""
+
+_TEXT = """Dear $customer_name,
+
+$intro
+
+Dispute ID: $dispute_id
+$heading
+Amount: $amount
+
+Reasoning:
+$reasoning
+
+Thank you for using our dispute resolution system.
+"""
+
+# Per-template fixed parts, baked into the layout once at import time
+_TEMPLATE_PARTS = {
+    "decision": {
+        "box_class": "approved",
+        "heading": "Decision: ACCEPT",
+        "intro": "Your dispute has been processed. Please find the details below:"
+    },
+    "rejection": {
+        "box_class": "rejected",
+        "heading": "Decision: REJECT",
+        "intro": "Your dispute has been processed. Please find the details below:"
+    },
+    "escalation": {
+        "box_class": "review",
+        "heading": "Decision: ESCALATE",
+        "intro": "Your dispute has been processed. Please find the details below:"
+    },
+    "under_review": {
+        "box_class": "review",
+        "heading": "Decision: UNDER_REVIEW",
+        "intro": "Your dispute has been processed. Please find the details below:"
+    }
+}
+
+# Substitution tags used by bulk rendering
+_BULK_TAGS = {
+    "customer_name": "-customer_name-",
+    "dispute_id": "-dispute_id-",
+    "amount": "-amount-",
+    "reasoning": "-reasoning-"
+}
+
+
+def _compile(kind: str) -> Dict[str, Template]:
+    parts = _TEMPLATE_PARTS[kind]
+    return {
+        "html": Template(Template(_LAYOUT).safe_substitute(
+            {key: html.escape(value) for key, value in parts.items()}
+        )),
+        "text": Template(Template(_TEXT).safe_substitute(parts))
+    }
+
+
+class EmailTemplateRenderer:
+    """Renders decision, rejection, escalation and under-review emails from compiled templates"""
+
+    def __init__(self) -> None:
+        self._templates = {kind: _compile(kind) for kind in _TEMPLATE_PARTS}
+        # Tagged bodies for batch APIs never change, so render them once
+        self._bulk_templates = {
+            kind: self._render_kind(kind, dict(_BULK_TAGS), escape=False)
+            for kind in _TEMPLATE_PARTS
+        }
+
+    @staticmethod
+    def template_kind(decision: str) -> str:
+        """Map a decision value to its template"""
+        decision = decision.lower()
+        if decision == "accept":
+            return "decision"
+        if decision == "reject":
+            return "rejection"
+        if decision == "escalate":
+            return "escalation"
+        return "under_review"
+
+    @staticmethod
+    def _fields(
+        dispute_id: str,
+        customer_name: str,
+        reasoning: str,
+        amount: float,
+        currency: str
+    ) -> Dict[str, str]:
+        return {
+            "customer_name": customer_name,
+            "dispute_id": dispute_id,
+            "amount": f"{currency} {amount:,.2f}",
+            "reasoning": reasoning
+        }
+
+    def _render_kind(self, kind: str, fields: Dict[str, str], escape: bool = True) -> RenderedEmail:
+        templates = self._templates[kind]
+        html_fields = {k: html.escape(v) for k, v in fields.items()} if escape else fields
+        return RenderedEmail(
+            subject=f"Dispute Resolution - {fields['dispute_id']}",
+            html=templates["html"].substitute(html_fields),
+            text=templates["text"].substitute(fields)
+        )
+
+    def render(
+        self,
+        dispute_id: str,
+        customer_name: str,
+        decision: str,
+        reasoning: str,
+        amount: float,
+        currency: str = "INR",
+        **_: Any
+    ) -> RenderedEmail:
+        """Render one email"""
+        return self._render_kind(
+            self.template_kind(decision),
+            self._fields(dispute_id, customer_name, reasoning, amount, currency)
+        )
+
+    def render_many(self, messages: List[Dict[str, Any]]) -> List[RenderedEmail]:
+        """Render a list of messages, in order"""
+        return [self.render(**message) for message in messages]
+
+    def render_bulk(self, messages: List[Dict[str, Any]]) -> List[BulkRenderGroup]:
+        """
+        Group messages by template for personalization-based batch APIs.
+        Each group's body is rendered once; only escaped per-recipient values
+        are produced per message.
+        """
+        groups: Dict[str, BulkRenderGroup] = {}
+        for i, message in enumerate(messages):
+            kind = self.template_kind(message["decision"])
+            group = groups.get(kind)
+            if group is None:
+                group = groups[kind] = BulkRenderGroup(kind, self._bulk_templates[kind])
+            fields = self._fields(
+                message["dispute_id"],
+                message["customer_name"],
+                message["reasoning"],
+                message["amount"],
+                message.get("currency", "INR")
+            )
+            group.indices.append(i)
+            group.substitutions.append({
+                _BULK_TAGS[key]: html.escape(value) for key, value in fields.items()
+            })
+        return list(groups.values())
+
+
+# Global renderer; templates are compiled at import
+email_renderer = EmailTemplateRenderer()
@@ -1,8 +1,11 @@
 """Gmail API client for sending email notifications"""
+import asyncio
 import base64
 import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
 from email.mime.text import MIMEText
-from typing import Optional
+from typing import Any, Callable, List, Optional, Tuple
 from google.oauth2.credentials import Credentials
 from google.auth.transport.requests import Request
 from google_auth_oauthlib.flow import InstalledAppFlow
@@ -12,24 +15,49 @@ from googleapiclient.errors import HttpError
 
 SCOPES = ['https://www.googleapis.com/auth/gmail.send']
 
+# Gmail recommends no more than 50 requests per batch
+MAX_BATCH_SIZE = 50
+
 
 class GmailClient:
-    """Gmail API client for sending emails"""
-    
-    def __init__(self, credentials_path: Optional[str] = None):
+    """
+    Gmail API client for sending emails.
+    The Google client library is blocking, so authentication, token refresh
+    and sends run on a bounded thread pool. Sends queued within a short
+    window are grouped into one Gmail batch HTTP request.
+    """
+
+    def __init__(
+        self,
+        credentials_path: Optional[str] = None,
+        max_workers: int = 4,
+        batch_size: int = MAX_BATCH_SIZE,
+        batch_window: float = 0.05,
+        refresh_margin: float = 300.0,
+        refresh_retry: float = 30.0
+    ):
         """Initialize Gmail client with credentials"""
         self.credentials_path = credentials_path or os.getenv('GMAIL_API_CREDENTIALS')
         self.creds = None
         self.service = None
-    
+        self.batch_size = min(batch_size, MAX_BATCH_SIZE)
+        self.batch_window = batch_window
+        self.refresh_margin = refresh_margin
+        self.refresh_retry = refresh_retry
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="gmail")
+        self._auth_lock: Optional[asyncio.Lock] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._batch_task: Optional[asyncio.Task] = None
+        self._refresh_task: Optional[asyncio.Task] = None
+
     def authenticate(self) -> None:
-        """Authenticate with Gmail API"""
+        """Authenticate with Gmail API (blocking)"""
         token_path = 'token.json'
-        
+
         # Load existing credentials
         if os.path.exists(token_path):
             self.creds = Credentials.from_authorized_user_file(token_path, SCOPES)
-        
+
         # Refresh or get new credentials
         if not self.creds or not self.creds.valid:
             if self.creds and self.creds.expired and self.creds.refresh_token:
@@ -44,14 +72,68 @@ class GmailClient:
                     "Gmail credentials not found. Set GMAIL_API_CREDENTIALS environment variable "
                     "or provide credentials_path"
                 )
-            
-            # Save credentials for next run
-            with open(token_path, 'w') as token:
-                token.write(self.creds.to_json())
-        
+
+            self._save_token()
+
         # Build service
         self.service = build('gmail', 'v1', credentials=self.creds)
-    
+
+    def _save_token(self, token_path: str = 'token.json') -> None:
+        """Save credentials for next run (blocking)"""
+        with open(token_path, 'w') as token:
+            token.write(self.creds.to_json())
+
+    def refresh_credentials(self) -> None:
+        """Refresh the access token ahead of expiry (blocking)"""
+        if self.creds and self.creds.refresh_token:
+            self.creds.refresh(Request())
+            self._save_token()
+
+    async def _run(self, func: Callable, *args: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, func, *args)
+
+    async def ensure_authenticated(self) -> None:
+        """Authenticate once, off the event loop, and start background workers"""
+        if self.service and self._batch_task and not self._batch_task.done():
+            return
+        if self._auth_lock is None:
+            self._auth_lock = asyncio.Lock()
+        async with self._auth_lock:
+            if not self.service:
+                await self._run(self.authenticate)
+            self._start_background_tasks()
+
+    def _start_background_tasks(self) -> None:
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self._refresh_loop())
+        if self._batch_task is None or self._batch_task.done():
+            self._queue = asyncio.Queue()
+            self._batch_task = asyncio.create_task(self._batch_loop())
+
+    def _seconds_until_refresh(self) -> float:
+        expiry = getattr(self.creds, "expiry", None)
+        if not expiry:
+            return self.refresh_margin
+        remaining = (expiry - datetime.utcnow()).total_seconds() - self.refresh_margin
+        return max(remaining, 0.0)
+
+    async def _refresh_loop(self) -> None:
+        """Refresh the token in the background so sends never wait on it"""
+        while True:
+            await asyncio.sleep(self._seconds_until_refresh())
+            expiry = getattr(self.creds, "expiry", None)
+            try:
+                await self._run(self.refresh_credentials)
+            except Exception as e:
+                print(f"Gmail token refresh failed: {e}")
+                await asyncio.sleep(self.refresh_retry)
+                continue
+            # No refresh token (or a no-op refresh) leaves the expiry where it
+            # was; wait before checking again instead of spinning on it
+            if getattr(self.creds, "expiry", None) == expiry:
+                await asyncio.sleep(self.refresh_retry)
+
     def create_message(
         self,
         to: str,
@@ -64,10 +146,76 @@ class GmailClient:
         message['to'] = to
         message['from'] = from_email
         message['subject'] = subject
-        
+
         raw_message = base64.urlsafe_b64encode(message.as_bytes()).decode('utf-8')
         return {'raw': raw_message}
-    
+
+    @staticmethod
+    def _sent_result(sent_message: dict) -> dict:
+        return {
+            'success': True,
+            'message_id': sent_message['id'],
+            'thread_id': sent_message.get('threadId'),
+            'label_ids': sent_message.get('labelIds', [])
+        }
+
+    @staticmethod
+    def _error_result(error: Exception) -> dict:
+        if isinstance(error, HttpError):
+            return {
+                'success': False,
+                'error': str(error),
+                'error_code': error.resp.status if hasattr(error, 'resp') else None
+            }
+        return {
+            'success': False,
+            'error': str(error)
+        }
+
+    def _execute_batch(self, messages: List[dict]) -> List[dict]:
+        """Send messages in one Gmail batch HTTP request (blocking)"""
+        results: List[dict] = [{} for _ in messages]
+
+        def callback(request_id: str, response: dict, exception: Optional[Exception]) -> None:
+            index = int(request_id)
+            results[index] = self._error_result(exception) if exception else self._sent_result(response)
+
+        batch = self.service.new_batch_http_request(callback=callback)
+        for i, message in enumerate(messages):
+            batch.add(
+                self.service.users().messages().send(userId='me', body=message),
+                request_id=str(i)
+            )
+        batch.execute()
+        return results
+
+    async def _batch_loop(self) -> None:
+        """Group queued sends into batch requests"""
+        while True:
+            pending: List[Tuple[dict, asyncio.Future]] = [await self._queue.get()]
+
+            # Wait briefly for more sends to share the round trip
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + self.batch_window
+            while len(pending) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    pending.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            messages = [message for message, _ in pending]
+            try:
+                results = await self._run(self._execute_batch, messages)
+            except Exception as error:
+                results = [self._error_result(error) for _ in pending]
+
+            for (_, future), result in zip(pending, results):
+                if not future.done():
+                    future.set_result(result)
+
     async def send_email(
         self,
         to: str,
@@ -78,36 +226,25 @@ class GmailClient:
         """Send an email via Gmail API"""
         try:
             # Ensure authenticated
-            if not self.service:
-                self.authenticate()
-            
+            await self.ensure_authenticated()
+
             # Create message
             message = self.create_message(to, subject, body, from_email)
-            
-            # Send message
-            sent_message = self.service.users().messages().send(
-                userId='me',
-                body=message
-            ).execute()
-            
-            return {
-                'success': True,
-                'message_id': sent_message['id'],
-                'thread_id': sent_message.get('threadId'),
-                'label_ids': sent_message.get('labelIds', [])
-            }
-            
-        except HttpError as error:
-            return {
-                'success': False,
-                'error': str(error),
-                'error_code': error.resp.status if hasattr(error, 'resp') else None
-            }
+
+            # Queue for the next batch request
+            future = asyncio.get_running_loop().create_future()
+            await self._queue.put((message, future))
+            return await future
+
         except Exception as error:
-            return {
-                'success': False,
-                'error': str(error)
-            }
+            return self._error_result(error)
+
+    async def close(self) -> None:
+        """Stop background tasks and release worker threads"""
+        for task in (self._batch_task, self._refresh_task):
+            if task:
+                task.cancel()
+        self._executor.shutdown(wait=False)
 
 
 # Global Gmail client instance
@@ -0,0 +1,54 @@
+"""Sliding-window success rate and latency tracking for downstream services"""
+import time
+from collections import deque
+from typing import Deque, Optional, Tuple
+
+
+class HealthWindow:
+    """Keeps recent call outcomes and latencies for a single downstream"""
+
+    def __init__(self, window_seconds: float = 300.0, max_samples: int = 1000) -> None:
+        self.window_seconds = window_seconds
+        self._samples: Deque[Tuple[float, bool, float]] = deque(maxlen=max_samples)
+
+    def record(self, success: bool, latency: float) -> None:
+        """Record one call outcome and its latency in seconds"""
+        self._samples.append((time.monotonic(), success, latency))
+
+    def _prune(self) -> None:
+        cutoff = time.monotonic() - self.window_seconds
+        while self._samples and self._samples[0][0] < cutoff:
+            self._samples.popleft()
+
+    @property
+    def sample_count(self) -> int:
+        self._prune()
+        return len(self._samples)
+
+    def success_rate(self) -> float:
+        """Fraction of successful calls in the window (1.0 when empty)"""
+        self._prune()
+        if not self._samples:
+            return 1.0
+        return sum(1 for _, success, _ in self._samples if success) / len(self._samples)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Latency percentile (0-100) over the window, or None when empty"""
+        self._prune()
+        if not self._samples:
+            return None
+        latencies = sorted(latency for _, _, latency in self._samples)
+        index = min(len(latencies) - 1, int(round(q / 100.0 * (len(latencies) - 1))))
+        return latencies[index]
+
+    def get_stats(self) -> dict:
+        """Get window statistics"""
+        p50 = self.percentile(50)
+        p95 = self.percentile(95)
+        return {
+            "samples": self.sample_count,
+            "success_rate": round(self.success_rate(), 4),
+            "p50_latency_ms": round(p50 * 1000, 1) if p50 is not None else None,
+            "p95_latency_ms": round(p95 * 1000, 1) if p95 is not None else None,
+            "window_seconds": self.window_seconds
+        }
@@ -0,0 +1,97 @@
+"""Incremental parser for a JSON object arriving as a token stream"""
+import json
+from typing import Any, Dict, Optional
+
+
+class IncrementalJSONObjectParser:
+    """
+    Scans streamed text for the first top-level JSON object.
+    Top-level fields are decoded as soon as their value is complete, so
+    callers can validate them before the object has finished generating.
+    Text before the opening brace (e.g. a model preamble) is ignored.
+    """
+
+    def __init__(self) -> None:
+        self.buffer = ""
+        self.fields: Dict[str, Any] = {}
+        self.complete = False
+        self._pos = 0
+        self._start: Optional[int] = None
+        self._end: Optional[int] = None
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._key_start: Optional[int] = None
+        self._key: Optional[str] = None
+        self._value_start: Optional[int] = None
+
+    @property
+    def object_text(self) -> Optional[str]:
+        """The complete object text, once the closing brace has arrived"""
+        if self._start is None or self._end is None:
+            return None
+        return self.buffer[self._start:self._end]
+
+    def feed(self, chunk: str) -> Dict[str, Any]:
+        """
+        Consume a chunk and return top-level fields completed by it.
+        Raises json.JSONDecodeError when a completed value is not valid JSON.
+        """
+        completed: Dict[str, Any] = {}
+        if self.complete:
+            return completed
+
+        self.buffer += chunk
+        buffer = self.buffer
+        while self._pos < len(buffer):
+            i = self._pos
+            ch = buffer[i]
+            self._pos += 1
+
+            if self._start is None:
+                if ch == "{":
+                    self._start = i
+                    self._depth = 1
+                continue
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    if self._depth == 1 and self._key_start is not None and self._value_start is None:
+                        self._key = json.loads(buffer[self._key_start:i + 1])
+                        self._key_start = None
+                continue
+
+            if ch == '"':
+                self._in_string = True
+                if self._depth == 1 and self._value_start is None and self._key is None:
+                    self._key_start = i
+            elif ch in "{[":
+                self._depth += 1
+            elif ch in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    self._complete_field(buffer, i, completed)
+                    self._end = i + 1
+                    self.complete = True
+                    break
+            elif self._depth == 1:
+                if ch == ":" and self._key is not None and self._value_start is None:
+                    self._value_start = i + 1
+                elif ch == ",":
+                    self._complete_field(buffer, i, completed)
+
+        return completed
+
+    def _complete_field(self, buffer: str, end: int, completed: Dict[str, Any]) -> None:
+        if self._key is None or self._value_start is None:
+            return
+        value = json.loads(buffer[self._value_start:end])
+        self.fields[self._key] = value
+        completed[self._key] = value
+        self._key = None
+        self._value_start = None
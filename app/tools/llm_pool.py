@@ -0,0 +1,424 @@
+"""Load-balanced pool of LLM model servers"""
+import asyncio
+import contextlib
+import time
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+import httpx
+from app.tools.circuit_breaker import CircuitBreaker
+from app.tools.concurrency_limiter import AdaptiveLimiter
+from app.tools.deadline import deadline_timeout
+from app.tools.health_window import HealthWindow
+
+
+class NoHealthyEndpointError(Exception):
+    """Raised when the pool has no endpoints configured"""
+    pass
+
+
+class LLMDeadlineExceeded(TimeoutError):
+    """Raised when an LLM call does not finish within its deadline"""
+    pass
+
+
+@dataclass
+class LLMEndpoint:
+    """One model server and its load and health state"""
+    url: str
+    llm: Any
+    max_in_flight: int
+    in_flight: int = 0
+    consecutive_failures: int = 0
+    ejected_until: float = 0.0
+    total_requests: int = 0
+    health: HealthWindow = field(default_factory=HealthWindow)
+
+    @property
+    def ejected(self) -> bool:
+        return time.monotonic() < self.ejected_until
+
+    @property
+    def has_capacity(self) -> bool:
+        return self.in_flight < self.max_in_flight
+
+    def get_state(self) -> dict:
+        return {
+            "url": self.url,
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight,
+            "ejected": self.ejected,
+            "ejected_for_seconds": round(max(self.ejected_until - time.monotonic(), 0.0), 1),
+            "consecutive_failures": self.consecutive_failures,
+            "total_requests": self.total_requests,
+            "health": self.health.get_stats()
+        }
+
+
+class LLMEndpointPool:
+    """
+    Spreads LLM calls over several model servers.
+    Each call goes to the healthy endpoint with the fewest outstanding
+    requests; callers wait when every endpoint is at its in-flight cap.
+    Endpoints are ejected after repeated failures or a failed health check
+    and readmitted once a health check passes. Exposes the ainvoke/astream/
+    bind subset of the LangChain chat model interface used by the tools.
+
+    Every call runs under the optional circuit breaker and a per-call
+    deadline. With hedging enabled, an ainvoke still running after its
+    endpoint's observed p95 latency is duplicated to a second endpoint and
+    the first answer wins. An optional adaptive limiter caps total
+    concurrency below the endpoints' combined capacity when latency rises;
+    views from `limited()` use their own limiter instead, so calls of very
+    different lengths each adapt against their own latency baseline.
+    """
+
+    def __init__(
+        self,
+        endpoints: Dict[str, Any],
+        max_in_flight: int = 4,
+        eject_after: int = 3,
+        eject_seconds: float = 30.0,
+        health_check_interval: float = 15.0,
+        health_check_path: str = "/api/tags",
+        breaker: Optional[CircuitBreaker] = None,
+        call_timeout: Optional[float] = None,
+        hedge: bool = False,
+        hedge_min_samples: int = 5,
+        limiter: Optional[AdaptiveLimiter] = None
+    ) -> None:
+        if not endpoints:
+            raise NoHealthyEndpointError("LLM endpoint pool requires at least one endpoint")
+        self.endpoints = [
+            LLMEndpoint(url=url, llm=llm, max_in_flight=max_in_flight)
+            for url, llm in endpoints.items()
+        ]
+        self.eject_after = eject_after
+        self.eject_seconds = eject_seconds
+        self.health_check_interval = health_check_interval
+        self.health_check_path = health_check_path
+        self.breaker = breaker
+        self.call_timeout = call_timeout
+        self.hedge = hedge
+        self.hedge_min_samples = hedge_min_samples
+        self.limiter = limiter
+        self.shape_limiters: Dict[str, AdaptiveLimiter] = {}
+        self.stats = {"hedges_sent": 0, "hedges_won": 0, "deadlines_exceeded": 0}
+        self._condition: Optional[asyncio.Condition] = None
+        self._health_task: Optional[asyncio.Task] = None
+
+    @classmethod
+    def from_urls(cls, urls: List[str], factory: Callable[[str], Any], **kwargs: Any) -> "LLMEndpointPool":
+        """Build a pool with one client per base URL"""
+        return cls({url: factory(url) for url in urls}, **kwargs)
+
+    def _get_condition(self) -> asyncio.Condition:
+        if self._condition is None:
+            self._condition = asyncio.Condition()
+        return self._condition
+
+    def _pick(self) -> Optional[LLMEndpoint]:
+        healthy = [endpoint for endpoint in self.endpoints if not endpoint.ejected]
+        # With every endpoint ejected, keep serving rather than failing all disputes
+        candidates = [endpoint for endpoint in (healthy or self.endpoints) if endpoint.has_capacity]
+        if not candidates:
+            return None
+        return min(candidates, key=lambda endpoint: endpoint.in_flight)
+
+    async def acquire(self) -> LLMEndpoint:
+        """Reserve a slot on the least-loaded healthy endpoint"""
+        condition = self._get_condition()
+        async with condition:
+            while True:
+                endpoint = self._pick()
+                if endpoint is not None:
+                    endpoint.in_flight += 1
+                    endpoint.total_requests += 1
+                    return endpoint
+                await condition.wait()
+
+    async def try_acquire(self, exclude: LLMEndpoint) -> Optional[LLMEndpoint]:
+        """Reserve a slot on another healthy endpoint without waiting"""
+        async with self._get_condition():
+            candidates = [
+                endpoint for endpoint in self.endpoints
+                if endpoint is not exclude and not endpoint.ejected and endpoint.has_capacity
+            ]
+            if not candidates:
+                return None
+            endpoint = min(candidates, key=lambda candidate: candidate.in_flight)
+            endpoint.in_flight += 1
+            endpoint.total_requests += 1
+            return endpoint
+
+    async def release(
+        self,
+        endpoint: LLMEndpoint,
+        success: bool,
+        latency: float,
+        record: bool = True
+    ) -> None:
+        """Return a slot and record the call outcome"""
+        if record:
+            endpoint.health.record(success, latency)
+            if success:
+                endpoint.consecutive_failures = 0
+            else:
+                endpoint.consecutive_failures += 1
+                if endpoint.consecutive_failures >= self.eject_after:
+                    self._eject(endpoint)
+
+        condition = self._get_condition()
+        async with condition:
+            endpoint.in_flight -= 1
+            condition.notify()
+
+    def _eject(self, endpoint: LLMEndpoint) -> None:
+        endpoint.ejected_until = time.monotonic() + self.eject_seconds
+        print(f"LLM endpoint {endpoint.url} ejected for {self.eject_seconds}s")
+
+    async def ainvoke(self, prompt: Any, call_timeout: Optional[float] = None, **kwargs: Any) -> Any:
+        return await self._ainvoke(None, prompt, call_timeout, **kwargs)
+
+    def astream(self, prompt: Any, call_timeout: Optional[float] = None, **kwargs: Any) -> AsyncIterator[Any]:
+        return self._astream(None, prompt, call_timeout, **kwargs)
+
+    def bind(self, **kwargs: Any) -> "BoundLLMEndpointPool":
+        """Bind call options (e.g. `format`) on every endpoint's client"""
+        return BoundLLMEndpointPool(self, kwargs)
+
+    def limited(self, limiter: AdaptiveLimiter) -> "BoundLLMEndpointPool":
+        """A view whose calls are admitted by `limiter` (reused if one of that name exists)"""
+        limiter = self.shape_limiters.setdefault(limiter.name, limiter)
+        return BoundLLMEndpointPool(self, {}, limiter)
+
+    def _client(self, endpoint: LLMEndpoint, bound: Optional[List[Any]]) -> Any:
+        if bound is None:
+            return endpoint.llm
+        return bound[self.endpoints.index(endpoint)]
+
+    def _deadline_error(self, timeout: float) -> LLMDeadlineExceeded:
+        self.stats["deadlines_exceeded"] += 1
+        return LLMDeadlineExceeded(f"LLM call exceeded its {timeout}s deadline")
+
+    async def _ainvoke(
+        self,
+        bound: Optional[List[Any]],
+        prompt: Any,
+        call_timeout: Optional[float],
+        limiter: Optional[AdaptiveLimiter] = None,
+        **kwargs: Any
+    ) -> Any:
+        async with self._limit(limiter):
+            # Never wait past the current dispute's deadline (measured after any queueing)
+            timeout = deadline_timeout(call_timeout or self.call_timeout)
+
+            async def _call() -> Any:
+                try:
+                    return await asyncio.wait_for(self._invoke_hedged(bound, prompt, **kwargs), timeout)
+                except asyncio.TimeoutError as e:
+                    raise self._deadline_error(timeout) from e
+
+            if self.breaker is None:
+                return await _call()
+            return await self.breaker.call(_call)
+
+    def _limit(self, limiter: Optional[AdaptiveLimiter]) -> Any:
+        limiter = limiter or self.limiter
+        return limiter.slot() if limiter else contextlib.nullcontext()
+
+    async def _call_endpoint(
+        self,
+        endpoint: LLMEndpoint,
+        bound: Optional[List[Any]],
+        prompt: Any,
+        **kwargs: Any
+    ) -> Any:
+        start = time.monotonic()
+        success = False
+        record = True
+        try:
+            result = await self._client(endpoint, bound).ainvoke(prompt, **kwargs)
+            success = True
+            return result
+        except asyncio.CancelledError:
+            # A lost hedge race, a node deadline or a client disconnect says
+            # nothing about the endpoint; only errors it returned count against it
+            record = False
+            raise
+        finally:
+            await self.release(endpoint, success, time.monotonic() - start, record=record)
+
+    def _hedge_delay(self, endpoint: LLMEndpoint) -> Optional[float]:
+        if not self.hedge or len(self.endpoints) < 2:
+            return None
+        if endpoint.health.sample_count < self.hedge_min_samples:
+            return None
+        return endpoint.health.percentile(95)
+
+    async def _invoke_hedged(self, bound: Optional[List[Any]], prompt: Any, **kwargs: Any) -> Any:
+        primary = await self.acquire()
+        delay = self._hedge_delay(primary)
+        if delay is None:
+            return await self._call_endpoint(primary, bound, prompt, **kwargs)
+
+        primary_task = asyncio.create_task(self._call_endpoint(primary, bound, prompt, **kwargs))
+        tasks = [primary_task]
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if not done:
+                secondary = await self.try_acquire(exclude=primary)
+                if secondary is not None:
+                    self.stats["hedges_sent"] += 1
+                    tasks.append(asyncio.create_task(
+                        self._call_endpoint(secondary, bound, prompt, **kwargs)
+                    ))
+
+            pending = set(tasks)
+            error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is not primary_task:
+                            self.stats["hedges_won"] += 1
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _astream(
+        self,
+        bound: Optional[List[Any]],
+        prompt: Any,
+        call_timeout: Optional[float],
+        limiter: Optional[AdaptiveLimiter] = None,
+        **kwargs: Any
+    ) -> AsyncIterator[Any]:
+        async with self._limit(limiter):
+            timeout = deadline_timeout(call_timeout or self.call_timeout)
+            guard = self.breaker.protect() if self.breaker else contextlib.nullcontext()
+            async with guard:
+                # Close the inner stream promptly so its endpoint slot is released
+                async with contextlib.aclosing(self._stream_endpoint(bound, prompt, timeout, **kwargs)) as stream:
+                    async for chunk in stream:
+                        yield chunk
+
+    async def _stream_endpoint(
+        self,
+        bound: Optional[List[Any]],
+        prompt: Any,
+        timeout: Optional[float],
+        **kwargs: Any
+    ) -> AsyncIterator[Any]:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout if timeout else None
+        endpoint = await self.acquire()
+        start = time.monotonic()
+        success = False
+        record = True
+        stream = None
+        try:
+            stream = self._client(endpoint, bound).astream(prompt, **kwargs).__aiter__()
+            while True:
+                remaining = deadline - loop.time() if deadline is not None else None
+                try:
+                    chunk = await asyncio.wait_for(stream.__anext__(), remaining)
+                except StopAsyncIteration:
+                    break
+                except asyncio.TimeoutError as e:
+                    raise self._deadline_error(timeout) from e
+                yield chunk
+            success = True
+        except GeneratorExit:
+            # Consumer stopped early (e.g. object complete); not an endpoint failure
+            success = True
+            raise
+        except asyncio.CancelledError:
+            # As in _call_endpoint: a cancelled stream says nothing about the endpoint
+            record = False
+            raise
+        finally:
+            aclose = getattr(stream, "aclose", None) if stream is not None else None
+            if aclose:
+                await aclose()
+            await self.release(endpoint, success, time.monotonic() - start, record=record)
+
+    async def check_endpoint(self, endpoint: LLMEndpoint) -> bool:
+        """Probe an endpoint's health URL, ejecting or readmitting it"""
+        try:
+            async with httpx.AsyncClient(timeout=5.0) as client:
+                response = await client.get(endpoint.url.rstrip("/") + self.health_check_path)
+            healthy = response.status_code == 200
+        except httpx.HTTPError:
+            healthy = False
+
+        if healthy:
+            if endpoint.ejected:
+                print(f"LLM endpoint {endpoint.url} readmitted")
+            endpoint.ejected_until = 0.0
+            endpoint.consecutive_failures = 0
+        elif not endpoint.ejected:
+            self._eject(endpoint)
+        return healthy
+
+    async def run_health_checks(self) -> None:
+        """Check every endpoint periodically"""
+        while True:
+            await asyncio.gather(*(self.check_endpoint(endpoint) for endpoint in self.endpoints))
+            await asyncio.sleep(self.health_check_interval)
+
+    def start(self) -> None:
+        """Start background health checks"""
+        if self._health_task is None or self._health_task.done():
+            self._health_task = asyncio.create_task(self.run_health_checks())
+
+    async def stop(self) -> None:
+        """Stop background health checks"""
+        if self._health_task:
+            self._health_task.cancel()
+            try:
+                await self._health_task
+            except asyncio.CancelledError:
+                pass
+            self._health_task = None
+
+    def get_state(self) -> dict:
+        """Get per-endpoint load and health"""
+        return {
+            "endpoints": [endpoint.get_state() for endpoint in self.endpoints],
+            "healthy_endpoints": sum(1 for endpoint in self.endpoints if not endpoint.ejected),
+            "in_flight": sum(endpoint.in_flight for endpoint in self.endpoints),
+            "call_timeout": self.call_timeout,
+            "hedge_enabled": self.hedge,
+            "limiter": self.limiter.get_state() if self.limiter else None,
+            "shape_limiters": {name: limiter.get_state() for name, limiter in self.shape_limiters.items()},
+            **self.stats
+        }
+
+
+class BoundLLMEndpointPool:
+    """A pool view whose calls carry bound options (and optionally their own limiter), sharing the pool's load state"""
+
+    def __init__(
+        self,
+        pool: LLMEndpointPool,
+        kwargs: Dict[str, Any],
+        limiter: Optional[AdaptiveLimiter] = None
+    ) -> None:
+        self.pool = pool
+        self.kwargs = kwargs
+        self.limiter = limiter
+        self._bound = [endpoint.llm.bind(**kwargs) for endpoint in pool.endpoints] if kwargs else None
+
+    async def ainvoke(self, prompt: Any, call_timeout: Optional[float] = None, **kwargs: Any) -> Any:
+        return await self.pool._ainvoke(self._bound, prompt, call_timeout, self.limiter, **kwargs)
+
+    def astream(self, prompt: Any, call_timeout: Optional[float] = None, **kwargs: Any) -> AsyncIterator[Any]:
+        return self.pool._astream(self._bound, prompt, call_timeout, self.limiter, **kwargs)
+
+    def bind(self, **kwargs: Any) -> "BoundLLMEndpointPool":
+        return BoundLLMEndpointPool(self.pool, {**self.kwargs, **kwargs}, self.limiter)
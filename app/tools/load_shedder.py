@@ -0,0 +1,125 @@
+"""Degradation ladder that sheds optional work as load rises"""
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+from app.tools.health_window import HealthWindow
+
+# In order: each level also keeps every cut made by the levels before it
+DEGRADATION_LEVELS = ("normal", "no_rewrite", "precomputed_rules", "human_review_only")
+
+
+def level_at_least(level: Optional[str], threshold: str) -> bool:
+    """Whether `level` sheds at least as much as `threshold`"""
+    return DEGRADATION_LEVELS.index(level or "normal") >= DEGRADATION_LEVELS.index(threshold)
+
+
+@dataclass(frozen=True)
+class DegradationTrigger:
+    """Load at which a level switches on: either signal is enough"""
+    level: str
+    queue_depth: int
+    p95_seconds: float
+
+
+@dataclass
+class LoadShedderStats:
+    """Level changes and how much work each level shed"""
+    transitions: int = 0
+    rewrites_skipped: int = 0
+    rules_from_cache: int = 0
+    decided_by_table: int = 0
+    shed_to_human_review: int = 0
+    seconds_in_level: Dict[str, float] = field(default_factory=lambda: {name: 0.0 for name in DEGRADATION_LEVELS})
+
+
+class LoadShedder:
+    """
+    Picks the degradation level from admission queue depth and the p95 of
+    end-to-end dispute latency. The level moves one step at a time: up at
+    most every `step_interval` seconds while a higher level's trigger is
+    exceeded, and down only after `recovery_interval` seconds continuously
+    below the current level's trigger, so stages switch off (and back on) one by one
+    instead of the whole workflow flapping.
+    """
+
+    def __init__(
+        self,
+        triggers: List[DegradationTrigger],
+        queue_depth: Callable[[], int],
+        step_interval: float = 10.0,
+        recovery_interval: float = 30.0,
+        latency_window: float = 120.0,
+        enabled: bool = True
+    ) -> None:
+        self.triggers = sorted(triggers, key=lambda t: DEGRADATION_LEVELS.index(t.level))
+        self.queue_depth = queue_depth
+        self.step_interval = step_interval
+        self.recovery_interval = recovery_interval
+        self.enabled = enabled
+        self.latencies = HealthWindow(latency_window)
+        self.stats = LoadShedderStats()
+        self._index = 0
+        self._changed_at = time.monotonic()
+        # When load last fell below the current level's trigger; None while above it
+        self._calm_since: Optional[float] = None
+        self._accounted_at = self._changed_at
+
+    @property
+    def level(self) -> str:
+        return DEGRADATION_LEVELS[self._index]
+
+    def record(self, latency: float, success: bool = True) -> None:
+        """Record one dispute's end-to-end processing time"""
+        self.latencies.record(success, latency)
+
+    def _target(self, depth: int, p95: Optional[float]) -> int:
+        target = 0
+        for trigger in self.triggers:
+            if depth >= trigger.queue_depth or (p95 is not None and p95 >= trigger.p95_seconds):
+                target = DEGRADATION_LEVELS.index(trigger.level)
+        return target
+
+    def evaluate(self) -> str:
+        """Re-check the load signals and step the level; returns the current level"""
+        now = time.monotonic()
+        self.stats.seconds_in_level[self.level] += now - self._accounted_at
+        self._accounted_at = now
+        if not self.enabled:
+            return self.level
+
+        target = self._target(self.queue_depth(), self.latencies.percentile(95))
+        if target >= self._index:
+            self._calm_since = None
+        elif self._calm_since is None:
+            self._calm_since = now
+
+        if target > self._index and now - self._changed_at >= self.step_interval:
+            self._step(1, now)
+        elif self._calm_since is not None and now - self._calm_since >= self.recovery_interval:
+            self._step(-1, now)
+        return self.level
+
+    def _step(self, direction: int, now: float) -> None:
+        previous = self.level
+        self._index += direction
+        self._changed_at = now
+        # The next level down needs its own stretch of calm
+        self._calm_since = None
+        self.stats.transitions += 1
+        print(f"Load shedding: {previous} -> {self.level}")
+
+    def get_state(self) -> Dict[str, Any]:
+        """Get the current level, its load signals and shed counters"""
+        self.evaluate()
+        p95 = self.latencies.percentile(95)
+        stats = asdict(self.stats)
+        stats["seconds_in_level"] = {name: round(s, 1) for name, s in stats["seconds_in_level"].items()}
+        return {
+            "enabled": self.enabled,
+            "level": self.level,
+            "level_index": self._index,
+            "queue_depth": self.queue_depth(),
+            "p95_latency_ms": round(p95 * 1000, 1) if p95 is not None else None,
+            "triggers": [asdict(trigger) for trigger in self.triggers],
+            **stats
+        }
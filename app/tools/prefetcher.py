@@ -0,0 +1,156 @@
+"""Enqueue-time prefetch of transaction history and initial retrieval"""
+import asyncio
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from app.schema.models import RetrievalResult, TransactionData
+from app.tools.concurrency_limiter import AdaptiveLimiter
+from app.tools.deadline import dispute_deadline
+
+
+@dataclass
+class PrefetchEntry:
+    """In-flight or finished prefetches for one dispute"""
+    history: Optional[asyncio.Task] = None
+    retrieval: Optional[asyncio.Task] = None
+    created_at: float = field(default_factory=time.monotonic)
+
+
+@dataclass
+class PrefetchStats:
+    """How often prefetched results were used, and whether they were ready in time"""
+    disputes: int = 0
+    started: int = 0
+    skipped_busy: int = 0
+    used: int = 0
+    ready_when_used: int = 0
+    misses: int = 0
+    failures: int = 0
+    expired: int = 0
+    wait_seconds_total: float = 0.0
+
+
+class Prefetcher:
+    """
+    Starts a dispute's non-LLM I/O as soon as it is accepted.
+    The transaction history fetch and the first-attempt rules retrieval
+    run while the dispute waits for adjudication capacity; the graph
+    nodes then take the parked results instead of calling out again.
+    A prefetch is only started while its downstream's limiter has spare
+    capacity, so it never queues ahead of disputes already being worked.
+    Unused results expire after `ttl_seconds`.
+    """
+
+    def __init__(
+        self,
+        enrichment: Any,
+        retriever: Any,
+        enrichment_limiter: AdaptiveLimiter,
+        retrieval_limiter: AdaptiveLimiter,
+        ttl_seconds: float = 300.0,
+        max_entries: int = 1000
+    ) -> None:
+        self.enrichment = enrichment
+        self.retriever = retriever
+        self.enrichment_limiter = enrichment_limiter
+        self.retrieval_limiter = retrieval_limiter
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.stats = PrefetchStats()
+        self._entries: Dict[str, PrefetchEntry] = {}
+
+    def _start(self, fetch: Callable[[], Awaitable[Any]], deadline: Optional[float]) -> asyncio.Task:
+        async def _run() -> Any:
+            # Prefetch calls honor the dispute deadline like the nodes' own calls
+            dispute_deadline.set(deadline)
+            return await fetch()
+
+        self.stats.started += 1
+        task = asyncio.create_task(_run())
+        # Unused results may never be awaited; don't let their errors warn at shutdown
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        return task
+
+    def prefetch(self, dispute_id: str, payload: Dict[str, Any], deadline: Optional[float] = None) -> None:
+        """Start fetching history and initial rules for an accepted dispute"""
+        self._expire()
+        self.stats.disputes += 1
+        entry = PrefetchEntry()
+        if self.enrichment_limiter.has_spare_capacity:
+            entry.history = self._start(
+                lambda: self.enrichment.fetch_history(payload["customer_id"], years=3), deadline
+            )
+        else:
+            self.stats.skipped_busy += 1
+        if self.retrieval_limiter.has_spare_capacity:
+            entry.retrieval = self._start(
+                lambda: self.retriever.retrieve(self.retriever.initial_query(payload)), deadline
+            )
+        else:
+            self.stats.skipped_busy += 1
+        if entry.history or entry.retrieval:
+            self._entries[dispute_id] = entry
+
+    async def _take(self, dispute_id: str, kind: str) -> Any:
+        entry = self._entries.get(dispute_id)
+        task = getattr(entry, kind) if entry else None
+        if task is None:
+            self.stats.misses += 1
+            return None
+        setattr(entry, kind, None)
+        if entry.history is None and entry.retrieval is None:
+            self._entries.pop(dispute_id, None)
+
+        ready = task.done()
+        start = time.monotonic()
+        try:
+            result = await task
+        except asyncio.CancelledError:
+            if not task.cancelled():
+                raise
+            self.stats.misses += 1
+            return None
+        except Exception as e:
+            self.stats.failures += 1
+            print(f"Prefetched {kind} failed for {dispute_id}, fetching again: {e}")
+            return None
+        self.stats.used += 1
+        self.stats.ready_when_used += ready
+        self.stats.wait_seconds_total += time.monotonic() - start
+        return result
+
+    async def take_history(self, dispute_id: str) -> Optional[List[TransactionData]]:
+        """Prefetched transaction history, waiting for it if still in flight; None if not prefetched"""
+        return await self._take(dispute_id, "history")
+
+    async def take_retrieval(self, dispute_id: str) -> Optional[RetrievalResult]:
+        """Prefetched first-attempt retrieval, waiting for it if still in flight; None if not prefetched"""
+        return await self._take(dispute_id, "retrieval")
+
+    def discard(self, dispute_id: str) -> None:
+        """Drop a dispute's unused prefetches"""
+        entry = self._entries.pop(dispute_id, None)
+        for task in (entry.history, entry.retrieval) if entry else ():
+            if task:
+                task.cancel()
+
+    def _expire(self) -> None:
+        cutoff = time.monotonic() - self.ttl_seconds
+        stale = [dispute_id for dispute_id, entry in self._entries.items() if entry.created_at < cutoff]
+        for dispute_id in stale:
+            self.discard(dispute_id)
+            self.stats.expired += 1
+        # Dicts keep insertion order, so the oldest entries go first
+        while len(self._entries) >= self.max_entries:
+            self.discard(next(iter(self._entries)))
+            self.stats.expired += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get prefetch usage and how much I/O latency it hid"""
+        stats = asdict(self.stats)
+        stats["parked"] = len(self._entries)
+        stats["hidden_rate"] = round(self.stats.ready_when_used / self.stats.used, 4) if self.stats.used else 0.0
+        stats["avg_wait_ms"] = (
+            round(self.stats.wait_seconds_total / self.stats.used * 1000, 1) if self.stats.used else 0.0
+        )
+        return stats
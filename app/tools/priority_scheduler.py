@@ -0,0 +1,210 @@
+"""Earliest-deadline-first admission of disputes into processing"""
+import asyncio
+import heapq
+import itertools
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal, InvalidOperation
+from typing import Any, AsyncIterator, Dict, List, Tuple
+from app.tools.health_window import HealthWindow
+
+# Visa's filing window, as enforced by BankStyleRejectionRules._validate_timing
+FILING_WINDOW_DAYS = 120
+
+# (minimum amount, tier, deadline credit): bigger disputes are treated as due sooner
+AMOUNT_TIERS = (
+    (Decimal("10000"), "high", timedelta(days=14)),
+    (Decimal("1000"), "medium", timedelta(days=5)),
+    (Decimal("0"), "low", timedelta(0))
+)
+
+SLA_CREDITS = {
+    "platinum": timedelta(days=14),
+    "gold": timedelta(days=5),
+    "standard": timedelta(0)
+}
+
+PRIORITY_CLASSES = ("near_deadline", "high_value", "priority_sla", "standard")
+
+
+def _parse_datetime(value: str) -> datetime:
+    if "T" in value or "+" in value or "Z" in value:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    else:
+        parsed = datetime.strptime(value, "%Y-%m-%d")
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def network_deadline(payload: Dict[str, Any]) -> datetime:
+    """End of the filing window: 120 days after the transaction (or the dispute, if undated)"""
+    for key in ("transaction_date", "timestamp"):
+        value = payload.get(key)
+        if value:
+            try:
+                return _parse_datetime(str(value)) + timedelta(days=FILING_WINDOW_DAYS)
+            except ValueError:
+                continue
+    return datetime.now(timezone.utc) + timedelta(days=FILING_WINDOW_DAYS)
+
+
+def amount_tier(payload: Dict[str, Any]) -> Tuple[str, timedelta]:
+    try:
+        amount = Decimal(str(payload.get("amount", 0)))
+    except InvalidOperation:
+        amount = Decimal("0")
+    for minimum, tier, credit in AMOUNT_TIERS:
+        if amount >= minimum:
+            return tier, credit
+    return AMOUNT_TIERS[-1][1], AMOUNT_TIERS[-1][2]
+
+
+@dataclass(order=True)
+class ScheduledDispute:
+    """A dispute waiting for admission, ordered by its aged effective deadline"""
+    key: float
+    seq: int
+    dispute_id: str = field(compare=False)
+    priority_class: str = field(compare=False)
+    enqueued_at: float = field(compare=False)
+    future: asyncio.Future = field(compare=False, repr=False)
+
+
+class PriorityScheduler:
+    """
+    Admits disputes into processing earliest-deadline-first.
+    A dispute's effective deadline is the end of its 120-day filing window,
+    pulled earlier by credits for its amount tier and customer SLA class.
+    Waiting disputes age: each second waited moves the deadline
+    `aging_rate` seconds earlier, and any dispute waiting longer than
+    `max_wait` is admitted next regardless, so nothing starves.
+    """
+
+    def __init__(
+        self,
+        max_active: int = 32,
+        aging_rate: float = 1440.0,
+        max_wait: float = 300.0,
+        near_deadline_days: float = 7.0
+    ) -> None:
+        self.max_active = max_active
+        self.aging_rate = aging_rate
+        self.max_wait = max_wait
+        self.near_deadline = timedelta(days=near_deadline_days)
+        self.active = 0
+        self.admitted = 0
+        self.starvation_promotions = 0
+        self._heap: List[ScheduledDispute] = []
+        self._arrivals: "OrderedDict[int, ScheduledDispute]" = OrderedDict()
+        self._seq = itertools.count()
+        self._waits: Dict[str, HealthWindow] = {name: HealthWindow(300.0) for name in PRIORITY_CLASSES}
+
+    @property
+    def waiting(self) -> int:
+        return len(self._arrivals)
+
+    def priority(self, payload: Dict[str, Any]) -> Tuple[float, str]:
+        """Effective deadline (epoch seconds) and priority class of a dispute"""
+        deadline = network_deadline(payload)
+        tier, amount_credit = amount_tier(payload)
+        sla = str(payload.get("sla_class") or "standard").lower()
+        effective = deadline - amount_credit - SLA_CREDITS.get(sla, timedelta(0))
+
+        if deadline - datetime.now(timezone.utc) <= self.near_deadline:
+            priority_class = "near_deadline"
+        elif tier == "high":
+            priority_class = "high_value"
+        elif SLA_CREDITS.get(sla):
+            priority_class = "priority_sla"
+        else:
+            priority_class = "standard"
+        return effective.timestamp(), priority_class
+
+    async def acquire(self, dispute_id: str, payload: Dict[str, Any]) -> str:
+        """Wait for an admission slot in priority order; returns the dispute's priority class"""
+        effective, priority_class = self.priority(payload)
+        if self.active < self.max_active and not self._arrivals:
+            self.active += 1
+            self._admitted(priority_class, 0.0)
+            return priority_class
+
+        now = time.time()
+        item = ScheduledDispute(
+            # Aging: the common -aging_rate * now term drops out of the comparison
+            key=effective + self.aging_rate * now,
+            seq=next(self._seq),
+            dispute_id=dispute_id,
+            priority_class=priority_class,
+            enqueued_at=now,
+            future=asyncio.get_running_loop().create_future()
+        )
+        heapq.heappush(self._heap, item)
+        self._arrivals[item.seq] = item
+        try:
+            await item.future
+        except asyncio.CancelledError:
+            if item.future.done() and not item.future.cancelled():
+                self.release()
+            self._arrivals.pop(item.seq, None)
+            raise
+        return priority_class
+
+    def release(self) -> None:
+        """Free a slot and admit the next waiting dispute"""
+        self.active -= 1
+        while self._arrivals and self.active < self.max_active:
+            item = self._next()
+            if item.future.done():
+                # Cancelled, but its waiter has not yet run to leave the queue
+                continue
+            self.active += 1
+            self._admitted(item.priority_class, time.time() - item.enqueued_at)
+            item.future.set_result(None)
+        if not self._arrivals:
+            self._heap.clear()
+
+    def _next(self) -> ScheduledDispute:
+        oldest = next(iter(self._arrivals.values()))
+        if time.time() - oldest.enqueued_at >= self.max_wait:
+            self.starvation_promotions += 1
+            return self._arrivals.pop(oldest.seq)
+        # Entries already admitted via starvation promotion are skipped lazily
+        while True:
+            item = heapq.heappop(self._heap)
+            if self._arrivals.pop(item.seq, None) is not None:
+                return item
+
+    def _admitted(self, priority_class: str, waited: float) -> None:
+        self.admitted += 1
+        self._waits[priority_class].record(True, waited)
+
+    @asynccontextmanager
+    async def slot(self, dispute_id: str, payload: Dict[str, Any]) -> AsyncIterator[str]:
+        """Hold an admission slot while a dispute is processed"""
+        priority_class = await self.acquire(dispute_id, payload)
+        try:
+            yield priority_class
+        finally:
+            self.release()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get admission counters and queue latency per priority class"""
+        waiting: Dict[str, int] = {name: 0 for name in PRIORITY_CLASSES}
+        for item in self._arrivals.values():
+            waiting[item.priority_class] += 1
+        return {
+            "max_active": self.max_active,
+            "active": self.active,
+            "waiting": len(self._arrivals),
+            "admitted": self.admitted,
+            "starvation_promotions": self.starvation_promotions,
+            "classes": {
+                name: {"waiting": waiting[name], **{
+                    key.replace("latency", "queue_wait"): value
+                    for key, value in self._waits[name].get_stats().items()
+                }}
+                for name in PRIORITY_CLASSES
+            }
+        }
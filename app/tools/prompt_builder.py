@@ -0,0 +1,158 @@
+"""Compact, token-budgeted rules context for adjudication prompts"""
+import math
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Set, Tuple
+
+# Rough characters-per-token ratio for English text on Llama/GPT tokenizers;
+# avoids pulling in a tokenizer just to track prefill size
+CHARS_PER_TOKEN = 4
+
+# Sentence ends, blank lines and bullet starts; single newlines are PDF line wraps
+_SENTENCE_SPLIT = re.compile(r"(?<=[.!?;])\s+|\n\s*\n|\n(?=[l•–-]\s)")
+_WORD = re.compile(r"[a-z0-9]+(?:\.[0-9]+)?")
+_STOPWORDS = {
+    "the", "and", "for", "with", "that", "this", "from", "was", "were", "are", "has", "have",
+    "not", "but", "its", "their", "they", "been", "any", "all", "must", "may", "visa", "dispute",
+    "customer", "claims", "amount"
+}
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate token count of a prompt fragment"""
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def split_sentences(text: str, max_chars: int = 300) -> List[str]:
+    """
+    Split rule text into whitespace-normalized sentences.
+    Extracted PDF text often runs on without punctuation, so sentences
+    longer than `max_chars` are further split at word boundaries.
+    """
+    sentences: List[str] = []
+    for part in _SENTENCE_SPLIT.split(text):
+        words = part.split()
+        piece: List[str] = []
+        length = 0
+        for word in words:
+            if piece and length + len(word) + 1 > max_chars:
+                sentences.append(" ".join(piece))
+                piece, length = [], 0
+            piece.append(word)
+            length += len(word) + 1
+        if piece:
+            sentences.append(" ".join(piece))
+    return sentences
+
+
+def _terms(text: str) -> Set[str]:
+    return {word for word in _WORD.findall(text.lower()) if len(word) > 2 and word not in _STOPWORDS}
+
+
+def _shingles(sentence: str, size: int = 5) -> Set[Tuple[str, ...]]:
+    words = _WORD.findall(sentence.lower())
+    if len(words) < size:
+        return {tuple(words)} if words else set()
+    return {tuple(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+@dataclass
+class RulesContext:
+    """A compacted rules context and what was kept to build it"""
+    text: str
+    tokens: int
+    rules_used: int
+    sentences_kept: int
+    sentences_deduped: int
+    sentences_trimmed: int
+
+    def get_stats(self) -> Dict[str, int]:
+        return {
+            "rules_context_tokens": self.tokens,
+            "rules_used": self.rules_used,
+            "sentences_kept": self.sentences_kept,
+            "sentences_deduped": self.sentences_deduped,
+            "sentences_trimmed": self.sentences_trimmed
+        }
+
+
+class RulesContextBuilder:
+    """
+    Builds the "Relevant Visa Rules" section of the adjudication prompt.
+    Retrieved chunks overlap, so sentences mostly covered by text already
+    included from an earlier rule are dropped. Each rule is trimmed to the sentences sharing the most
+    terms with the dispute, kept in their original order, and rules are
+    added in retrieval order until the token budget is spent.
+    """
+
+    def __init__(
+        self,
+        token_budget: int = 1500,
+        max_sentences_per_rule: int = 4,
+        min_sentence_chars: int = 20,
+        duplicate_overlap: float = 0.8
+    ) -> None:
+        self.token_budget = token_budget
+        self.max_sentences_per_rule = max_sentences_per_rule
+        self.min_sentence_chars = min_sentence_chars
+        self.duplicate_overlap = duplicate_overlap
+
+    def _select(self, sentences: List[str], query_terms: Set[str]) -> List[str]:
+        if len(sentences) <= self.max_sentences_per_rule:
+            return sentences
+        scored = sorted(
+            range(len(sentences)),
+            key=lambda i: (-len(query_terms & _terms(sentences[i])), i)
+        )
+        keep = sorted(scored[:self.max_sentences_per_rule])
+        return [sentences[i] for i in keep]
+
+    def build(self, rules: Iterable[Dict[str, Any]], query: str) -> RulesContext:
+        """Compact retrieved rules (dicts with `content`) against the dispute query"""
+        query_terms = _terms(query)
+        seen: Set[Tuple[str, ...]] = set()
+        sections: List[str] = []
+        tokens = kept = deduped = trimmed = 0
+
+        for rule in rules:
+            sentences = []
+            for sentence in split_sentences(rule.get("content", "")):
+                shingles = _shingles(sentence)
+                if len(sentence) < self.min_sentence_chars or not shingles:
+                    trimmed += 1
+                # Chunk overlaps cut sentences mid-word, so compare word 5-grams, not exact text
+                elif len(shingles & seen) >= self.duplicate_overlap * len(shingles):
+                    deduped += 1
+                else:
+                    seen |= shingles
+                    sentences.append(sentence)
+
+            selected = self._select(sentences, query_terms)
+            trimmed += len(sentences) - len(selected)
+
+            # Fit as much of the rule as the remaining budget allows
+            header = f"Rule {len(sections) + 1}: "
+            body: List[str] = []
+            section_tokens = estimate_tokens(header)
+            for sentence in selected:
+                sentence_tokens = estimate_tokens(sentence) + 1
+                if tokens + section_tokens + sentence_tokens > self.token_budget:
+                    trimmed += 1
+                    continue
+                body.append(sentence)
+                section_tokens += sentence_tokens
+
+            if body:
+                sections.append(header + " ".join(body))
+                tokens += section_tokens
+                kept += len(body)
+
+        text = "\n\n".join(sections)
+        return RulesContext(
+            text=text,
+            tokens=estimate_tokens(text),
+            rules_used=len(sections),
+            sentences_kept=kept,
+            sentences_deduped=deduped,
+            sentences_trimmed=trimmed
+        )
@@ -1,6 +1,8 @@
 """RAG retriever tool with self-reflective query rewriting"""
-from typing import List, Union
+import asyncio
+from typing import Dict, List, Optional, Union
 from app.db.vector_store import get_vector_store
+from app.tools.concurrency_limiter import chroma_limiter
 from app.schema.models import Document, RetrievalResult
 
 
@@ -10,6 +12,16 @@ class RAGRetriever:
     def __init__(self, llm, similarity_threshold: float = 0.7) -> None:
         self.llm = llm
         self.similarity_threshold = similarity_threshold
+        # Last good retrieval per reason code, served when retrieval is shed under load
+        self._rules_by_reason_code: Dict[str, RetrievalResult] = {}
+    
+    @staticmethod
+    def initial_query(payload: dict) -> str:
+        """First-attempt retrieval query for a dispute"""
+        return (
+            f"Visa dispute reason code {payload.get('reason_code', '')}: "
+            f"{payload.get('description', '')}. Amount: {payload.get('amount', '')}"
+        )
     
     async def retrieve(
         self,
@@ -18,7 +30,10 @@ class RAGRetriever:
     ) -> RetrievalResult:
         """Retrieve relevant documents with similarity scores"""
         vector_store = get_vector_store()
-        documents, metadatas, similarity_scores = vector_store.query(query, top_k)
+        # Off the event loop, so a node timeout can abandon a slow query
+        documents, metadatas, similarity_scores = await chroma_limiter.call(
+            asyncio.to_thread, vector_store.query, query, top_k
+        )
         
         doc_objects = [
             Document(
@@ -76,6 +91,15 @@ Provide only the rewritten query, no explanation."""
         response = await self.llm.ainvoke(prompt)
         return response.content.strip()
     
+    def remember_rules(self, reason_code: str, result: RetrievalResult) -> None:
+        """Keep a good-quality retrieval as the precomputed rules for its reason code"""
+        if reason_code and self.evaluate_retrieval_quality(result):
+            self._rules_by_reason_code[reason_code] = result
+    
+    def precomputed_rules(self, reason_code: str) -> Optional[RetrievalResult]:
+        """Last good retrieval for a reason code, if any"""
+        return self._rules_by_reason_code.get(reason_code)
+    
     def evaluate_retrieval_quality(self, result: RetrievalResult) -> bool:
         """Determine if retrieval quality is sufficient"""
         return result.average_similarity >= self.similarity_threshold
@@ -85,13 +109,17 @@ Provide only the rewritten query, no explanation."""
         initial_query: str,
         dispute_context: dict,
         max_attempts: int = 3,
-        top_k: int = 5
+        top_k: int = 5,
+        first_result: Optional[RetrievalResult] = None
     ) -> tuple[RetrievalResult, int]:
-        """Retrieve with automatic query rewriting if quality is low"""
+        """Retrieve with automatic query rewriting if quality is low (reusing a prefetched first attempt)"""
         query = initial_query
         
         for attempt in range(max_attempts):
-            result = await self.retrieve(query, top_k)
+            if attempt == 0 and first_result is not None:
+                result = first_result
+            else:
+                result = await self.retrieve(query, top_k)
             
             if self.evaluate_retrieval_quality(result):
                 return result, attempt + 1
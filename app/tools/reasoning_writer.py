@@ -0,0 +1,170 @@
+"""Deferred reasoning generation for decision-first adjudication"""
+import asyncio
+import contextvars
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Optional, Set
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
+from app.db.audit_logger import audit_logger
+from app.db.email_outbox import attach_reasoning
+from app.db.human_review import update_review_reasoning
+from app.tools.adjudicator import DEFERRED_REASONING, Adjudicator
+from app.tools.deadline import dispute_deadline
+
+REASONING_SYSTEM_PROMPT = """You are a Visa dispute adjudication specialist. A decision has already been made on the dispute in the user message.
+
+Write the explanation of that decision for the customer and the audit record:
+- 3 to 6 sentences in plain language
+- Reference the Visa rules that support the decision
+- Do not change or second-guess the decision
+
+Respond with the explanation text only, no JSON and no headings."""
+
+MIN_REASONING_CHARS = 20
+
+
+@dataclass
+class ReasoningJob:
+    """Everything needed to explain a verdict after the graph has moved on"""
+    dispute_id: str
+    payload: Dict[str, Any]
+    rules_context: str
+    fraud_context: str
+    decision: Dict[str, Any]
+    prepared_at: float = field(default_factory=time.monotonic)
+
+
+@dataclass
+class ReasoningStats:
+    """Counters for deferred reasoning generation"""
+    prepared: int = 0
+    started: int = 0
+    completed: int = 0
+    failed: int = 0
+    emails_released: int = 0
+    generation_seconds_total: float = 0.0
+
+
+class ReasoningWriter:
+    """
+    Generates decision reasoning in the background.
+    adjudication_node prepares a job alongside the verdict; the terminal node
+    starts it once the outbox email and review-queue entry exist, so the
+    reasoning can replace DEFERRED_REASONING in both. A failed generation
+    still releases held emails, which then go out with the placeholder.
+    Generation runs outside the dispute's deadline, within its own
+    `reasoning_timeout` budget.
+    """
+
+    def __init__(
+        self,
+        llm: Any,
+        max_concurrency: int = 4,
+        max_prepared: int = 10000,
+        reasoning_timeout: float = 120.0
+    ) -> None:
+        self.llm = llm
+        self.max_concurrency = max_concurrency
+        self.max_prepared = max_prepared
+        self.reasoning_timeout = reasoning_timeout
+        self.stats = ReasoningStats()
+        self._prepared: Dict[str, ReasoningJob] = {}
+        self._running: Set[asyncio.Task] = set()
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    def prepare(
+        self,
+        dispute_id: str,
+        payload: Dict[str, Any],
+        rules_context: str,
+        fraud_context: str,
+        decision: Dict[str, Any]
+    ) -> None:
+        """Stash the context needed to explain a verdict"""
+        if len(self._prepared) >= self.max_prepared:
+            # Drop the oldest job; its held emails are released by the outbox hold timeout
+            self._prepared.pop(next(iter(self._prepared)))
+        self._prepared[dispute_id] = ReasoningJob(dispute_id, payload, rules_context, fraud_context, decision)
+        self.stats.prepared += 1
+
+    def is_pending(self, dispute_id: str) -> bool:
+        """Whether a dispute's reasoning is still to be written (its emails should be held)"""
+        return dispute_id in self._prepared
+
+    def start(self, dispute_id: str) -> bool:
+        """Begin generating reasoning for a prepared dispute"""
+        job = self._prepared.pop(dispute_id, None)
+        if job is None:
+            return False
+        self.stats.started += 1
+        # A fresh context: the terminal node's dispute deadline must not cut reasoning short
+        task = asyncio.create_task(self._write(job), context=contextvars.Context())
+        self._running.add(task)
+        task.add_done_callback(self._running.discard)
+        return True
+
+    def build_prompt(self, job: ReasoningJob) -> List[BaseMessage]:
+        """Static instructions first, then the dispute and its verdict"""
+        decision = job.decision
+        verdict = f"""Decision: {decision['decision']}
+Confidence: {decision['confidence_score']:.2f}
+Supporting Rules: {', '.join(decision.get('supporting_rules', [])) or 'None cited'}
+Recommended Action: {decision.get('recommended_action', '')}"""
+        return [
+            SystemMessage(content=REASONING_SYSTEM_PROMPT),
+            HumanMessage(content=(
+                Adjudicator.dispute_section(job.dispute_id, job.payload, job.rules_context, job.fraud_context)
+                + "\n\n" + verdict
+            ))
+        ]
+
+    async def _write(self, job: ReasoningJob) -> None:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async with self._semaphore:
+            start = time.monotonic()
+            reasoning = DEFERRED_REASONING
+            dispute_deadline.set(time.time() + self.reasoning_timeout)
+            try:
+                response = await self.llm.ainvoke(self.build_prompt(job))
+                text = response.content.strip()
+                if len(text) < MIN_REASONING_CHARS:
+                    raise ValueError(f"Reasoning too short ({len(text)} characters)")
+                reasoning = text
+                elapsed = time.monotonic() - start
+                await audit_logger.log_reasoning(job.dispute_id, reasoning, elapsed)
+                await update_review_reasoning(job.dispute_id, reasoning)
+                self.stats.completed += 1
+                self.stats.generation_seconds_total += elapsed
+            except Exception as e:
+                self.stats.failed += 1
+                try:
+                    await audit_logger.log_error(
+                        job.dispute_id, "adjudication_node", f"Deferred reasoning failed: {e}"
+                    )
+                except Exception:
+                    pass
+            finally:
+                try:
+                    self.stats.emails_released += await attach_reasoning(
+                        job.dispute_id, DEFERRED_REASONING, reasoning
+                    )
+                except Exception as e:
+                    print(f"Failed to release held emails for {job.dispute_id}: {e}")
+
+    async def stop(self, timeout: float = 30.0) -> None:
+        """Give in-flight reasoning a chance to finish on shutdown"""
+        if self._running:
+            await asyncio.wait(set(self._running), timeout=timeout)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get deferred reasoning counters"""
+        stats = asdict(self.stats)
+        stats["in_flight"] = len(self._running)
+        stats["prepared_waiting"] = len(self._prepared)
+        stats["avg_generation_ms"] = (
+            round(self.stats.generation_seconds_total / self.stats.completed * 1000, 1)
+            if self.stats.completed else 0.0
+        )
+        return stats
@@ -1,11 +1,15 @@
 """Alternative email service using SendGrid (more reliable than Gmail SMTP)"""
+import asyncio
 import os
-from typing import Dict, Any
+from typing import Dict, Any, List
+from app.tools.email_templates import RenderedEmail, email_renderer
 
 # SendGrid is optional - only import if available
 try:
     from sendgrid import SendGridAPIClient
-    from sendgrid.helpers.mail import Mail, Email, To, Content
+    from sendgrid.helpers.mail import (
+        Mail, Email, To, Content, Personalization, Subject, Substitution
+    )
     SENDGRID_AVAILABLE = True
 except ImportError:
     SENDGRID_AVAILABLE = False
@@ -19,7 +23,7 @@ class SendGridEmailService:
         self.sender_email = os.getenv("SMTP_EMAIL", "noreply@dispute-system.com")
         self.enabled = SENDGRID_AVAILABLE and bool(self.api_key)
         
-    def send_dispute_decision(
+    async def send_dispute_decision(
         self,
         to_email: str,
         dispute_id: str,
@@ -29,7 +33,19 @@ class SendGridEmailService:
         amount: float,
         currency: str = "INR"
     ) -> Dict[str, Any]:
-        """Send dispute decision email via SendGrid"""
+        """Render and send dispute decision email via SendGrid"""
+        rendered = email_renderer.render(
+            dispute_id=dispute_id,
+            customer_name=customer_name,
+            decision=decision,
+            reasoning=reasoning,
+            amount=amount,
+            currency=currency
+        )
+        return await self.send_rendered(to_email, rendered)
+    
+    async def send_rendered(self, to_email: str, rendered: RenderedEmail) -> Dict[str, Any]:
+        """Send an already rendered email via SendGrid"""
         
         if not self.enabled:
             return {
@@ -38,75 +54,18 @@ class SendGridEmailService:
             }
         
         try:
-            # Create HTML email body
-            html_body = f"""
-            <!DOCTYPE html>
-            <html>
-            <head>
-                <style>
-                    body {{ font-family: Arial, sans-serif; line-height: 1.6; color: #333; }}
-                    .container {{ max-width: 600px; margin: 0 auto; padding: 20px; }}
-                    .header {{ background: #1a1f36; color: white; padding: 20px; text-align: center; }}
-                    .content {{ background: #f9f9f9; padding: 20px; border: 1px solid #ddd; }}
-                    .detail {{ margin: 10px 0; padding: 10px; background: white; border-left: 3px solid #0066cc; }}
-                    .footer {{ text-align: center; padding: 20px; color: #666; font-size: 12px; }}
-                    .decision-box {{ padding: 15px; margin: 15px 0; border-radius: 5px; }}
-                    .approved {{ background: #d4edda; border: 2px solid #28a745; color: #155724; }}
-                    .rejected {{ background: #f8d7da; border: 2px solid #dc3545; color: #721c24; }}
-                    .review {{ background: #fff3cd; border: 2px solid #ffc107; color: #856404; }}
-                </style>
-            </head>
-            <body>
-                <div class="container">
-                    <div class="header">
-                        <h1>Dispute Resolution System</h1>
-                        <p>Automated Decision Notification</p>
-                    </div>
-                    
-                    <div class="content">
-                        <p>Dear {customer_name},</p>
-                        
-                        <p>Your dispute has been processed. Please find the details below:</p>
-                        
-                        <div class="detail">
-                            <strong>Dispute ID:</strong> {dispute_id}
-                        </div>
-                        
-                        <div class="detail">
-                            <strong>Amount:</strong> {currency} {amount:,.2f}
-                        </div>
-                        
-                        <div class="decision-box {'approved' if decision.lower() == 'accept' else 'rejected' if decision.lower() == 'reject' else 'review'}">
-                            <h3>Decision: {decision.upper()}</h3>
-                            <p><strong>Reasoning:</strong></p>
-                            <p>{reasoning}</p>
-                        </div>
-                        
-                        <p>If you have any questions or concerns, please contact our support team.</p>
-                        
-                        <p>Thank you for using our dispute resolution system.</p>
-                    </div>
-                    
-                    <div class="footer">
-                        <p>This is an automated email. Please do not reply.</p>
-                        <p>&copy; 2024 Dispute Resolution System. All rights reserved.</p>
-                    </div>
-                </div>
-            </body>
-            </html>
-            """
-            
             # Create SendGrid message
             message = Mail(
                 from_email=Email(self.sender_email, "Dispute Resolution System"),
                 to_emails=To(to_email),
-                subject=f"Dispute Resolution - {dispute_id}",
-                html_content=Content("text/html", html_body)
+                subject=rendered.subject,
+                plain_text_content=Content("text/plain", rendered.text),
+                html_content=Content("text/html", rendered.html)
             )
             
-            # Send email
+            # Send email (blocking HTTP client, so keep it off the event loop)
             sg = SendGridAPIClient(self.api_key)
-            response = sg.send(message)
+            response = await asyncio.to_thread(sg.send, message)
             
             return {
                 "success": True,
@@ -119,6 +78,53 @@ class SendGridEmailService:
                 "success": False,
                 "error": str(e)
             }
+    
+    async def send_batch(self, messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Send many decision emails with one API request per template.
+        Each recipient is a personalization; per-message fields are filled in
+        through substitution tags in the template's shared HTML body.
+        """
+        if not self.enabled:
+            return [
+                {"success": False, "error": "SendGrid not configured or not available"}
+                for _ in messages
+            ]
+        
+        results: List[Dict[str, Any]] = [{} for _ in messages]
+        sg = SendGridAPIClient(self.api_key)
+        
+        for group in email_renderer.render_bulk(messages):
+            # SendGrid allows at most 1000 personalizations per request
+            for chunk_start in range(0, len(group.indices), 1000):
+                chunk = range(chunk_start, min(chunk_start + 1000, len(group.indices)))
+                try:
+                    mail = Mail(
+                        from_email=Email(self.sender_email, "Dispute Resolution System"),
+                        html_content=Content("text/html", group.template.html)
+                    )
+                    for j in chunk:
+                        message = messages[group.indices[j]]
+                        personalization = Personalization()
+                        personalization.add_to(To(message["to_email"]))
+                        personalization.subject = Subject(f"Dispute Resolution - {message['dispute_id']}")
+                        for tag, value in group.substitutions[j].items():
+                            personalization.add_substitution(Substitution(tag, value))
+                        mail.add_personalization(personalization)
+                    
+                    response = await asyncio.to_thread(sg.send, mail)
+                    result = {
+                        "success": True,
+                        "message": f"Email sent via SendGrid batch of {len(chunk)}",
+                        "status_code": response.status_code
+                    }
+                except Exception as e:
+                    result = {"success": False, "error": str(e)}
+                
+                for j in chunk:
+                    results[group.indices[j]] = dict(result)
+        
+        return results
 
 
 # Global instance
@@ -0,0 +1,151 @@
+"""Shared pool of authenticated SMTP connections for async callers"""
+import asyncio
+import smtplib
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from email.message import Message
+from typing import Any, Callable, Deque, Dict, Tuple
+
+
+# Errors after which a connection can no longer be trusted
+CONNECTION_ERRORS = (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError, OSError)
+
+
+class SMTPConnectionPool:
+    """
+    Keeps authenticated SMTP connections alive between sends.
+    smtplib is blocking, so every network operation runs on a dedicated
+    thread pool sized to the connection cap; the event loop never waits on
+    SMTP I/O. A semaphore caps concurrent sends against the provider.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        username: str,
+        password: str,
+        max_connections: int = 4,
+        idle_timeout: float = 240.0,
+        timeout: float = 30.0
+    ) -> None:
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.max_connections = max_connections
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+        self._idle: Deque[Tuple[smtplib.SMTP, float]] = deque()
+        self._semaphore = asyncio.Semaphore(max_connections)
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_connections,
+            thread_name_prefix=f"smtp-{host}"
+        )
+        self.stats = {"connections_opened": 0, "reconnects": 0, "messages_sent": 0}
+
+    async def _run(self, func: Callable, *args: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, func, *args)
+
+    def _connect(self) -> smtplib.SMTP:
+        """Open, secure and authenticate a new connection (blocking)"""
+        conn = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            conn.starttls()
+            conn.login(self.username, self.password)
+        except Exception:
+            self._close(conn)
+            raise
+        self.stats["connections_opened"] += 1
+        return conn
+
+    @staticmethod
+    def _close(conn: smtplib.SMTP) -> None:
+        """Close a connection, ignoring errors from dead sockets (blocking)"""
+        try:
+            conn.quit()
+        except Exception:
+            conn.close()
+
+    async def _acquire(self) -> smtplib.SMTP:
+        """Reuse an idle connection or open a new one"""
+        while self._idle:
+            conn, last_used = self._idle.pop()
+            if time.monotonic() - last_used < self.idle_timeout:
+                return conn
+            # Server has likely dropped it already
+            await self._run(self._close, conn)
+        return await self._run(self._connect)
+
+    def _release(self, conn: smtplib.SMTP) -> None:
+        self._idle.append((conn, time.monotonic()))
+
+    async def send_message(self, message: Message) -> None:
+        """Send a message over a pooled connection, reconnecting once if it was dropped"""
+        async with self._semaphore:
+            conn = await self._acquire()
+            try:
+                await self._run(conn.send_message, message)
+            except CONNECTION_ERRORS:
+                await self._run(self._close, conn)
+                self.stats["reconnects"] += 1
+                conn = await self._run(self._connect)
+                try:
+                    await self._run(conn.send_message, message)
+                except CONNECTION_ERRORS:
+                    await self._run(self._close, conn)
+                    raise
+            except smtplib.SMTPResponseException:
+                # Server rejected this message but the session is still usable
+                self._release(conn)
+                raise
+            except Exception:
+                await self._run(self._close, conn)
+                raise
+
+            self._release(conn)
+            self.stats["messages_sent"] += 1
+
+    async def close(self) -> None:
+        """Close all idle connections"""
+        while self._idle:
+            conn, _ = self._idle.pop()
+            await self._run(self._close, conn)
+
+    def get_state(self) -> dict:
+        """Get current pool state"""
+        return {
+            "host": self.host,
+            "max_connections": self.max_connections,
+            "idle_connections": len(self._idle),
+            "stats": dict(self.stats)
+        }
+
+
+# Pools are shared per provider account so concurrency caps hold process-wide
+_pools: Dict[Tuple[str, int, str], SMTPConnectionPool] = {}
+
+
+def get_smtp_pool(
+    host: str,
+    port: int,
+    username: str,
+    password: str,
+    max_connections: int = 4
+) -> SMTPConnectionPool:
+    """Get or create the shared pool for an SMTP account"""
+    key = (host, port, username)
+    pool = _pools.get(key)
+    if pool is None:
+        pool = _pools[key] = SMTPConnectionPool(
+            host, port, username, password, max_connections=max_connections
+        )
+    return pool
+
+
+async def close_all_pools() -> None:
+    """Close every shared SMTP pool"""
+    for pool in _pools.values():
+        await pool.close()
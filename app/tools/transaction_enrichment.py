@@ -5,6 +5,7 @@ from decimal import Decimal
 from typing import List
 import httpx
 from app.schema.models import TransactionData, FraudAnalysis
+from app.tools.deadline import deadline_timeout, remaining
 
 
 class RetriableError(Exception):
@@ -28,12 +29,13 @@ class TransactionEnrichment:
     ) -> List[TransactionData]:
         """Fetch customer transaction history with retry logic and circuit breaker"""
         from app.tools.circuit_breaker import enrichment_circuit_breaker
+        from app.tools.concurrency_limiter import enrichment_limiter
         
         end_date = datetime.utcnow()
         start_date = end_date - timedelta(days=years * 365)
         
         async def _fetch() -> List[TransactionData]:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
+            async with httpx.AsyncClient(timeout=deadline_timeout(self.timeout)) as client:
                 try:
                     response = await client.get(
                         f"{self.api_url}/transactions",
@@ -58,7 +60,7 @@ class TransactionEnrichment:
         # Use circuit breaker for external API call
         try:
             return await enrichment_circuit_breaker.call(
-                self._retry_with_backoff, _fetch
+                self._retry_with_backoff, lambda: enrichment_limiter.call(_fetch)
             )
         except Exception as e:
             # If circuit breaker is open, return empty list to allow processing to continue
@@ -74,6 +76,10 @@ class TransactionEnrichment:
                 if attempt == self.max_retries - 1:
                     raise
                 delay = self.base_delay * (2 ** attempt)
+                # Don't start a retry the dispute deadline leaves no time for
+                left = remaining()
+                if left is not None and left <= delay:
+                    raise
                 await asyncio.sleep(delay)
         
         raise RuntimeError("Max retries exceeded")
@@ -1,14 +1,42 @@
-"""Unified email service that tries multiple providers for reliability"""
-from typing import Dict, Any
-import os
+"""Unified email service that routes across multiple providers for reliability"""
+import asyncio
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from app.config.settings import settings
+from app.tools.circuit_breaker import (
+    CircuitBreaker,
+    CircuitBreakerConfig,
+    CircuitBreakerError,
+    CircuitState,
+    circuit_breaker_sync
+)
+from app.tools.health_window import HealthWindow
+from app.tools.email_templates import RenderedEmail, email_renderer
+
+
+class ProviderSendError(Exception):
+    """Raised when a provider reports a failed send"""
+    pass
 
 
 class UnifiedEmailService:
-    """Try multiple email providers for maximum reliability"""
-    
+    """
+    Route emails across providers by recent health.
+    Each provider has a circuit breaker and a sliding window of outcomes;
+    providers are tried healthiest-first instead of in a fixed order.
+    """
+
+    # Samples needed before a provider's window is trusted for ranking
+    MIN_SAMPLES = 5
+
     def __init__(self):
         self.providers = []
-        
+        self.hedge_enabled = settings.email_hedge_enabled
+        self.provider_timeout = settings.email_provider_timeout
+        self._health: Dict[str, HealthWindow] = {}
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._hedges = {"started": 0, "won": 0}
+
         # Try SendGrid first (most reliable)
         try:
             from app.tools.sendgrid_service import sendgrid_service
@@ -16,7 +44,7 @@ class UnifiedEmailService:
                 self.providers.append(("SendGrid", sendgrid_service))
         except:
             pass
-        
+
         # Fallback to Gmail SMTP
         try:
             from app.tools.email_service import email_service
@@ -24,8 +52,113 @@ class UnifiedEmailService:
                 self.providers.append(("Gmail SMTP", email_service))
         except:
             pass
-    
-    def send_dispute_decision(
+
+    def _health_for(self, provider_name: str) -> HealthWindow:
+        if provider_name not in self._health:
+            self._health[provider_name] = HealthWindow(settings.email_health_window)
+        return self._health[provider_name]
+
+    def _breaker_for(self, provider_name: str) -> CircuitBreaker:
+        if provider_name not in self._breakers:
+            self._breakers[provider_name] = CircuitBreaker(
+                f"email_{provider_name.lower().replace(' ', '_')}",
+                CircuitBreakerConfig(failure_threshold=3, timeout=30)
+            )
+            circuit_breaker_sync.add(self._breakers[provider_name])
+        return self._breakers[provider_name]
+
+    def _score(self, provider_name: str) -> float:
+        """Expected cost of a send: p95 latency inflated by the failure rate"""
+        health = self._health_for(provider_name)
+        if health.sample_count < self.MIN_SAMPLES:
+            # Not enough data yet; keep configured order
+            return 0.0
+        p95 = health.percentile(95) or 0.0
+        return p95 / max(health.success_rate(), 0.01)
+
+    def ranked_providers(self) -> List[Tuple[str, Any]]:
+        """Providers ordered by health; open circuits go last"""
+        indexed = list(enumerate(self.providers))
+        indexed.sort(key=lambda item: (
+            self._breaker_for(item[1][0]).state == CircuitState.OPEN,
+            self._score(item[1][0]),
+            item[0]
+        ))
+        return [provider for _, provider in indexed]
+
+    async def _send_via(
+        self,
+        provider_name: str,
+        provider: Any,
+        message: Dict[str, Any],
+        rendered: Optional[RenderedEmail] = None
+    ) -> Dict[str, Any]:
+        """Send through one provider with its breaker, timeout and health tracking"""
+        health = self._health_for(provider_name)
+
+        async def _send() -> Dict[str, Any]:
+            if rendered is not None and hasattr(provider, "send_rendered"):
+                send = provider.send_rendered(message["to_email"], rendered)
+            else:
+                send = provider.send_dispute_decision(**message)
+            result = await asyncio.wait_for(send, timeout=self.provider_timeout)
+            if not result.get('success'):
+                raise ProviderSendError(result.get('error', 'Unknown error'))
+            return result
+
+        start = time.perf_counter()
+        try:
+            result = await self._breaker_for(provider_name).call(_send)
+        except CircuitBreakerError:
+            # Rejected without calling the provider; not a health sample
+            raise
+        except Exception:
+            health.record(False, time.perf_counter() - start)
+            raise
+        health.record(True, time.perf_counter() - start)
+        result["provider"] = provider_name
+        return result
+
+    async def _send_hedged(
+        self,
+        primary: Tuple[str, Any],
+        secondary: Tuple[str, Any],
+        message: Dict[str, Any],
+        rendered: RenderedEmail
+    ) -> Dict[str, Any]:
+        """
+        Start the primary send; if it outlives its observed p95, start the
+        secondary too and keep whichever succeeds first. A slow primary may
+        still deliver after the secondary wins, so the customer can receive
+        the email twice - only enable hedging when that is acceptable.
+        """
+        hedge_delay = self._health_for(primary[0]).percentile(95) or self.provider_timeout
+        primary_task = asyncio.create_task(self._send_via(*primary, message, rendered))
+        done, _ = await asyncio.wait({primary_task}, timeout=hedge_delay)
+        if done:
+            if primary_task.exception() is None:
+                return primary_task.result()
+            # A fast primary failure falls over to the secondary, as without hedging
+            print(f"❌ {primary[0]} failed: {primary_task.exception()}; trying {secondary[0]}")
+            return await self._send_via(*secondary, message, rendered)
+
+        self._hedges["started"] += 1
+        secondary_task = asyncio.create_task(self._send_via(*secondary, message, rendered))
+        pending = {primary_task, secondary_task}
+        last_error: Optional[BaseException] = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    for other in pending:
+                        other.cancel()
+                    if task is secondary_task:
+                        self._hedges["won"] += 1
+                    return task.result()
+                last_error = task.exception()
+        raise last_error
+
+    async def send_dispute_decision(
         self,
         to_email: str,
         dispute_id: str,
@@ -35,49 +168,206 @@ class UnifiedEmailService:
         amount: float,
         currency: str = "INR"
     ) -> Dict[str, Any]:
-        """Send email using the first available provider"""
-        
+        """Send email using the healthiest available provider"""
+
         if not self.providers:
             print("⚠️  No email providers configured!")
             return {
                 "success": False,
                 "error": "No email providers available"
             }
-        
-        # Try each provider in order
+
+        message = {
+            "to_email": to_email,
+            "dispute_id": dispute_id,
+            "customer_name": customer_name,
+            "decision": decision,
+            "reasoning": reasoning,
+            "amount": amount,
+            "currency": currency
+        }
+        # Render once; every provider attempt reuses the same content
+        rendered = email_renderer.render(**message)
+        ranked = self.ranked_providers()
         errors = []
-        for provider_name, provider in self.providers:
+
+        if self.hedge_enabled and len(ranked) >= 2:
+            try:
+                return await self._send_hedged(ranked[0], ranked[1], message, rendered)
+            except Exception as e:
+                errors.append(f"Hedged send via {ranked[0][0]}/{ranked[1][0]} failed: {str(e)}")
+                ranked = ranked[2:]
+
+        # Try each provider, healthiest first
+        for provider_name, provider in ranked:
             try:
                 print(f"📧 Attempting to send email via {provider_name}...")
-                result = provider.send_dispute_decision(
-                    to_email=to_email,
-                    dispute_id=dispute_id,
-                    customer_name=customer_name,
-                    decision=decision,
-                    reasoning=reasoning,
-                    amount=amount,
-                    currency=currency
-                )
-                
-                if result.get('success'):
-                    print(f"✅ Email sent successfully via {provider_name}!")
-                    return result
-                else:
-                    error_msg = f"{provider_name} failed: {result.get('error', 'Unknown error')}"
-                    print(f"❌ {error_msg}")
-                    errors.append(error_msg)
-                    
+                result = await self._send_via(provider_name, provider, message, rendered)
+                print(f"✅ Email sent successfully via {provider_name}!")
+                return result
             except Exception as e:
-                error_msg = f"{provider_name} exception: {str(e)}"
+                error_msg = f"{provider_name} failed: {str(e) or type(e).__name__}"
                 print(f"❌ {error_msg}")
                 errors.append(error_msg)
-        
+
         # All providers failed
         return {
             "success": False,
             "error": f"All email providers failed: {'; '.join(errors)}"
         }
 
+    async def _send_group(
+        self,
+        provider_name: str,
+        provider: Any,
+        messages: List[Dict[str, Any]],
+        rendered: List[RenderedEmail]
+    ) -> List[Dict[str, Any]]:
+        """
+        Send messages through one provider with its breaker and timeout.
+        Failures come back as results naming the provider, not as exceptions.
+        """
+        if hasattr(provider, "send_batch"):
+            async def _send_batch() -> List[Dict[str, Any]]:
+                batch_results = await asyncio.wait_for(
+                    provider.send_batch(messages), timeout=self.provider_timeout
+                )
+                if not any(r.get('success') for r in batch_results):
+                    raise ProviderSendError(batch_results[0].get('error', 'Unknown error'))
+                return batch_results
+
+            # One request serves the whole batch; record it as one sample
+            start = time.perf_counter()
+            try:
+                results = await self._breaker_for(provider_name).call(_send_batch)
+                self._health_for(provider_name).record(True, time.perf_counter() - start)
+            except CircuitBreakerError as e:
+                results = [{"success": False, "error": str(e)} for _ in messages]
+            except Exception as e:
+                self._health_for(provider_name).record(False, time.perf_counter() - start)
+                results = [{"success": False, "error": str(e) or type(e).__name__} for _ in messages]
+        else:
+            results = await asyncio.gather(*[
+                self._send_via(provider_name, provider, message, content)
+                for message, content in zip(messages, rendered)
+            ], return_exceptions=True)
+            results = [
+                {"success": False, "error": str(r) or type(r).__name__}
+                if isinstance(r, BaseException) else r
+                for r in results
+            ]
+
+        for result in results:
+            if result.get('success'):
+                result["provider"] = provider_name
+            else:
+                result["error"] = f"{provider_name} failed: {result.get('error', 'Unknown error')}"
+        return results
+
+    async def _send_group_hedged(
+        self,
+        primary: Tuple[str, Any],
+        secondary: Tuple[str, Any],
+        messages: List[Dict[str, Any]],
+        rendered: List[RenderedEmail]
+    ) -> Tuple[List[Dict[str, Any]], bool]:
+        """
+        Batch counterpart of _send_hedged: if the primary's send outlives its
+        p95, the secondary sends the same messages and the first to deliver
+        any of them wins. Returns the results and whether the hedge started.
+        """
+        hedge_delay = self._health_for(primary[0]).percentile(95) or self.provider_timeout
+        primary_task = asyncio.create_task(self._send_group(*primary, messages, rendered))
+        done, _ = await asyncio.wait({primary_task}, timeout=hedge_delay)
+        if done:
+            return primary_task.result(), False
+
+        self._hedges["started"] += 1
+        secondary_task = asyncio.create_task(self._send_group(*secondary, messages, rendered))
+        pending = {primary_task, secondary_task}
+        results: List[Dict[str, Any]] = []
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                results = task.result()
+                if any(r.get('success') for r in results):
+                    for other in pending:
+                        other.cancel()
+                    if task is secondary_task:
+                        self._hedges["won"] += 1
+                    return results, True
+        return results, True
+
+    async def send_batch(self, messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Send many emails, falling back per message.
+        Providers are tried healthiest-first, each within `provider_timeout`.
+        Providers with a native batch API send each batch in one request;
+        messages a provider fails are retried on the next provider. With
+        hedging on, a slow first provider is raced against the second.
+        Results are returned in the same order as messages.
+        """
+        results: List[Dict[str, Any]] = [
+            {"success": False, "error": "No email providers available"}
+            for _ in messages
+        ]
+        remaining = list(range(len(messages)))
+        errors: Dict[int, List[str]] = {i: [] for i in remaining}
+        ranked = self.ranked_providers()
+        # Rendered once, then shared across fallbacks by per-message providers
+        rendered = (
+            email_renderer.render_many(messages)
+            if any(not hasattr(provider, "send_batch") for _, provider in ranked) else []
+        )
+
+        def _apply(provider_results: List[Dict[str, Any]]) -> None:
+            nonlocal remaining
+            still_failing = []
+            for i, result in zip(remaining, provider_results):
+                if result.get('success'):
+                    results[i] = result
+                else:
+                    errors[i].append(result.get('error', 'Unknown error'))
+                    still_failing.append(i)
+            remaining = still_failing
+
+        def _pending() -> Tuple[List[Dict[str, Any]], List[RenderedEmail]]:
+            return [messages[i] for i in remaining], ([rendered[i] for i in remaining] if rendered else [])
+
+        if self.hedge_enabled and len(ranked) >= 2 and remaining:
+            provider_results, hedged = await self._send_group_hedged(ranked[0], ranked[1], *_pending())
+            _apply(provider_results)
+            # A fast primary failure still falls over to the secondary, as without hedging
+            ranked = ranked[2:] if hedged else ranked[1:]
+
+        for provider_name, provider in ranked:
+            if not remaining:
+                break
+            _apply(await self._send_group(provider_name, provider, *_pending()))
+
+        for i in remaining:
+            if errors[i]:
+                results[i] = {
+                    "success": False,
+                    "error": f"All email providers failed: {'; '.join(errors[i])}"
+                }
+
+        return results
+
+    def get_provider_stats(self) -> Dict[str, Any]:
+        """Per-provider health, latency and circuit state"""
+        return {
+            "routing_order": [name for name, _ in self.ranked_providers()],
+            "hedging": {"enabled": self.hedge_enabled, **self._hedges},
+            "providers": {
+                name: {
+                    **self._health_for(name).get_stats(),
+                    "circuit_breaker": self._breaker_for(name).get_state()
+                }
+                for name, _ in self.providers
+            }
+        }
+
 
 # Global instance
 unified_email_service = UnifiedEmailService()
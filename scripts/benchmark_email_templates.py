@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""Benchmark email template render throughput"""
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.tools.email_templates import EmailTemplateRenderer
+
+
+def make_messages(count: int) -> list:
+    """Build a mix of accept, reject and under-review messages"""
+    decisions = ["accept", "reject", "under_review"]
+    return [
+        {
+            "to_email": f"customer{i}@example.com",
+            "dispute_id": f"disp_{i:06d}",
+            "customer_name": f"Customer {i}",
+            "decision": decisions[i % len(decisions)],
+            "reasoning": "Transaction matches reason code 10.4 with no prior chargebacks. " * 4,
+            "amount": 150.0 + i,
+            "currency": "USD"
+        }
+        for i in range(count)
+    ]
+
+
+def run_benchmark(count: int = 10000) -> None:
+    """Time one-off renders, bulk renders and batch-API grouping"""
+    start = time.perf_counter()
+    renderer = EmailTemplateRenderer()
+    compile_ms = (time.perf_counter() - start) * 1000
+
+    messages = make_messages(count)
+
+    start = time.perf_counter()
+    for message in messages:
+        renderer.render(**message)
+    single = time.perf_counter() - start
+
+    start = time.perf_counter()
+    renderer.render_many(messages)
+    bulk = time.perf_counter() - start
+
+    start = time.perf_counter()
+    renderer.render_bulk(messages)
+    grouped = time.perf_counter() - start
+
+    print(f"\n{'='*60}")
+    print(f"Email Template Benchmark ({count} messages)")
+    print(f"{'='*60}")
+    print(f"Template compile:         {compile_ms:.2f} ms (once per process)")
+    print(f"render():                 {count / single:,.0f} emails/sec")
+    print(f"render_many():            {count / bulk:,.0f} emails/sec")
+    print(f"render_bulk() (SendGrid): {count / grouped:,.0f} emails/sec")
+    print(f"{'='*60}\n")
+
+
+if __name__ == "__main__":
+    run_benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
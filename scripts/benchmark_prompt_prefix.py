@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""Benchmark time-to-first-token for the legacy and prefix-stable adjudication prompts"""
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from langchain_core.messages import HumanMessage
+from langchain_ollama import ChatOllama
+from app.tools.adjudicator import ADJUDICATION_SYSTEM_PROMPT, Adjudicator
+
+RULES = "\n\n".join(
+    f"Rule {i + 1}: Visa Reason Code 10.4 - Other Fraud, Card-Absent Environment. "
+    "The issuer must certify that the cardholder denies participation in the transaction "
+    "and that a fraud report was filed before initiating the dispute."
+    for i in range(5)
+)
+
+
+def make_disputes(count: int) -> list:
+    """Build distinct disputes so only the static instructions could be shared"""
+    return [
+        (
+            f"disp_{i:06d}",
+            {
+                "customer_id": f"cust_{i}",
+                "transaction_id": f"txn_{i}",
+                "amount": f"{100 + i * 7}.00",
+                "currency": "USD",
+                "reason_code": "10.4",
+                "description": f"Customer {i} reports an unrecognized card-absent purchase"
+            }
+        )
+        for i in range(count)
+    ]
+
+
+def legacy_prompt(dispute_id: str, payload: dict) -> list:
+    """The previous layout: dispute details first, static instructions last"""
+    return [HumanMessage(content=(
+        Adjudicator.dispute_section(dispute_id, payload, RULES, "")
+        + "\n\n"
+        + ADJUDICATION_SYSTEM_PROMPT
+    ))]
+
+
+async def time_to_first_token(llm: ChatOllama, prompt: list) -> float:
+    start = time.perf_counter()
+    stream = llm.astream(prompt)
+    async for _ in stream:
+        break
+    elapsed = time.perf_counter() - start
+    await stream.aclose()
+    return elapsed
+
+
+async def run_benchmark(base_url: str, model: str, count: int) -> None:
+    """Time first tokens for each layout over the same disputes"""
+    llm = ChatOllama(model=model, temperature=0, base_url=base_url, keep_alive="30m")
+    adjudicator = Adjudicator(llm)
+    disputes = make_disputes(count)
+
+    # Load the model so neither layout pays the cold start
+    await time_to_first_token(llm, [HumanMessage(content="ready")])
+
+    results = {}
+    layouts = {
+        "legacy (dispute first)": lambda d, p: legacy_prompt(d, p),
+        "stable prefix": lambda d, p: adjudicator.build_prompt(d, p, RULES, "", [])
+    }
+    for name, build in layouts.items():
+        results[name] = [await time_to_first_token(llm, build(d, p)) for d, p in disputes]
+
+    print(f"\n{'='*60}")
+    print(f"Adjudication Prompt TTFT Benchmark ({count} disputes, {model})")
+    print(f"{'='*60}")
+    for name, timings in results.items():
+        ordered = sorted(timings)
+        p95 = ordered[min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))]
+        print(f"{name:<24} p50 {statistics.median(timings) * 1000:8.1f} ms   p95 {p95 * 1000:8.1f} ms")
+    print(f"{'='*60}\n")
+
+
+if __name__ == "__main__":
+    asyncio.run(run_benchmark(
+        sys.argv[1] if len(sys.argv) > 1 else "http://localhost:11434",
+        sys.argv[2] if len(sys.argv) > 2 else "llama3.2",
+        int(sys.argv[3]) if len(sys.argv) > 3 else 20
+    ))
@@ -36,8 +36,8 @@ def sample_dispute_state():
             "reason_code": "10.4",
             "description": "Customer claims unauthorized transaction"
         },
-        "transaction_history": None,
-        "retrieved_rules": None,
+        "transaction_history_ref": None,
+        "retrieved_rules_ref": None,
         "similarity_scores": None,
         "query_attempts": 0,
         "decision": None,
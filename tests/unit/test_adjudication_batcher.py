@@ -0,0 +1,120 @@
+"""Unit tests for cross-dispute adjudication batching"""
+import asyncio
+import json
+import time
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from app.tools.adjudicator import Adjudicator
+from app.tools.adjudication_batcher import AdjudicationBatcher
+from app.tools.deadline import dispute_deadline
+
+
+PAYLOAD = {
+    "customer_id": "cust_456",
+    "transaction_id": "txn_789",
+    "amount": "150.00",
+    "currency": "USD",
+    "reason_code": "10.4",
+    "description": "Customer claims unauthorized transaction"
+}
+
+
+def _decision(dispute_id, decision="accept"):
+    return {
+        "dispute_id": dispute_id,
+        "decision": decision,
+        "confidence_score": 0.92,
+        "reasoning": "Card-absent fraud with no prior chargebacks",
+        "supporting_rules": ["Visa 10.4"],
+        "recommended_action": "Refund customer"
+    }
+
+
+@pytest.fixture
+def mock_llm():
+    """Create a mock LLM whose bound variants share one ainvoke"""
+    llm = MagicMock()
+    llm.ainvoke = AsyncMock()
+    llm.bind.return_value = llm
+    return llm
+
+
+@pytest.mark.asyncio
+async def test_concurrent_disputes_share_one_generation(mock_llm):
+    """Verify disputes arriving within the window are adjudicated in one call"""
+    mock_llm.ainvoke.return_value = MagicMock(content=json.dumps({
+        "decisions": [_decision("disp_2", "reject"), _decision("disp_1")]
+    }))
+    batcher = AdjudicationBatcher(Adjudicator(mock_llm), max_batch_size=8, max_wait=0.05)
+
+    first, second = await asyncio.gather(
+        batcher.adjudicate("disp_1", PAYLOAD, "", ""),
+        batcher.adjudicate("disp_2", PAYLOAD, "", "")
+    )
+
+    assert (first.dispute_id, first.decision) == ("disp_1", "accept")
+    assert (second.dispute_id, second.decision) == ("disp_2", "reject")
+    assert mock_llm.ainvoke.await_count == 1
+    prompt = mock_llm.ainvoke.call_args[0][0][-1].content
+    assert "disp_1" in prompt and "disp_2" in prompt
+    await batcher.close()
+
+
+@pytest.mark.asyncio
+async def test_invalid_batch_items_fall_back_individually(mock_llm):
+    """Verify only the disputes the batch got wrong are re-adjudicated alone"""
+    single = {k: v for k, v in _decision("disp_2").items() if k != "dispute_id"}
+    mock_llm.ainvoke.side_effect = [
+        MagicMock(content=json.dumps({"decisions": [
+            _decision("disp_1"),
+            {**_decision("disp_2"), "decision": "maybe"}
+        ]})),
+        MagicMock(content=json.dumps(single))
+    ]
+    batcher = AdjudicationBatcher(Adjudicator(mock_llm), max_wait=0.05)
+
+    results = await asyncio.gather(
+        batcher.adjudicate("disp_1", PAYLOAD, "", ""),
+        batcher.adjudicate("disp_2", PAYLOAD, "", "")
+    )
+
+    assert [r.dispute_id for r in results] == ["disp_1", "disp_2"]
+    stats = batcher.get_stats()["batching"]
+    assert stats["batch_valid_items"] == 1
+    assert stats["fallbacks"] == 1
+    await batcher.close()
+
+
+@pytest.mark.asyncio
+async def test_each_dispute_keeps_its_own_deadline(mock_llm):
+    """Verify the batch loop does not inherit the deadline of the dispute that started it"""
+    seen = []
+    single = {k: v for k, v in _decision("disp_1").items() if k != "dispute_id"}
+
+    async def respond(messages, *args, **kwargs):
+        seen.append(dispute_deadline.get())
+        if "of 2 ===" in messages[-1].content:
+            return MagicMock(content="not json")
+        return MagicMock(content=json.dumps(single))
+
+    mock_llm.ainvoke.side_effect = respond
+    batcher = AdjudicationBatcher(Adjudicator(mock_llm), max_wait=0.01)
+
+    async def run(dispute_id, deadline):
+        dispute_deadline.set(deadline)
+        return await batcher.adjudicate(dispute_id, PAYLOAD, "", "")
+
+    soon, later = time.time() + 0.05, time.time() + 180
+    await asyncio.create_task(run("disp_1", soon))
+    await asyncio.sleep(0.1)
+    result = await asyncio.create_task(run("disp_2", later))
+    assert result.dispute_id == "disp_2"
+    assert seen == [soon, later]
+
+    # A failed batch call is bounded by the earliest deadline, each fallback by its own
+    seen.clear()
+    first, second = time.time() + 60, time.time() + 120
+    await asyncio.gather(run("disp_3", first), run("disp_4", second))
+    assert seen[0] == first
+    assert sorted(seen[1:]) == [first, second]
+    await batcher.close()
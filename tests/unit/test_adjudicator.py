@@ -0,0 +1,178 @@
+"""Unit tests for schema-constrained adjudication"""
+import json
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from app.tools.adjudicator import Adjudicator, decision_json_schema
+
+
+PAYLOAD = {
+    "customer_id": "cust_456",
+    "transaction_id": "txn_789",
+    "amount": "150.00",
+    "currency": "USD",
+    "reason_code": "10.4",
+    "description": "Customer claims unauthorized transaction"
+}
+
+VALID_DECISION = {
+    "decision": "accept",
+    "confidence_score": 0.92,
+    "reasoning": "Card-absent fraud with no prior chargebacks",
+    "supporting_rules": ["Visa 10.4"],
+    "recommended_action": "Refund customer"
+}
+
+
+@pytest.fixture
+def mock_llm():
+    """Create a mock LLM whose bound variants share one ainvoke"""
+    llm = MagicMock()
+    llm.ainvoke = AsyncMock()
+    llm.bind.return_value = llm
+    return llm
+
+
+def test_schema_excludes_dispute_id():
+    """Verify the generated schema constrains decision fields only"""
+    schema = decision_json_schema()
+
+    assert "dispute_id" not in schema["properties"]
+    assert "dispute_id" not in schema["required"]
+    assert schema["properties"]["decision"]["enum"] == ["accept", "reject", "escalate"]
+    assert schema["additionalProperties"] is False
+
+
+def test_schema_bound_per_provider(mock_llm):
+    """Verify Ollama gets `format` and OpenAI gets a strict response_format"""
+    Adjudicator(mock_llm, provider="ollama")
+    assert "format" in mock_llm.bind.call_args.kwargs
+
+    Adjudicator(mock_llm, provider="openai")
+    response_format = mock_llm.bind.call_args.kwargs["response_format"]
+    assert response_format["json_schema"]["strict"] is True
+
+
+@pytest.mark.asyncio
+async def test_valid_first_response_needs_no_retry(mock_llm):
+    """Verify a constrained response is accepted on the first generation"""
+    mock_llm.ainvoke.return_value = MagicMock(content=json.dumps(VALID_DECISION))
+    adjudicator = Adjudicator(mock_llm)
+
+    decision = await adjudicator.adjudicate("disp_123", PAYLOAD, "Rule 1: ...", "")
+
+    assert decision.dispute_id == "disp_123"
+    assert decision.decision == "accept"
+    stats = adjudicator.get_stats()
+    assert stats["first_attempt_valid"] == 1
+    assert stats["retries"] == 0
+
+
+@pytest.mark.asyncio
+async def test_invalid_response_retried_and_counted(mock_llm):
+    """Verify invalid output triggers a retry with error feedback and is counted"""
+    mock_llm.ainvoke.side_effect = [
+        MagicMock(content="not json"),
+        MagicMock(content=json.dumps({**VALID_DECISION, "decision": "maybe"})),
+        MagicMock(content=json.dumps(VALID_DECISION))
+    ]
+    adjudicator = Adjudicator(mock_llm)
+
+    await adjudicator.adjudicate("disp_123", PAYLOAD, "", "")
+
+    last_prompt = mock_llm.ainvoke.call_args_list[-1][0][0]
+    assert "Previous attempt failed validation" in last_prompt[-1].content
+    stats = adjudicator.get_stats()
+    assert stats["retries"] == 2
+    assert stats["json_errors"] == 1
+    assert stats["validation_errors"] == 1
+
+
+def _streaming_llm(*responses):
+    """Create a mock LLM streaming each response in small chunks"""
+    llm = MagicMock()
+    llm.bind.return_value = llm
+    llm.chunks_sent = []
+    streams = iter(responses)
+
+    async def astream(prompt):
+        text = next(streams)
+        for i in range(0, len(text), 7):
+            llm.chunks_sent.append(text[i:i + 7])
+            yield MagicMock(content=text[i:i + 7])
+
+    llm.astream = astream
+    return llm
+
+
+@pytest.mark.asyncio
+async def test_streaming_stops_when_object_closes():
+    """Verify trailing output after the JSON object is never consumed"""
+    text = json.dumps(VALID_DECISION) + " Let me explain my reasoning further" * 20
+    llm = _streaming_llm(text)
+    adjudicator = Adjudicator(llm, streaming=True)
+
+    decision = await adjudicator.adjudicate("disp_123", PAYLOAD, "", "")
+
+    assert decision.decision == "accept"
+    assert len("".join(llm.chunks_sent)) < len(text)
+    assert adjudicator.get_stats()["stopped_at_object_close"] == 1
+
+
+@pytest.mark.asyncio
+async def test_streaming_aborts_on_invalid_decision_literal():
+    """Verify a bad decision literal aborts before the reasoning is generated"""
+    invalid = json.dumps({"decision": "maybe", **{k: v for k, v in VALID_DECISION.items() if k != "decision"}})
+    llm = _streaming_llm(invalid, json.dumps(VALID_DECISION))
+    adjudicator = Adjudicator(llm, streaming=True)
+
+    decision = await adjudicator.adjudicate("disp_123", PAYLOAD, "", "")
+
+    assert decision.decision == "accept"
+    first_attempt = "".join(llm.chunks_sent)[:len(invalid)]
+    assert "reasoning" not in first_attempt.split('"maybe"')[0]
+    stats = adjudicator.get_stats()
+    assert stats["early_aborts"] == 1
+    assert stats["validation_errors"] == 1
+    assert stats["generations"] == 2
+
+
+@pytest.mark.asyncio
+async def test_cascade_escalates_low_confidence_and_invalid_output():
+    """Verify the large model only runs when the small one is unsure or invalid"""
+    from app.tools.adjudicator import AdjudicationCascade
+
+    small_llm = MagicMock()
+    small_llm.bind.return_value = small_llm
+    small_llm.ainvoke = AsyncMock(side_effect=[
+        MagicMock(content=json.dumps(VALID_DECISION)),
+        MagicMock(content=json.dumps({**VALID_DECISION, "confidence_score": 0.4})),
+        MagicMock(content="not json")
+    ])
+    large_llm = MagicMock()
+    large_llm.bind.return_value = large_llm
+    large_llm.ainvoke = AsyncMock(return_value=MagicMock(content=json.dumps(VALID_DECISION)))
+    cascade = AdjudicationCascade(
+        [("small", Adjudicator(small_llm, max_attempts=1)), ("large", Adjudicator(large_llm))],
+        confidence_threshold=0.85
+    )
+
+    tiers = [(await cascade.adjudicate("disp_123", PAYLOAD, "", ""))[1] for _ in range(3)]
+
+    assert tiers == ["small", "large", "large"]
+    assert large_llm.ainvoke.await_count == 2
+    stats = cascade.get_stats()
+    assert stats["tiers"]["small"]["escalated_low_confidence"] == 1
+    assert stats["tiers"]["small"]["escalated_invalid"] == 1
+    assert stats["traffic_split"] == {"small": round(1 / 3, 4), "large": round(2 / 3, 4)}
+
+
+def test_prompt_prefix_is_identical_across_disputes(mock_llm):
+    """Verify per-dispute fields only appear after the shared system prefix"""
+    adjudicator = Adjudicator(mock_llm)
+
+    first = adjudicator.build_prompt("disp_1", PAYLOAD, "Rule 1: ...", "", [])
+    second = adjudicator.build_prompt("disp_2", {**PAYLOAD, "amount": "99.00"}, "Rule 9: ...", "", ["bad"])
+
+    assert first[0].content == second[0].content
+    assert "disp_1" not in first[0].content
+    assert "disp_1" in first[1].content
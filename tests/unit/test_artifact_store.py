@@ -0,0 +1,63 @@
+"""Unit tests for by-reference dispute artifacts and delta-returning nodes"""
+import pytest
+from datetime import datetime
+from decimal import Decimal
+from unittest.mock import AsyncMock, patch
+from app.schema.models import TransactionData
+from app.tools.artifact_store import ArtifactStore, artifact_store, state_size
+
+
+HISTORY = [
+    TransactionData(
+        transaction_id=f"tx_{i}",
+        customer_id="cust_456",
+        amount=Decimal("42.50"),
+        timestamp=datetime(2024, 1, 1),
+        merchant="Example Merchant",
+        status="completed"
+    )
+    for i in range(100)
+]
+
+
+def test_artifacts_are_held_by_reference_until_released():
+    """Verify refs resolve until the dispute is released"""
+    store = ArtifactStore()
+    history_ref = store.put("disp_1", "transaction_history", HISTORY)
+    rules_ref = store.put("disp_1", "retrieved_rules", [{"content": "rule"}])
+    other_ref = store.put("disp_2", "retrieved_rules", [])
+
+    assert store.get(history_ref) is HISTORY
+    assert store.get(None) is None
+    store.release("disp_1")
+    assert store.get(history_ref) is None
+    assert store.get(rules_ref) is None
+    assert store.get(other_ref) == []
+
+
+def test_stale_artifacts_expire():
+    """Verify artifacts of disputes that never finished are dropped"""
+    store = ArtifactStore(ttl_seconds=0.0)
+    ref = store.put("disp_1", "transaction_history", HISTORY)
+    store.put("disp_2", "transaction_history", HISTORY)
+
+    assert store.get(ref) is None
+    assert store.get_stats()["artifacts_held"] == 1
+
+
+@pytest.mark.asyncio
+async def test_enrichment_returns_only_changed_keys(sample_dispute_state):
+    """Verify the node's update carries a reference, not the history"""
+    from app.agents import dispute_graph
+
+    with patch.object(dispute_graph.audit_logger, "log_node_entry", new_callable=AsyncMock), \
+         patch.object(dispute_graph.transaction_enrichment, "fetch_history", AsyncMock(return_value=HISTORY)):
+        update = await dispute_graph.enrichment_node(sample_dispute_state)
+
+    try:
+        assert set(update) == {"transaction_history_ref", "current_node", "actions_taken", "degradation_level"}
+        assert artifact_store.get(update["transaction_history_ref"]) is HISTORY
+        assert sample_dispute_state["actions_taken"] == []
+        assert state_size({**sample_dispute_state, **update}) < state_size({"history": HISTORY}) / 10
+    finally:
+        artifact_store.release(sample_dispute_state["dispute_id"])
@@ -0,0 +1,121 @@
+"""Unit tests for the rolling-window circuit breaker and shared state"""
+import asyncio
+import time
+import pytest
+from unittest.mock import AsyncMock, patch
+from app.tools.circuit_breaker import (
+    CircuitBreaker,
+    CircuitBreakerConfig,
+    CircuitBreakerError,
+    CircuitBreakerSync,
+    CircuitState
+)
+
+
+def make_breaker(**kwargs) -> CircuitBreaker:
+    config = {"failure_threshold": 100, "minimum_calls": 10, "timeout": 60, **kwargs}
+    return CircuitBreaker("test", CircuitBreakerConfig(**config))
+
+
+async def ok():
+    return "ok"
+
+
+async def fail():
+    raise RuntimeError("down")
+
+
+@pytest.mark.asyncio
+async def test_failure_rate_opens_without_consecutive_failures():
+    """Verify interleaved failures trip the breaker on windowed failure rate"""
+    breaker = make_breaker(failure_rate_threshold=0.5)
+
+    for _ in range(5):
+        await breaker.call(ok)
+        with pytest.raises(RuntimeError):
+            await breaker.call(fail)
+
+    assert breaker.state == CircuitState.OPEN
+    with pytest.raises(CircuitBreakerError):
+        await breaker.call(ok)
+    assert breaker.get_state()["stats"]["total_rejections"] == 1
+
+
+@pytest.mark.asyncio
+async def test_slow_call_rate_opens():
+    """Verify successful but slow calls trip the breaker"""
+    # Every call takes at least zero seconds, so every call is slow
+    breaker = make_breaker(slow_call_duration=0.0, slow_call_rate_threshold=0.8)
+
+    for _ in range(10):
+        assert await breaker.call(ok) == "ok"
+
+    assert breaker.state == CircuitState.OPEN
+    assert breaker.stats.total_slow_calls == 10
+
+
+@pytest.mark.asyncio
+async def test_half_open_limits_probes_and_closes():
+    """Verify half-open admits only a few probes and closes after they succeed"""
+    breaker = make_breaker(success_threshold=2, timeout=0)
+    breaker._transition(CircuitState.OPEN, time.time() - 1)
+
+    async with breaker.protect():
+        async with breaker.protect():
+            with pytest.raises(CircuitBreakerError):
+                async with breaker.protect():
+                    pass
+    assert breaker.state == CircuitState.CLOSED
+
+
+@pytest.mark.asyncio
+async def test_cancelled_probes_free_their_slots():
+    """Verify cancelled half-open probes do not leave the breaker stuck probing"""
+    breaker = make_breaker(success_threshold=2, timeout=0)
+    breaker._transition(CircuitState.OPEN, time.time() - 1)
+
+    for _ in range(3):
+        probe = asyncio.create_task(breaker.call(asyncio.sleep, 10))
+        await asyncio.sleep(0)
+        probe.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await probe
+        assert breaker.state == CircuitState.HALF_OPEN
+
+    with pytest.raises(asyncio.CancelledError):
+        async with breaker.protect():
+            raise asyncio.CancelledError()
+
+    await breaker.call(ok)
+    await breaker.call(ok)
+    assert breaker.state == CircuitState.CLOSED
+
+
+@pytest.mark.asyncio
+async def test_transitions_are_shared_across_workers():
+    """Verify one worker's open breaker opens another worker's breaker"""
+    worker_a = make_breaker(failure_threshold=2)
+    worker_b = make_breaker(failure_threshold=2)
+    for _ in range(2):
+        with pytest.raises(RuntimeError):
+            await worker_a.call(fail)
+
+    published = {}
+
+    async def publish(name, state, changed_at):
+        if changed_at > published.get(name, ("", 0.0))[1]:
+            published[name] = (state, changed_at)
+
+    async def fetch():
+        return dict(published)
+
+    with patch("app.tools.circuit_breaker.publish_breaker_state", new=AsyncMock(side_effect=publish)), \
+            patch("app.tools.circuit_breaker.fetch_breaker_states", new=AsyncMock(side_effect=fetch)):
+        assert await CircuitBreakerSync([worker_a]).sync() == 0
+        assert await CircuitBreakerSync([worker_b]).sync() == 1
+
+    assert worker_b.state == CircuitState.OPEN
+    assert worker_b.changed_at == worker_a.changed_at
+    # Stale or half-open states are never adopted
+    assert not worker_b.apply_shared_state("closed", worker_a.changed_at - 10)
+    assert not worker_b.apply_shared_state("half_open", time.time() + 10)
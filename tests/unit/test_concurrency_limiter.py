@@ -0,0 +1,105 @@
+"""Unit tests for adaptive concurrency limits"""
+import asyncio
+import pytest
+from app.tools.concurrency_limiter import AdaptiveLimiter, ConcurrencyLimitExceeded
+
+
+@pytest.mark.asyncio
+async def test_calls_over_the_limit_queue_in_order():
+    """Verify excess calls wait and are admitted first-in, first-out"""
+    limiter = AdaptiveLimiter("test", initial_limit=1, max_limit=1)
+    release = asyncio.Event()
+    order = []
+
+    async def work(name):
+        async with limiter.slot():
+            order.append(name)
+            await release.wait()
+
+    tasks = [asyncio.create_task(work(name)) for name in ("a", "b", "c")]
+    await asyncio.sleep(0.01)
+    assert limiter.get_state()["queue_depth"] == 2
+    assert limiter.in_flight == 1
+
+    release.set()
+    await asyncio.gather(*tasks)
+    assert order == ["a", "b", "c"]
+    assert limiter.in_flight == 0
+    assert limiter.stats.queued == 2
+
+
+@pytest.mark.asyncio
+async def test_full_queue_and_queue_timeout_reject():
+    """Verify the queue is bounded in both size and wait time"""
+    limiter = AdaptiveLimiter("test", initial_limit=1, max_limit=1, max_queue=1, queue_timeout=0.05)
+    await limiter.acquire()
+    waiter = asyncio.create_task(limiter.acquire())
+    await asyncio.sleep(0)
+
+    with pytest.raises(ConcurrencyLimitExceeded, match="queue is full"):
+        await limiter.acquire()
+    with pytest.raises(ConcurrencyLimitExceeded, match="queue wait"):
+        await waiter
+
+    stats = limiter.get_state()["stats"]
+    assert stats["rejected_queue_full"] == 1
+    assert stats["rejected_queue_timeout"] == 1
+    assert limiter.get_state()["queue_depth"] == 0
+
+
+def test_limit_grows_when_busy_and_backs_off_on_latency():
+    """Verify AIMD: additive increase under load, multiplicative decrease on slow calls"""
+    limiter = AdaptiveLimiter("test", initial_limit=4, max_limit=10, min_samples=3, backoff_ratio=0.5)
+    limiter.in_flight = 4
+    for _ in range(8):
+        limiter.in_flight += 1
+        limiter.release(0.1, success=True)
+    assert limiter.limit > 5
+
+    grown = limiter.limit
+    limiter.in_flight += 1
+    limiter.release(1.0, success=True)
+    assert limiter.limit == pytest.approx(grown * 0.5)
+    assert limiter.stats.limit_decreases == 1
+
+
+def test_mixed_call_lengths_do_not_collapse_a_failure_only_limit():
+    """Verify long calls next to short ones keep the limit when latency is not a signal"""
+    limiter = AdaptiveLimiter("llm", initial_limit=8, max_limit=8, min_samples=3, latency_tolerance=None)
+    for latency in [0.2, 0.3, 0.2, 30.0, 45.0, 0.25, 60.0] * 5:
+        limiter.in_flight += 1
+        limiter.release(latency, success=True)
+    assert limiter.current_limit == 8
+    assert limiter.stats.limit_decreases == 0
+
+    limiter.in_flight += 1
+    limiter.release(1.0, success=False)
+    assert limiter.stats.limit_decreases == 1
+
+
+def test_failures_back_off_to_the_minimum():
+    """Verify repeated failures never drop the limit below min_limit"""
+    limiter = AdaptiveLimiter("test", initial_limit=4, min_limit=2)
+    for _ in range(20):
+        limiter.in_flight += 1
+        limiter.release(0.1, success=False)
+    assert limiter.current_limit == 2
+
+
+@pytest.mark.asyncio
+async def test_cancelled_call_frees_its_slot_without_adjusting():
+    """Verify a cancelled call releases its slot and is not an overload signal"""
+    limiter = AdaptiveLimiter("test", initial_limit=2)
+
+    async def work():
+        async with limiter.slot():
+            await asyncio.sleep(10)
+
+    task = asyncio.create_task(work())
+    await asyncio.sleep(0)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+    assert limiter.in_flight == 0
+    assert limiter.stats.limit_decreases == 0
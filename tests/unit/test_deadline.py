@@ -0,0 +1,96 @@
+"""Unit tests for dispute deadlines and per-node timeouts"""
+import asyncio
+import time
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+from app.tools.deadline import DeadlineExceeded, NodeDeadlines, deadline_timeout, dispute_deadline
+from app.tools.llm_pool import LLMEndpointPool
+from app.tools.transaction_enrichment import RetriableError, TransactionEnrichment
+
+
+def make_state(**kwargs) -> dict:
+    return {"dispute_id": "disp_123", "actions_taken": [], "error": None, **kwargs}
+
+
+@pytest.mark.asyncio
+async def test_slow_node_is_cancelled_and_marked():
+    """Verify an overrunning node is cancelled and flagged for human review"""
+    cancelled = asyncio.Event()
+
+    async def slow_node(state):
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+        return state
+
+    deadlines = NodeDeadlines({"enrichment_node": 0.05})
+    with patch("app.tools.deadline.audit_logger.log_error", new=AsyncMock()):
+        state = await deadlines.wrap("enrichment_node", slow_node)(make_state())
+
+    assert cancelled.is_set()
+    assert state["timed_out_node"] == "enrichment_node"
+    assert "enrichment_node_timed_out" in state["actions_taken"]
+    assert deadlines.get_stats()["nodes"]["enrichment_node"]["timeouts"] == 1
+
+
+@pytest.mark.asyncio
+async def test_node_sees_the_dispute_deadline():
+    """Verify the deadline is set once and propagated to downstream calls"""
+    seen = {}
+
+    async def node(state):
+        seen["timeout"] = deadline_timeout(30.0)
+        return state
+
+    deadlines = NodeDeadlines({"adjudication_node": 60.0}, deadline_seconds=5.0)
+    state = await deadlines.wrap("adjudication_node", node)(make_state())
+
+    assert state["deadline"] == pytest.approx(time.time() + 5.0, abs=1.0)
+    assert seen["timeout"] <= 5.0
+    assert dispute_deadline.get() is None
+
+
+@pytest.mark.asyncio
+async def test_exhausted_deadline_skips_the_node():
+    """Verify a node is not started once the dispute deadline has passed"""
+    node = AsyncMock()
+    deadlines = NodeDeadlines({"action_node": 15.0})
+    with patch("app.tools.deadline.audit_logger.log_error", new=AsyncMock()):
+        state = await deadlines.wrap("action_node", node)(make_state(deadline=time.time() - 1))
+
+    node.assert_not_called()
+    assert state["timed_out_node"] == "action_node"
+    assert deadlines.get_stats()["nodes"]["action_node"]["deadline_exhausted"] == 1
+
+
+@pytest.mark.asyncio
+async def test_llm_call_is_bounded_by_dispute_deadline():
+    """Verify pool calls fail fast once the dispute deadline has passed"""
+    llm = MagicMock()
+    llm.ainvoke = AsyncMock(return_value=MagicMock(content="ok"))
+    pool = LLMEndpointPool({"http://a": llm}, call_timeout=30.0)
+
+    token = dispute_deadline.set(time.time() - 1)
+    try:
+        with pytest.raises(DeadlineExceeded):
+            await pool.ainvoke("prompt")
+    finally:
+        dispute_deadline.reset(token)
+    llm.ainvoke.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_enrichment_retry_respects_deadline():
+    """Verify backoff is skipped when the deadline leaves no time for a retry"""
+    enrichment = TransactionEnrichment("http://enrichment")
+    attempts = AsyncMock(side_effect=RetriableError("timeout"))
+
+    token = dispute_deadline.set(time.time() + 0.5)
+    try:
+        with pytest.raises(RetriableError):
+            await enrichment._retry_with_backoff(attempts)
+    finally:
+        dispute_deadline.reset(token)
+    assert attempts.call_count == 1
@@ -0,0 +1,142 @@
+"""Unit tests for the semantic decision cache"""
+import pytest
+from app.schema.models import DisputeDecision, FraudAnalysis
+from app.tools.adjudicator import DEFERRED_REASONING
+from app.tools.decision_cache import DecisionCache, feature_signature
+
+
+PAYLOAD = {
+    "customer_id": "cust_456",
+    "transaction_id": "txn_789",
+    "amount": "150.00",
+    "currency": "USD",
+    "reason_code": "13.1",
+    "merchant_name": "ACME Store",
+    "description": "Merchandise not received from ACME order"
+}
+
+DECISION = DisputeDecision(
+    dispute_id="disp_1",
+    decision="accept",
+    confidence_score=0.93,
+    reasoning="Merchandise was not delivered by the agreed date.",
+    supporting_rules=["Visa 13.1"],
+    recommended_action="Refund customer"
+)
+
+RULES = [{"content": "Rule text", "metadata": {}, "similarity_score": 0.9}]
+
+
+def make_cache(vectors: dict, version: list, **kwargs) -> DecisionCache:
+    return DecisionCache(
+        lambda texts: [vectors[text] for text in texts],
+        lambda: version[0],
+        version_check_interval=0,
+        **kwargs
+    )
+
+
+async def fill(cache: DecisionCache, payload: dict = PAYLOAD) -> None:
+    assert await cache.lookup("disp_1", payload, None) is None
+    assert cache.store("disp_1", RULES, [0.9], DECISION)
+
+
+@pytest.mark.asyncio
+async def test_near_duplicate_reuses_retrieval_and_decision():
+    """Verify a similar description with the same signature hits"""
+    vectors = {PAYLOAD["description"]: [1.0, 0.0], "Order from ACME never arrived": [0.99, 0.05]}
+    cache = make_cache(vectors, ["v1"])
+    await fill(cache)
+
+    duplicate = {**PAYLOAD, "amount": "170.00", "merchant_name": "acme  store",
+                 "description": "Order from ACME never arrived"}
+    hit = await cache.lookup("disp_2", duplicate, None)
+
+    assert hit.entry.source_dispute_id == "disp_1"
+    assert hit.entry.retrieved_rules == RULES
+    assert cache.claim("disp_2") is hit
+    assert hit.decision_for("disp_2").dispute_id == "disp_2"
+    assert cache.get_stats()["hit_rate"] == 0.5
+
+
+@pytest.mark.asyncio
+async def test_signature_or_description_mismatch_misses():
+    """Verify different features or dissimilar text never share a decision"""
+    vectors = {PAYLOAD["description"]: [1.0, 0.0], "Charged twice for one purchase": [0.0, 1.0]}
+    cache = make_cache(vectors, ["v1"])
+    await fill(cache)
+    risky = FraudAnalysis(has_suspicious_patterns=True, chargeback_rate=0.2, pattern_details=[], risk_score=0.6)
+
+    assert await cache.lookup("disp_2", {**PAYLOAD, "reason_code": "12.6.1"}, None) is None
+    assert await cache.lookup("disp_3", {**PAYLOAD, "amount": "5000.00"}, None) is None
+    assert await cache.lookup("disp_4", PAYLOAD, risky) is None
+    assert await cache.lookup("disp_5", {**PAYLOAD, "description": "Charged twice for one purchase"}, None) is None
+    assert feature_signature(PAYLOAD, None) != feature_signature(PAYLOAD, risky)
+
+
+@pytest.mark.asyncio
+async def test_corpus_version_and_threshold_changes_invalidate():
+    """Verify entries are dropped when the corpus or thresholds change"""
+    version = ["v1"]
+    cache = make_cache({PAYLOAD["description"]: [1.0, 0.0]}, version)
+    await fill(cache)
+
+    version[0] = "v2"
+    assert await cache.lookup("disp_2", PAYLOAD, None) is None
+    assert cache.get_stats()["invalidations"] == 1
+
+    assert cache.store("disp_2", RULES, [0.9], DECISION)
+    assert await cache.lookup("disp_3", PAYLOAD, None, thresholds=(0.8,)) is None
+    assert cache.get_stats()["invalidations"] == 2
+    assert len(cache) == 0
+
+
+@pytest.mark.asyncio
+async def test_expired_entries_and_embedding_failures_miss():
+    """Verify TTL expiry and embedding errors fall back to a full run"""
+    cache = make_cache({PAYLOAD["description"]: [1.0, 0.0]}, ["v1"], ttl_seconds=0)
+    await fill(cache)
+    assert await cache.lookup("disp_2", PAYLOAD, None) is None
+    assert cache.get_stats()["expired"] == 1
+
+    assert await cache.lookup("disp_3", {**PAYLOAD, "description": "unknown"}, None) is None
+    assert cache.get_stats()["embedding_failures"] == 1
+    assert not cache.store("disp_3", RULES, [0.9], DECISION)
+
+
+@pytest.mark.asyncio
+async def test_unclaimed_hits_are_bounded():
+    """Verify hits for disputes that never reach adjudication cannot grow without limit"""
+    vectors = {PAYLOAD["description"]: [1.0, 0.0]}
+    cache = make_cache(vectors, ["v1"], max_entries=2)
+    await fill(cache)
+
+    for i in range(5):
+        assert await cache.lookup(f"disp_{i + 2}", PAYLOAD, None) is not None
+
+    assert cache.claim("disp_2") is None
+    assert cache.claim("disp_6") is not None
+    cache.discard("disp_5")
+    assert cache.claim("disp_5") is None
+
+
+@pytest.mark.asyncio
+async def test_hit_never_carries_the_source_disputes_reasoning():
+    """Verify a reused verdict does not leak the source dispute's identifiers"""
+    vectors = {PAYLOAD["description"]: [1.0, 0.0]}
+    cache = make_cache(vectors, ["v1"])
+    source = DECISION.model_copy(update={
+        "reasoning": "Customer cust_456 disputed txn_789 for USD 150.00 at ACME Store."
+    })
+    assert await cache.lookup("disp_1", PAYLOAD, None) is None
+    assert cache.store("disp_1", RULES, [0.9], source)
+
+    hit = await cache.lookup("disp_2", {**PAYLOAD, "customer_id": "cust_999"}, None)
+    decision = hit.decision_for("disp_2")
+
+    assert decision.reasoning == DEFERRED_REASONING
+    assert (decision.decision, decision.confidence_score) == ("accept", 0.93)
+    assert decision.supporting_rules == ["Visa 13.1"]
+    for identifier in ("disp_1", "cust_456", "txn_789"):
+        assert identifier not in decision.model_dump_json()
+        assert identifier not in str(hit.entry.decision)
@@ -0,0 +1,91 @@
+"""Unit tests for the deterministic decision table"""
+import json
+import pytest
+from app.schema.models import DisputeDecision, FraudAnalysis
+from app.tools.decision_table import DEFAULT_DECISION_RULES, DecisionTable, load_decision_rules
+
+
+PAYLOAD = {
+    "customer_id": "cust_456",
+    "transaction_id": "txn_789",
+    "amount": "150.00",
+    "currency": "USD",
+    "reason_code": "10.4",
+    "description": "Customer claims unauthorized transaction"
+}
+
+CLEAN = FraudAnalysis(has_suspicious_patterns=False, chargeback_rate=0.0, pattern_details=[], risk_score=0.0)
+
+
+def test_clean_card_absent_fraud_is_covered():
+    """Verify the default table decides a clean 10.4 claim without the LLM"""
+    table = DecisionTable(DEFAULT_DECISION_RULES, mode="active")
+
+    rule, decision = table.evaluate("disp_123", PAYLOAD, CLEAN, history_count=10)
+
+    assert rule.name == "card_absent_fraud_clean_history"
+    assert decision.decision == "accept"
+    assert decision.dispute_id == "disp_123"
+    assert "10.4" in decision.reasoning
+    assert table.get_stats()["coverage_rate"] == 1.0
+
+
+@pytest.mark.parametrize("payload,fraud,history", [
+    ({**PAYLOAD, "reason_code": "13.1"}, CLEAN, 10),
+    ({**PAYLOAD, "amount": "5000.00"}, CLEAN, 10),
+    (PAYLOAD, CLEAN, 0),
+    (PAYLOAD, None, 10),
+    (PAYLOAD, CLEAN.model_copy(update={"risk_score": 0.3}), 10),
+    (PAYLOAD, CLEAN.model_copy(update={"has_suspicious_patterns": True}), 10),
+])
+def test_anything_short_of_clean_goes_to_the_llm(payload, fraud, history):
+    """Verify uncovered disputes fall through and count against coverage"""
+    table = DecisionTable(DEFAULT_DECISION_RULES, mode="active")
+
+    assert table.evaluate("disp_123", payload, fraud, history) is None
+    assert table.get_stats()["coverage_rate"] == 0.0
+
+
+def test_shadow_mode_records_agreement():
+    """Verify shadow comparisons track agreement and keep disagreements"""
+    table = DecisionTable(DEFAULT_DECISION_RULES, mode="shadow")
+    rule, table_decision = table.evaluate("disp_123", PAYLOAD, CLEAN, history_count=10)
+    llm_decision = DisputeDecision(
+        dispute_id="disp_123",
+        decision="escalate",
+        confidence_score=0.6,
+        reasoning="Insufficient evidence to decide automatically",
+        supporting_rules=[],
+        recommended_action="Route to human review"
+    )
+
+    assert not table.active
+    assert table.record_shadow(rule, table_decision, table_decision)
+    assert not table.record_shadow(rule, table_decision, llm_decision)
+
+    stats = table.get_stats()
+    assert stats["shadow_agreement_rate"] == 0.5
+    assert stats["recent_disagreements"][0]["llm_decision"] == "escalate"
+
+
+def test_off_mode_and_rules_file(tmp_path):
+    """Verify off mode evaluates nothing and rules load from JSON"""
+    assert DecisionTable(DEFAULT_DECISION_RULES, mode="off").evaluate("d", PAYLOAD, CLEAN, 10) is None
+    with pytest.raises(ValueError):
+        DecisionTable(DEFAULT_DECISION_RULES, mode="sometimes")
+
+    path = tmp_path / "rules.json"
+    path.write_text(json.dumps([{
+        "name": "small_amount_reject",
+        "decision": "reject",
+        "confidence_score": 0.9,
+        "reasoning": "Reason code {reason_code} claim below the dispute minimum.",
+        "recommended_action": "Notify customer",
+        "reason_codes": ["13.1"],
+        "max_amount": 5.0
+    }]))
+    rules = load_decision_rules(str(path))
+
+    assert rules[0].reason_codes == ("13.1",)
+    rule, decision = DecisionTable(rules).evaluate("d", {**PAYLOAD, "reason_code": "13.1", "amount": "2.00"}, None, 0)
+    assert decision.decision == "reject"
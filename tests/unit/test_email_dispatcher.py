@@ -0,0 +1,159 @@
+"""Unit tests for the email outbox dispatcher"""
+import asyncio
+import pytest
+from contextlib import asynccontextmanager
+from datetime import datetime
+from decimal import Decimal
+from unittest.mock import AsyncMock, MagicMock, patch
+from app.schema.models import DisputeDecision
+from app.tools.email_dispatcher import EmailOutboxDispatcher
+from app.tools.unified_email_service import UnifiedEmailService
+
+
+def _outbox_row(email_id=1, attempts=1):
+    return {
+        "id": email_id,
+        "dispute_id": f"disp_{email_id}",
+        "to_email": "customer@example.com",
+        "customer_name": "Customer",
+        "decision": "accept",
+        "reasoning": "Merchant failed to provide evidence",
+        "amount": Decimal("150.00"),
+        "currency": "USD",
+        "attempts": attempts,
+        "created_at": datetime.utcnow()
+    }
+
+
+def test_retry_schedule_exhaustion():
+    """Verify retries follow the schedule and then dead-letter"""
+    dispatcher = EmailOutboxDispatcher(retry_schedule=(10, 60))
+
+    assert dispatcher.retry_delay(1) == 10
+    assert dispatcher.retry_delay(2) == 60
+    assert dispatcher.retry_delay(3) is None
+
+
+@pytest.mark.asyncio
+async def test_dispatch_marks_sent_retried_and_dead():
+    """Verify each claimed email is resolved according to its send result"""
+    dispatcher = EmailOutboxDispatcher(retry_schedule=(10,))
+    batch = [_outbox_row(1), _outbox_row(2, attempts=1), _outbox_row(3, attempts=2)]
+    results = [
+        {"success": True, "provider": "SendGrid"},
+        {"success": False, "error": "timeout"},
+        {"success": False, "error": "timeout"}
+    ]
+
+    with patch('app.db.email_outbox.claim_batch', new=AsyncMock(return_value=batch)), \
+         patch('app.db.email_outbox.mark_sent', new_callable=AsyncMock) as mark_sent, \
+         patch('app.db.email_outbox.mark_failed', new_callable=AsyncMock) as mark_failed, \
+         patch('app.tools.email_dispatcher.unified_email_service.send_batch',
+               new=AsyncMock(return_value=results)), \
+         patch('app.db.connection.db_pool.execute', new_callable=AsyncMock):
+        claimed = await dispatcher.dispatch_once()
+
+    assert claimed == 3
+    mark_sent.assert_awaited_once_with(1, "SendGrid")
+    retry_call, dead_call = mark_failed.await_args_list
+    assert retry_call.args[0] == 2 and retry_call.args[2] is not None
+    assert dead_call.args[0] == 3 and dead_call.args[2] is None
+    assert dispatcher.stats == {"batches": 1, "sent": 1, "retried": 1, "dead_lettered": 1}
+
+
+@pytest.mark.asyncio
+async def test_send_batch_falls_back_per_message():
+    """Verify only messages the first provider failed are sent by the next"""
+    primary = AsyncMock()
+    primary.send_batch = AsyncMock(return_value=[
+        {"success": True},
+        {"success": False, "error": "bounced"}
+    ])
+    secondary = AsyncMock(spec=["send_dispute_decision"])
+    secondary.send_dispute_decision = AsyncMock(return_value={"success": True})
+
+    service = UnifiedEmailService()
+    service.providers = [("Primary", primary), ("Secondary", secondary)]
+    messages = [
+        {
+            "to_email": f"c{i}@example.com",
+            "dispute_id": f"disp_{i}",
+            "customer_name": "Customer",
+            "decision": "accept",
+            "reasoning": "Merchant failed to provide evidence",
+            "amount": 150.0,
+            "currency": "USD"
+        }
+        for i in range(2)
+    ]
+
+    results = await service.send_batch(messages)
+
+    assert [r["provider"] for r in results] == ["Primary", "Secondary"]
+    secondary.send_dispute_decision.assert_awaited_once_with(**messages[1])
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("hedge", [False, True])
+async def test_dispatch_fails_over_from_a_hanging_batch_provider(hedge):
+    """Verify outbox sends are bounded by the provider timeout and delivered by the next provider"""
+    async def hang(messages):
+        await asyncio.sleep(10)
+
+    primary = AsyncMock()
+    primary.send_batch = AsyncMock(side_effect=hang)
+    secondary = AsyncMock(spec=["send_dispute_decision"])
+    secondary.send_dispute_decision = AsyncMock(return_value={"success": True})
+
+    service = UnifiedEmailService()
+    service.providers = [("Primary", primary), ("Secondary", secondary)]
+    service.provider_timeout = 0.05
+    service.hedge_enabled = hedge
+    # Primary stays first in the ranking, with a hedge delay well inside the timeout
+    for _ in range(UnifiedEmailService.MIN_SAMPLES):
+        service._health_for("Primary").record(True, 0.01)
+        service._health_for("Secondary").record(True, 0.02)
+    dispatcher = EmailOutboxDispatcher()
+
+    with patch('app.tools.email_dispatcher.unified_email_service', service), \
+         patch('app.db.email_outbox.claim_batch', new=AsyncMock(return_value=[_outbox_row(1), _outbox_row(2)])), \
+         patch('app.db.email_outbox.mark_sent', new_callable=AsyncMock) as mark_sent, \
+         patch('app.db.email_outbox.mark_failed', new_callable=AsyncMock) as mark_failed, \
+         patch('app.db.connection.db_pool.execute', new_callable=AsyncMock):
+        claimed = await asyncio.wait_for(dispatcher.dispatch_once(), 1)
+
+    assert claimed == 2
+    assert [c.args for c in mark_sent.await_args_list] == [(1, "Secondary"), (2, "Secondary")]
+    mark_failed.assert_not_awaited()
+    assert service.get_provider_stats()["hedging"]["won"] == (1 if hedge else 0)
+
+
+@pytest.mark.asyncio
+async def test_actioned_decision_and_email_share_one_transaction(sample_dispute_state):
+    """Verify the decision record and its outbox row are written on the same transaction"""
+    from app.agents import dispute_graph
+
+    conn = MagicMock()
+    conn.execute = AsyncMock()
+
+    @asynccontextmanager
+    async def transaction():
+        yield conn
+
+    decision = DisputeDecision(
+        dispute_id="disp_123",
+        decision="accept",
+        confidence_score=0.95,
+        reasoning="Card-absent fraud with no prior chargebacks",
+        supporting_rules=["Visa 10.4"],
+        recommended_action="Refund customer"
+    )
+    with patch.object(dispute_graph.db_pool, "transaction", transaction), \
+         patch.object(dispute_graph.audit_logger, "log_node_entry", new_callable=AsyncMock), \
+         patch.object(dispute_graph.adjudicator, "adjudicate", AsyncMock(return_value=(decision, "small"))):
+        update = await dispute_graph.adjudication_node(sample_dispute_state)
+
+    assert "email_queued" in update["actions_taken"]
+    statements = [call.args[0] for call in conn.execute.await_args_list]
+    assert len(statements) == 2
+    assert "audit_log" in statements[0] and "email_outbox" in statements[1]
@@ -0,0 +1,60 @@
+"""Unit tests for the precompiled email template renderer"""
+from app.tools.email_templates import EmailTemplateRenderer
+
+
+def _message(decision="accept", reasoning="Merchant failed to respond"):
+    return {
+        "dispute_id": "disp_123",
+        "customer_name": "Asha <Admin>",
+        "decision": decision,
+        "reasoning": reasoning,
+        "amount": 1234.5,
+        "currency": "INR"
+    }
+
+
+def test_decision_selects_template():
+    """Verify accept, reject and escalations use their own templates"""
+    renderer = EmailTemplateRenderer()
+
+    assert 'decision-box approved' in renderer.render(**_message("accept")).html
+    assert 'decision-box rejected' in renderer.render(**_message("reject")).html
+    assert 'decision-box review' in renderer.render(**_message("under_review")).html
+    assert 'decision-box review' in renderer.render(**_message("escalate")).html
+
+
+def test_escalation_keeps_its_own_heading():
+    """Verify a confident escalation is labelled ESCALATE, not sent to specialist review"""
+    renderer = EmailTemplateRenderer()
+
+    escalated = renderer.render(**_message("escalate"))
+    reviewed = renderer.render(**_message("under_review"))
+
+    assert "Decision: ESCALATE" in escalated.html
+    assert "Decision: ESCALATE" in escalated.text
+    assert "Your dispute has been processed." in escalated.text
+    assert "Decision: UNDER_REVIEW" in reviewed.html
+
+
+def test_render_fills_and_escapes_fields():
+    """Verify fields are substituted and HTML-escaped in the HTML body only"""
+    rendered = EmailTemplateRenderer().render(**_message())
+
+    assert rendered.subject == "Dispute Resolution - disp_123"
+    assert "INR 1,234.50" in rendered.html
+    assert "Asha &lt;Admin&gt;" in rendered.html
+    assert "Asha <Admin>" in rendered.text
+    assert "$" not in rendered.html
+
+
+def test_render_bulk_groups_by_template():
+    """Verify bulk mode shares one body per template with per-message substitutions"""
+    renderer = EmailTemplateRenderer()
+    messages = [_message("accept"), _message("reject"), _message("accept", "Second")]
+
+    groups = {g.kind: g for g in renderer.render_bulk(messages)}
+
+    assert groups["decision"].indices == [0, 2]
+    assert groups["rejection"].indices == [1]
+    assert "-reasoning-" in groups["decision"].template.html
+    assert groups["decision"].substitutions[1]["-reasoning-"] == "Second"
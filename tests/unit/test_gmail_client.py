@@ -0,0 +1,84 @@
+"""Unit tests for batched, non-blocking Gmail sends"""
+import asyncio
+import threading
+from datetime import datetime, timedelta
+import pytest
+from unittest.mock import MagicMock
+
+pytest.importorskip("googleapiclient")
+
+from app.tools.gmail_client import GmailClient
+
+
+class FakeBatch:
+    """Stands in for a googleapiclient BatchHttpRequest"""
+
+    def __init__(self, callback, executed):
+        self.callback = callback
+        self.executed = executed
+        self.requests = []
+
+    def add(self, request, request_id):
+        self.requests.append((request_id, request))
+
+    def execute(self):
+        self.executed.append((threading.current_thread().name, len(self.requests)))
+        for request_id, _ in self.requests:
+            self.callback(request_id, {"id": f"msg_{request_id}"}, None)
+
+
+@pytest.fixture
+def gmail():
+    client = GmailClient(batch_window=0.05)
+    executed = []
+    client.service = MagicMock()
+    client.service.new_batch_http_request.side_effect = (
+        lambda callback: FakeBatch(callback, executed)
+    )
+    client.executed = executed
+    return client
+
+
+@pytest.mark.asyncio
+async def test_concurrent_sends_share_one_batch_request(gmail):
+    """Verify sends queued together go out in a single batch off the event loop"""
+    results = await asyncio.gather(*[
+        gmail.send_email(f"c{i}@example.com", "Subject", "Body") for i in range(10)
+    ])
+    await gmail.close()
+
+    assert all(r["success"] for r in results)
+    assert len({r["message_id"] for r in results}) == 10
+    assert len(gmail.executed) == 1
+    thread_name, size = gmail.executed[0]
+    assert size == 10
+    assert thread_name.startswith("gmail")
+
+
+@pytest.mark.asyncio
+async def test_batch_size_is_capped(gmail):
+    """Verify large bursts are split into batches of at most batch_size"""
+    gmail.batch_size = 4
+
+    await asyncio.gather(*[
+        gmail.send_email(f"c{i}@example.com", "Subject", "Body") for i in range(10)
+    ])
+    await gmail.close()
+
+    assert [size for _, size in gmail.executed] == [4, 4, 2]
+
+
+@pytest.mark.asyncio
+async def test_refresh_loop_backs_off_when_expiry_does_not_move(gmail):
+    """Verify an expired token without a refresh token does not busy-spin the refresh loop"""
+    gmail.refresh_retry = 0.05
+    gmail.creds = MagicMock(refresh_token=None, expiry=datetime.utcnow() - timedelta(minutes=1))
+    calls = []
+    gmail.refresh_credentials = lambda: calls.append(1)
+
+    task = asyncio.create_task(gmail._refresh_loop())
+    await asyncio.sleep(0.12)
+    task.cancel()
+    await gmail.close()
+
+    assert 1 <= len(calls) <= 3
@@ -0,0 +1,33 @@
+"""Unit tests for the incremental JSON object parser"""
+import json
+import pytest
+from app.tools.json_stream import IncrementalJSONObjectParser
+
+
+def test_fields_complete_as_they_stream():
+    """Verify each top-level field is reported once its value ends"""
+    parser = IncrementalJSONObjectParser()
+
+    assert parser.feed('Sure: {"decision": "acc') == {}
+    assert parser.feed('ept", "rules": ["a, b", {"x": "}"}]') == {"decision": "accept"}
+    assert parser.feed(', "score": 0.9}') == {"rules": ["a, b", {"x": "}"}], "score": 0.9}
+    assert parser.complete
+    assert json.loads(parser.object_text)["score"] == 0.9
+
+
+def test_escaped_quotes_and_trailing_text():
+    """Verify escaped quotes stay inside strings and text after the object is ignored"""
+    parser = IncrementalJSONObjectParser()
+
+    parser.feed('{"reasoning": "said \\"no\\", twice"} trailing {"x": 1}')
+
+    assert parser.fields == {"reasoning": 'said "no", twice'}
+    assert parser.object_text == '{"reasoning": "said \\"no\\", twice"}'
+
+
+def test_malformed_value_raises():
+    """Verify a completed value that is not JSON raises immediately"""
+    parser = IncrementalJSONObjectParser()
+
+    with pytest.raises(json.JSONDecodeError):
+        parser.feed('{"decision": accept,')
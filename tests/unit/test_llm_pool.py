@@ -0,0 +1,201 @@
+"""Unit tests for the load-balanced LLM endpoint pool"""
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from app.tools.llm_pool import LLMEndpointPool
+
+
+def _mock_llm(result="ok"):
+    llm = MagicMock()
+    llm.ainvoke = AsyncMock(return_value=MagicMock(content=result))
+    llm.bind.return_value = llm
+    return llm
+
+
+@pytest.mark.asyncio
+async def test_least_outstanding_and_in_flight_cap():
+    """Verify calls spread to the least-loaded endpoint and wait at the cap"""
+    pool = LLMEndpointPool({"http://a": _mock_llm(), "http://b": _mock_llm()}, max_in_flight=1)
+
+    first = await pool.acquire()
+    second = await pool.acquire()
+    assert {first.url, second.url} == {"http://a", "http://b"}
+
+    waiter = asyncio.create_task(pool.acquire())
+    await asyncio.sleep(0.01)
+    assert not waiter.done()
+
+    await pool.release(first, True, 0.1)
+    third = await asyncio.wait_for(waiter, 1)
+    assert third is first
+
+
+@pytest.mark.asyncio
+async def test_failing_endpoint_is_ejected():
+    """Verify repeated failures eject an endpoint so traffic moves elsewhere"""
+    bad = _mock_llm()
+    bad.ainvoke.side_effect = ConnectionError("refused")
+    good = _mock_llm()
+    pool = LLMEndpointPool({"http://bad": bad, "http://good": good}, eject_after=2)
+
+    for _ in range(4):
+        try:
+            await pool.ainvoke("prompt")
+        except ConnectionError:
+            pass
+
+    state = {endpoint["url"]: endpoint for endpoint in pool.get_state()["endpoints"]}
+    assert state["http://bad"]["ejected"] is True
+    assert bad.ainvoke.await_count == 2
+
+    for _ in range(3):
+        await pool.ainvoke("prompt")
+    assert bad.ainvoke.await_count == 2
+    assert pool.get_state()["in_flight"] == 0
+
+
+@pytest.mark.asyncio
+async def test_bound_pool_uses_bound_clients():
+    """Verify bind() options are applied to every endpoint's client"""
+    llm = _mock_llm()
+    pool = LLMEndpointPool({"http://a": llm})
+
+    bound = pool.bind(format={"type": "object"})
+    await bound.ainvoke("prompt")
+
+    llm.bind.assert_called_once_with(format={"type": "object"})
+    assert pool.endpoints[0].total_requests == 1
+
+
+@pytest.mark.asyncio
+async def test_deadline_trips_circuit_breaker():
+    """Verify a hung server fails fast at the deadline and opens the breaker"""
+    from app.tools.circuit_breaker import CircuitBreaker, CircuitBreakerConfig, CircuitBreakerError
+    from app.tools.llm_pool import LLMDeadlineExceeded
+
+    hung = _mock_llm()
+
+    async def never_returns(prompt):
+        await asyncio.sleep(10)
+
+    hung.ainvoke.side_effect = never_returns
+    breaker = CircuitBreaker("llm_test", CircuitBreakerConfig(failure_threshold=2, timeout=60))
+    pool = LLMEndpointPool({"http://hung": hung}, breaker=breaker, call_timeout=0.05)
+
+    for _ in range(2):
+        with pytest.raises(LLMDeadlineExceeded):
+            await pool.ainvoke("prompt")
+
+    with pytest.raises(CircuitBreakerError):
+        await pool.ainvoke("prompt")
+    assert pool.stats["deadlines_exceeded"] == 2
+    assert pool.get_state()["in_flight"] == 0
+
+
+@pytest.mark.asyncio
+async def test_hedge_to_second_endpoint_after_p95():
+    """Verify a call slower than the primary's p95 is answered by the hedge"""
+    slow = _mock_llm("slow")
+    fast = _mock_llm("fast")
+
+    async def slow_answer(prompt):
+        await asyncio.sleep(1)
+        return MagicMock(content="slow")
+
+    slow.ainvoke.side_effect = slow_answer
+    pool = LLMEndpointPool({"http://slow": slow, "http://fast": fast}, hedge=True, hedge_min_samples=5)
+    for _ in range(5):
+        pool.endpoints[0].health.record(True, 0.01)
+    # Keep the fast endpoint busier so the slow one is chosen as primary
+    pool.endpoints[1].in_flight = 1
+
+    result = await pool.ainvoke("prompt")
+
+    assert result.content == "fast"
+    assert pool.stats == {"hedges_sent": 1, "hedges_won": 1, "deadlines_exceeded": 0}
+    # The cancelled loser is not counted against the slow endpoint
+    assert pool.endpoints[0].health.sample_count == 5
+    assert pool.endpoints[0].in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_stream_closed_early_releases_slot():
+    """Verify stopping a stream early frees the endpoint and counts as success"""
+    llm = _mock_llm()
+
+    async def astream(prompt):
+        for i in range(100):
+            yield MagicMock(content=str(i))
+
+    llm.astream = astream
+    pool = LLMEndpointPool({"http://a": llm})
+
+    stream = pool.astream("prompt")
+    async for chunk in stream:
+        break
+    await stream.aclose()
+
+    assert pool.get_state()["in_flight"] == 0
+    assert pool.endpoints[0].health.success_rate() == 1.0
+
+
+@pytest.mark.asyncio
+async def test_cancelled_calls_do_not_eject_endpoint():
+    """Verify calls and streams cancelled from outside (deadline, disconnect) leave endpoint health alone"""
+    llm = _mock_llm()
+
+    async def slow_answer(prompt):
+        await asyncio.sleep(10)
+
+    async def slow_stream(prompt):
+        yield MagicMock(content="{")
+        await asyncio.sleep(10)
+        yield MagicMock(content="}")
+
+    async def consume_stream():
+        async for _ in pool.astream("prompt"):
+            pass
+
+    llm.ainvoke.side_effect = slow_answer
+    llm.astream = slow_stream
+    pool = LLMEndpointPool({"http://a": llm}, eject_after=2)
+
+    for _ in range(3):
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(pool.ainvoke("prompt"), 0.02)
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(consume_stream(), 0.02)
+
+    endpoint = pool.endpoints[0]
+    assert endpoint.consecutive_failures == 0
+    assert endpoint.health.sample_count == 0
+    assert not endpoint.ejected
+    assert endpoint.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_call_shapes_adapt_against_their_own_latency():
+    """Verify long calls are not judged against the no-load latency of short ones"""
+    from app.tools.concurrency_limiter import AdaptiveLimiter
+
+    llm = _mock_llm()
+
+    async def answer(prompt):
+        await asyncio.sleep(0.05 if prompt == "long" else 0.001)
+        return MagicMock(content="ok")
+
+    llm.ainvoke.side_effect = answer
+    pool = LLMEndpointPool({"http://a": llm}, max_in_flight=8)
+    short = pool.limited(AdaptiveLimiter("llm:test:short", initial_limit=8, max_limit=8, min_samples=3))
+    long = pool.limited(AdaptiveLimiter("llm:test:long", initial_limit=8, max_limit=8, min_samples=3))
+
+    for _ in range(5):
+        await short.ainvoke("short")
+    for _ in range(5):
+        await long.ainvoke("long")
+
+    assert pool.limited(AdaptiveLimiter("llm:test:short")).limiter is short.limiter
+    assert short.limiter.stats.limit_decreases == 0
+    assert long.limiter.stats.limit_decreases == 0
+    assert long.bind(format="json").limiter is long.limiter
+    assert set(pool.get_state()["shape_limiters"]) == {"llm:test:short", "llm:test:long"}
@@ -0,0 +1,88 @@
+"""Unit tests for the load-shedding degradation ladder"""
+from app.tools.load_shedder import DegradationTrigger, LoadShedder, level_at_least
+
+
+TRIGGERS = [
+    DegradationTrigger("no_rewrite", queue_depth=10, p95_seconds=60.0),
+    DegradationTrigger("precomputed_rules", queue_depth=20, p95_seconds=120.0),
+    DegradationTrigger("human_review_only", queue_depth=40, p95_seconds=170.0)
+]
+
+
+def make_shedder(depth: dict, **kwargs) -> LoadShedder:
+    options = {"step_interval": 0.0, "recovery_interval": 0.0, **kwargs}
+    return LoadShedder(TRIGGERS, queue_depth=lambda: depth["value"], **options)
+
+
+def test_levels_switch_on_one_at_a_time():
+    """Verify a load spike steps through the ladder instead of jumping to the end"""
+    depth = {"value": 100}
+    shedder = make_shedder(depth)
+
+    assert shedder.evaluate() == "no_rewrite"
+    assert shedder.evaluate() == "precomputed_rules"
+    assert shedder.evaluate() == "human_review_only"
+    assert shedder.evaluate() == "human_review_only"
+
+    depth["value"] = 15
+    assert shedder.evaluate() == "precomputed_rules"
+    assert shedder.evaluate() == "no_rewrite"
+    assert shedder.evaluate() == "no_rewrite"
+    assert shedder.get_state()["transitions"] == 5
+
+
+def test_latency_slo_triggers_without_queue():
+    """Verify p95 end-to-end latency alone raises the level"""
+    shedder = make_shedder({"value": 0})
+    for _ in range(20):
+        shedder.record(90.0)
+
+    assert shedder.evaluate() == "no_rewrite"
+    assert shedder.evaluate() == "no_rewrite"
+    assert shedder.get_state()["p95_latency_ms"] == 90000.0
+
+
+def test_intervals_hold_the_level():
+    """Verify stepping up waits for step_interval and recovery for recovery_interval"""
+    depth = {"value": 100}
+    shedder = make_shedder(depth, step_interval=60.0, recovery_interval=60.0)
+    assert shedder.evaluate() == "normal"
+
+    shedder._changed_at -= 60.0
+    assert shedder.evaluate() == "no_rewrite"
+    depth["value"] = 0
+    assert shedder.evaluate() == "no_rewrite"
+
+
+def test_disabled_shedder_stays_normal():
+    """Verify the ladder can be switched off"""
+    shedder = make_shedder({"value": 100}, enabled=False)
+    assert shedder.evaluate() == "normal"
+
+
+def test_level_ordering():
+    """Verify each level keeps the cuts of the levels below it"""
+    assert level_at_least("human_review_only", "no_rewrite")
+    assert level_at_least("no_rewrite", "no_rewrite")
+    assert not level_at_least("no_rewrite", "precomputed_rules")
+    assert not level_at_least(None, "no_rewrite")
+
+
+def test_recovery_needs_continuous_calm():
+    """Verify a brief dip below the trigger does not step the level down"""
+    depth = {"value": 100}
+    shedder = make_shedder(depth, recovery_interval=60.0)
+    assert shedder.evaluate() == "no_rewrite"
+    shedder._changed_at -= 600.0
+
+    depth["value"] = 0
+    assert shedder.evaluate() == "no_rewrite"
+    shedder._calm_since -= 59.0
+    depth["value"] = 15
+    assert shedder.evaluate() == "no_rewrite"
+
+    # Calm starts over after load went back above the trigger
+    depth["value"] = 0
+    assert shedder.evaluate() == "no_rewrite"
+    shedder._calm_since -= 60.0
+    assert shedder.evaluate() == "normal"
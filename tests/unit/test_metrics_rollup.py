@@ -0,0 +1,120 @@
+"""Unit tests for minute-bucketed metrics rollups"""
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, patch
+from app.db.metrics_rollup import MetricsRollup
+
+
+def _rollup_row(**overrides):
+    row = {
+        "total_events": 10,
+        "decisions_made": 2,
+        "confidence_sum": 1.8,
+        "human_reviews": 1,
+        "rag_retrievals": 4,
+        "similarity_sum": 3.0,
+        "low_quality_retrievals": 1,
+        "high_quality_retrievals": 3
+    }
+    row.update(overrides)
+    return row
+
+
+def test_record_counts_events_in_current_bucket():
+    """Verify audit events update the matching counters"""
+    rollup = MetricsRollup()
+
+    rollup.record("adjudication_node", "node_entry")
+    rollup.record("adjudication_node", "decision_made", confidence_score=0.9)
+    rollup.record("legal_research_node", "rag_retrieval", average_similarity=0.5)
+    rollup.record("legal_research_node", "rag_retrieval", average_similarity=0.8)
+    rollup.record("human_review_node", "node_entry")
+
+    bucket = next(iter(rollup._pending.values()))
+    assert bucket.total_events == 5
+    assert bucket.decisions_made == 1
+    assert bucket.avg_confidence == pytest.approx(0.9)
+    assert bucket.human_reviews == 1
+    assert bucket.rag_retrievals == 2
+    assert bucket.low_quality_retrievals == 1
+    assert bucket.high_quality_retrievals == 1
+    assert bucket.avg_similarity == pytest.approx(0.65)
+
+
+@pytest.mark.asyncio
+async def test_flush_upserts_and_clears_pending():
+    """Verify flush writes one upsert per bucket"""
+    rollup = MetricsRollup()
+    rollup.record("action_node", "email_sent")
+
+    with patch('app.db.connection.db_pool.execute', new_callable=AsyncMock) as mock_execute:
+        await rollup.flush()
+
+    assert "ON CONFLICT (bucket)" in mock_execute.call_args_list[0][0][0]
+    assert rollup._pending == {}
+
+
+@pytest.mark.asyncio
+async def test_failed_flush_keeps_pending_buckets():
+    """Verify buckets are retained for the next flush when the database fails"""
+    rollup = MetricsRollup()
+    rollup.record("action_node", "email_sent")
+
+    with patch('app.db.connection.db_pool.execute', new_callable=AsyncMock) as mock_execute:
+        mock_execute.side_effect = RuntimeError("db down")
+        with pytest.raises(RuntimeError):
+            await rollup.flush()
+
+    assert sum(b.total_events for b in rollup._pending.values()) == 1
+
+
+@pytest.mark.asyncio
+async def test_concurrent_reads_share_one_query():
+    """Verify an expired cache entry is refreshed by a single caller"""
+    rollup = MetricsRollup(cache_ttl=60)
+
+    async def slow_fetchrow(*args):
+        await asyncio.sleep(0.01)
+        return _rollup_row()
+
+    with patch('app.db.connection.db_pool.fetchrow', side_effect=slow_fetchrow) as mock_fetchrow:
+        windows = await asyncio.gather(*[rollup.get_window(24) for _ in range(20)])
+        await rollup.get_window(24)
+
+    assert mock_fetchrow.call_count == 1
+    assert all(w.total_events == 10 for w in windows)
+    assert windows[0].avg_confidence == pytest.approx(0.9)
+
+
+@pytest.mark.asyncio
+async def test_window_includes_unflushed_events():
+    """Verify this worker's pending events are visible before they are flushed"""
+    rollup = MetricsRollup()
+    rollup.record("adjudication_node", "decision_made", confidence_score=0.5)
+
+    with patch('app.db.connection.db_pool.fetchrow', new_callable=AsyncMock) as mock_fetchrow:
+        mock_fetchrow.return_value = _rollup_row()
+        window = await rollup.get_window(24)
+
+    assert window.total_events == 11
+    assert window.decisions_made == 3
+
+
+@pytest.mark.asyncio
+async def test_flush_invalidates_cached_window():
+    """Verify counts do not dip between a flush and the cached window expiring"""
+    rollup = MetricsRollup(cache_ttl=60)
+    rollup.record("adjudication_node", "decision_made", confidence_score=0.5)
+
+    with patch('app.db.connection.db_pool.fetchrow', new_callable=AsyncMock) as mock_fetchrow, \
+         patch('app.db.connection.db_pool.execute', new_callable=AsyncMock):
+        mock_fetchrow.return_value = _rollup_row()
+        assert (await rollup.get_window(24)).total_events == 11
+
+        # The flushed event is now in the table
+        mock_fetchrow.return_value = _rollup_row(total_events=11)
+        await rollup.flush()
+        window = await rollup.get_window(24)
+
+    assert window.total_events == 11
+    assert mock_fetchrow.call_count == 2
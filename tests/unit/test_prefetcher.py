@@ -0,0 +1,99 @@
+"""Unit tests for enqueue-time prefetch"""
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from app.schema.models import RetrievalResult
+from app.tools.concurrency_limiter import AdaptiveLimiter
+from app.tools.prefetcher import Prefetcher
+from app.tools.rag_retriever import RAGRetriever
+
+
+PAYLOAD = {
+    "customer_id": "cust_456",
+    "amount": "150.00",
+    "reason_code": "10.4",
+    "description": "Customer claims unauthorized transaction"
+}
+
+RESULT = RetrievalResult(documents=[], query="q", average_similarity=0.0)
+
+
+def make_prefetcher(history=None, retrieval=None, **limits) -> Prefetcher:
+    enrichment = MagicMock()
+    enrichment.fetch_history = history or AsyncMock(return_value=[])
+    retriever = MagicMock()
+    retriever.retrieve = retrieval or AsyncMock(return_value=RESULT)
+    retriever.initial_query = RAGRetriever.initial_query
+    return Prefetcher(
+        enrichment,
+        retriever,
+        AdaptiveLimiter("enrichment", initial_limit=limits.get("enrichment", 4)),
+        AdaptiveLimiter("chroma", initial_limit=limits.get("chroma", 4))
+    )
+
+
+@pytest.mark.asyncio
+async def test_prefetched_results_are_taken_once():
+    """Verify nodes get the parked results, then fall back to their own calls"""
+    prefetcher = make_prefetcher()
+    prefetcher.prefetch("disp_1", PAYLOAD)
+    await asyncio.sleep(0)
+
+    assert await prefetcher.take_history("disp_1") == []
+    assert await prefetcher.take_retrieval("disp_1") is RESULT
+    assert await prefetcher.take_history("disp_1") is None
+
+    stats = prefetcher.get_stats()
+    assert stats["used"] == 2
+    assert stats["hidden_rate"] == 1.0
+    assert stats["parked"] == 0
+    prefetcher.retriever.retrieve.assert_awaited_once_with(RAGRetriever.initial_query(PAYLOAD))
+
+
+@pytest.mark.asyncio
+async def test_in_flight_prefetch_is_awaited_not_repeated():
+    """Verify a node joins a still-running prefetch"""
+    gate = asyncio.Event()
+
+    async def slow_history(customer_id, years):
+        await gate.wait()
+        return ["tx"]
+
+    prefetcher = make_prefetcher(history=AsyncMock(side_effect=slow_history))
+    prefetcher.prefetch("disp_1", PAYLOAD)
+    take = asyncio.create_task(prefetcher.take_history("disp_1"))
+    await asyncio.sleep(0.01)
+    gate.set()
+
+    assert await take == ["tx"]
+    assert prefetcher.get_stats()["ready_when_used"] == 0
+
+
+@pytest.mark.asyncio
+async def test_busy_downstream_and_failures_are_skipped():
+    """Verify no prefetch competes with queued work, and failures fall back"""
+    prefetcher = make_prefetcher(retrieval=AsyncMock(side_effect=RuntimeError("chroma down")))
+    prefetcher.enrichment_limiter.limit = 0
+    prefetcher.enrichment_limiter.min_limit = 0
+    prefetcher.prefetch("disp_1", PAYLOAD)
+
+    assert await prefetcher.take_history("disp_1") is None
+    assert await prefetcher.take_retrieval("disp_1") is None
+    stats = prefetcher.get_stats()
+    assert stats["skipped_busy"] == 1
+    assert stats["failures"] == 1
+
+
+@pytest.mark.asyncio
+async def test_discard_cancels_unused_prefetch():
+    """Verify discarded disputes stop their in-flight I/O"""
+    gate = asyncio.Event()
+    prefetcher = make_prefetcher(history=AsyncMock(side_effect=lambda *a, **k: gate.wait()))
+    prefetcher.prefetch("disp_1", PAYLOAD)
+    task = prefetcher._entries["disp_1"].history
+
+    prefetcher.discard("disp_1")
+    await asyncio.sleep(0)
+
+    assert task.cancelled()
+    assert await prefetcher.take_history("disp_1") is None
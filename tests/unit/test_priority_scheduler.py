@@ -0,0 +1,104 @@
+"""Unit tests for earliest-deadline-first dispute admission"""
+import asyncio
+import pytest
+from datetime import datetime, timedelta, timezone
+from app.tools.priority_scheduler import PriorityScheduler
+
+
+def payload(days_ago: int, amount: str = "100.00", sla_class=None) -> dict:
+    transaction_date = datetime.now(timezone.utc) - timedelta(days=days_ago)
+    return {
+        "amount": amount,
+        "transaction_date": transaction_date.strftime("%Y-%m-%d"),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "sla_class": sla_class
+    }
+
+
+async def admit_in_order(scheduler: PriorityScheduler, disputes: dict) -> list:
+    """Fill the only slot, queue the disputes, then release one at a time"""
+    order = []
+    await scheduler.acquire("blocker", payload(0))
+
+    async def run(dispute_id, dispute_payload):
+        async with scheduler.slot(dispute_id, dispute_payload):
+            order.append(dispute_id)
+
+    tasks = [asyncio.create_task(run(*item)) for item in disputes.items()]
+    await asyncio.sleep(0)
+    scheduler.release()
+    await asyncio.gather(*tasks)
+    return order
+
+
+def test_priority_classes():
+    """Verify deadline, amount and SLA each raise a dispute's class"""
+    scheduler = PriorityScheduler()
+    assert scheduler.priority(payload(115))[1] == "near_deadline"
+    assert scheduler.priority(payload(10, amount="25000.00"))[1] == "high_value"
+    assert scheduler.priority(payload(10, sla_class="gold"))[1] == "priority_sla"
+    assert scheduler.priority(payload(10))[1] == "standard"
+
+
+@pytest.mark.asyncio
+async def test_admits_earliest_effective_deadline_first():
+    """Verify near-deadline and high-value disputes go before routine ones"""
+    scheduler = PriorityScheduler(max_active=1)
+    order = await admit_in_order(scheduler, {
+        "routine": payload(10),
+        "platinum": payload(10, sla_class="platinum"),
+        "high_value": payload(20, amount="25000.00"),
+        "near_deadline": payload(115)
+    })
+
+    assert order == ["near_deadline", "high_value", "platinum", "routine"]
+    stats = scheduler.get_stats()
+    assert stats["admitted"] == 5
+    assert stats["active"] == 0
+    assert stats["classes"]["standard"]["p95_queue_wait_ms"] is not None
+
+
+@pytest.mark.asyncio
+async def test_long_waiting_dispute_is_not_starved():
+    """Verify max_wait promotes the oldest dispute over more urgent arrivals"""
+    scheduler = PriorityScheduler(max_active=1, max_wait=0.0)
+    order = await admit_in_order(scheduler, {
+        "routine": payload(10),
+        "near_deadline": payload(115)
+    })
+
+    assert order == ["routine", "near_deadline"]
+    assert scheduler.get_stats()["starvation_promotions"] == 2
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_gives_up_its_place():
+    """Verify a cancelled dispute is skipped and frees no slot it never held"""
+    scheduler = PriorityScheduler(max_active=1)
+    await scheduler.acquire("blocker", payload(0))
+    waiter = asyncio.create_task(scheduler.acquire("cancelled", payload(115)))
+    await asyncio.sleep(0)
+    waiter.cancel()
+    await asyncio.sleep(0)
+
+    assert scheduler.get_stats()["waiting"] == 0
+    scheduler.release()
+    assert scheduler.active == 0
+
+
+@pytest.mark.asyncio
+async def test_release_in_the_same_tick_as_a_cancel_skips_the_waiter():
+    """Verify a waiter cancelled just before release is not admitted and leaks no slot"""
+    scheduler = PriorityScheduler(max_active=1)
+    await scheduler.acquire("blocker", payload(0))
+    cancelled = asyncio.create_task(scheduler.acquire("cancelled", payload(115)))
+    await asyncio.sleep(0)
+
+    cancelled.cancel()
+    scheduler.release()
+    with pytest.raises(asyncio.CancelledError):
+        await cancelled
+
+    assert scheduler.active == 0
+    assert scheduler.get_stats()["waiting"] == 0
+    assert await asyncio.wait_for(scheduler.acquire("next", payload(0)), 1) == "standard"
@@ -0,0 +1,54 @@
+"""Unit tests for the token-budgeted rules context builder"""
+from app.tools.prompt_builder import RulesContextBuilder, estimate_tokens
+
+
+OVERLAP = "Chargebacks for reason code 10.4 require the cardholder to deny participation."
+
+
+def _rule(*sentences):
+    return {"content": " ".join(sentences), "similarity_score": 0.8}
+
+
+def test_overlapping_sentences_are_deduped():
+    """Verify text repeated across overlapping chunks is included once"""
+    rules = [
+        _rule("The issuer must certify the fraud report was filed.", OVERLAP),
+        _rule(OVERLAP, "Merchants may remedy with compelling evidence of prior use.")
+    ]
+
+    context = RulesContextBuilder().build(rules, "10.4 fraud card-absent")
+
+    assert context.text.count("deny participation") == 1
+    assert context.sentences_deduped == 1
+    assert context.rules_used == 2
+
+
+def test_rules_trimmed_to_most_relevant_sentences():
+    """Verify each rule keeps its sentences sharing the most dispute terms"""
+    rule = _rule(
+        "Regional settlement windows differ by currency and region.",
+        "Card-absent fraud claims need a fraud report from the issuer.",
+        "Interchange reimbursement fees are published quarterly for members.",
+        "Acquirers may present compelling evidence for card-absent fraud."
+    )
+
+    context = RulesContextBuilder(max_sentences_per_rule=2).build([rule], "card-absent fraud report")
+
+    assert "fraud report from the issuer" in context.text
+    assert "compelling evidence" in context.text
+    assert "Interchange" not in context.text
+    assert context.sentences_trimmed == 2
+
+
+def test_token_budget_enforced():
+    """Verify the context never exceeds its token budget"""
+    rules = [
+        _rule(*(f"Rule {i} sentence {j} describes dispute handling requirements in detail." for j in range(6)))
+        for i in range(10)
+    ]
+
+    context = RulesContextBuilder(token_budget=100, max_sentences_per_rule=6).build(rules, "dispute")
+
+    assert 0 < context.tokens <= 100
+    assert context.tokens == estimate_tokens(context.text)
+    assert context.rules_used < 10
@@ -0,0 +1,127 @@
+"""Unit tests for decision-first adjudication and deferred reasoning"""
+import json
+import time
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+from app.tools.adjudicator import DEFERRED_REASONING, Adjudicator, decision_json_schema
+from app.tools.deadline import deadline_timeout, dispute_deadline
+from app.tools.reasoning_writer import ReasoningWriter
+
+
+PAYLOAD = {
+    "customer_id": "cust_456",
+    "transaction_id": "txn_789",
+    "amount": "150.00",
+    "currency": "USD",
+    "reason_code": "10.4",
+    "description": "Customer claims unauthorized transaction"
+}
+
+VERDICT = {
+    "decision": "accept",
+    "confidence_score": 0.92,
+    "supporting_rules": ["Visa 10.4"],
+    "recommended_action": "Refund customer"
+}
+
+
+@pytest.mark.asyncio
+async def test_verdict_only_generation_defers_reasoning():
+    """Verify decision-first mode asks only for the verdict"""
+    llm = MagicMock()
+    llm.bind.return_value = llm
+    llm.ainvoke = AsyncMock(return_value=MagicMock(content=json.dumps(VERDICT)))
+    adjudicator = Adjudicator(llm, verdict_only=True)
+
+    decision = await adjudicator.adjudicate("disp_123", PAYLOAD, "", "")
+
+    assert "reasoning" not in decision_json_schema(include_reasoning=False)["properties"]
+    assert "reasoning" not in adjudicator.build_prompt("disp_123", PAYLOAD, "", "", [])[0].content
+    assert decision.decision == "accept"
+    assert decision.reasoning == DEFERRED_REASONING
+
+
+@pytest.mark.asyncio
+async def test_reasoning_attached_to_audit_review_and_outbox():
+    """Verify generated reasoning reaches every record holding the placeholder"""
+    llm = MagicMock()
+    llm.ainvoke = AsyncMock(return_value=MagicMock(content="The card-absent fraud claim meets Visa 10.4."))
+    writer = ReasoningWriter(llm)
+    decision = {**VERDICT, "dispute_id": "disp_123", "reasoning": DEFERRED_REASONING}
+
+    with patch('app.tools.reasoning_writer.audit_logger.log_reasoning', new_callable=AsyncMock) as log_reasoning, \
+         patch('app.tools.reasoning_writer.update_review_reasoning', new_callable=AsyncMock) as update_review, \
+         patch('app.tools.reasoning_writer.attach_reasoning', new=AsyncMock(return_value=1)) as attach:
+        writer.prepare("disp_123", PAYLOAD, "Rule 1: ...", "", decision)
+        assert writer.is_pending("disp_123")
+        assert writer.start("disp_123")
+        await writer.stop()
+
+    reasoning = "The card-absent fraud claim meets Visa 10.4."
+    assert log_reasoning.await_args.args[:2] == ("disp_123", reasoning)
+    update_review.assert_awaited_once_with("disp_123", reasoning)
+    attach.assert_awaited_once_with("disp_123", DEFERRED_REASONING, reasoning)
+    assert writer.get_stats()["emails_released"] == 1
+
+
+@pytest.mark.asyncio
+async def test_failed_reasoning_still_releases_held_emails():
+    """Verify a failed generation does not leave emails held"""
+    llm = MagicMock()
+    llm.ainvoke = AsyncMock(side_effect=TimeoutError("deadline"))
+    writer = ReasoningWriter(llm)
+
+    with patch('app.tools.reasoning_writer.audit_logger.log_error', new_callable=AsyncMock), \
+         patch('app.tools.reasoning_writer.attach_reasoning', new=AsyncMock(return_value=1)) as attach:
+        writer.prepare("disp_123", PAYLOAD, "", "", {**VERDICT, "reasoning": DEFERRED_REASONING})
+        writer.start("disp_123")
+        await writer.stop()
+
+    attach.assert_awaited_once_with("disp_123", DEFERRED_REASONING, DEFERRED_REASONING)
+    assert writer.get_stats()["failed"] == 1
+
+
+@pytest.mark.asyncio
+async def test_reasoning_runs_outside_the_dispute_deadline():
+    """Verify reasoning started by a node near its deadline gets its own budget"""
+    seen = []
+
+    async def ainvoke(prompt):
+        seen.append(deadline_timeout(None))
+        return MagicMock(content="The card-absent fraud claim meets Visa 10.4.")
+
+    llm = MagicMock()
+    llm.ainvoke = ainvoke
+    writer = ReasoningWriter(llm, reasoning_timeout=60.0)
+
+    with patch('app.tools.reasoning_writer.audit_logger.log_reasoning', new_callable=AsyncMock), \
+         patch('app.tools.reasoning_writer.update_review_reasoning', new_callable=AsyncMock), \
+         patch('app.tools.reasoning_writer.attach_reasoning', new=AsyncMock(return_value=1)):
+        writer.prepare("disp_123", PAYLOAD, "", "", {**VERDICT, "reasoning": DEFERRED_REASONING})
+        token = dispute_deadline.set(time.time() + 0.01)
+        try:
+            writer.start("disp_123")
+        finally:
+            dispute_deadline.reset(token)
+        await writer.stop()
+
+    assert seen and seen[0] > 30
+    assert writer.get_stats()["completed"] == 1
+
+
+@pytest.mark.asyncio
+async def test_failed_dispute_still_starts_prepared_reasoning(sample_dispute_state):
+    """Verify a dispute whose terminal node never ran does not strand its prepared job"""
+    from app.agents import dispute_graph
+
+    dispute_graph.reasoning_writer.prepare("disp_123", PAYLOAD, "", "", {**VERDICT, "reasoning": DEFERRED_REASONING})
+
+    with patch.object(dispute_graph.settings, 'execution_mode', 'graph'), \
+         patch.object(dispute_graph.dispute_graph, 'ainvoke', new=AsyncMock(side_effect=RuntimeError("boom"))), \
+         patch.object(dispute_graph.reasoning_writer, '_write', new_callable=AsyncMock) as write:
+        with pytest.raises(RuntimeError):
+            await dispute_graph.process_dispute(dict(sample_dispute_state))
+        await dispute_graph.reasoning_writer.stop()
+
+    assert not dispute_graph.reasoning_writer.is_pending("disp_123")
+    assert write.await_args.args[0].dispute_id == "disp_123"
@@ -0,0 +1,78 @@
+"""Unit tests for the shared SMTP connection pool"""
+import asyncio
+import smtplib
+import threading
+import pytest
+from email.mime.text import MIMEText
+from unittest.mock import MagicMock, patch
+from app.tools.smtp_pool import SMTPConnectionPool
+
+
+@pytest.fixture
+def smtp_factory():
+    """Patch smtplib.SMTP with mocks and record every connection opened"""
+    connections = []
+
+    def factory(*args, **kwargs):
+        conn = MagicMock()
+        connections.append(conn)
+        return conn
+
+    with patch('app.tools.smtp_pool.smtplib.SMTP', side_effect=factory):
+        yield connections
+
+
+def _message():
+    message = MIMEText("body")
+    message["To"] = "customer@example.com"
+    return message
+
+
+@pytest.mark.asyncio
+async def test_connection_reused_across_sends(smtp_factory):
+    """Verify STARTTLS and login happen once for sequential sends"""
+    pool = SMTPConnectionPool("smtp.test", 587, "user", "pass")
+
+    for _ in range(3):
+        await pool.send_message(_message())
+
+    assert len(smtp_factory) == 1
+    assert smtp_factory[0].login.call_count == 1
+    assert smtp_factory[0].send_message.call_count == 3
+
+
+@pytest.mark.asyncio
+async def test_reconnects_after_server_disconnect(smtp_factory):
+    """Verify a dropped connection is replaced and the send retried"""
+    pool = SMTPConnectionPool("smtp.test", 587, "user", "pass")
+    await pool.send_message(_message())
+    smtp_factory[0].send_message.side_effect = smtplib.SMTPServerDisconnected()
+
+    await pool.send_message(_message())
+
+    assert len(smtp_factory) == 2
+    assert smtp_factory[1].send_message.call_count == 1
+    assert pool.stats["reconnects"] == 1
+
+
+@pytest.mark.asyncio
+async def test_concurrency_capped_per_pool(smtp_factory):
+    """Verify no more than max_connections sends run at once"""
+    pool = SMTPConnectionPool("smtp.test", 587, "user", "pass", max_connections=2)
+    active = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def slow_send(message):
+        nonlocal active, peak
+        with lock:
+            active += 1
+            peak = max(peak, active)
+        threading.Event().wait(0.02)
+        with lock:
+            active -= 1
+
+    with patch.object(SMTPConnectionPool, "_connect", lambda self: MagicMock(send_message=slow_send)):
+        await asyncio.gather(*[pool.send_message(_message()) for _ in range(6)])
+
+    assert peak <= 2
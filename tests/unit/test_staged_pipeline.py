@@ -0,0 +1,91 @@
+"""Unit tests for staged (SEDA-style) dispute execution"""
+import asyncio
+import pytest
+from app.agents.staged_pipeline import DONE, Stage, StagedPipeline
+
+
+def make_state(dispute_id: str) -> dict:
+    return {"dispute_id": dispute_id, "actions_taken": [], "error": None, "query_attempts": 0}
+
+
+def step(name: str, delay: float = 0.0):
+    async def _handler(state):
+        await asyncio.sleep(delay)
+        state["actions_taken"].append(name)
+        return state
+    return _handler
+
+
+@pytest.mark.asyncio
+async def test_dispute_flows_through_routed_stages():
+    """Verify routing between stages and in-worker repeats"""
+    async def research(state):
+        state["query_attempts"] += 1
+        return state
+
+    pipeline = StagedPipeline([
+        Stage("enrichment", step("enriched"), lambda s: "legal_research", 2, 10),
+        Stage("legal_research", research,
+              lambda s: "rewrite" if s["query_attempts"] < 3 else "adjudication", 2, 10,
+              repeat_routes=("rewrite",)),
+        Stage("adjudication", step("decided"), lambda s: DONE, 1, 10)
+    ], entry="enrichment")
+    pipeline.start()
+    try:
+        state = await pipeline.process(make_state("disp_1"))
+    finally:
+        await pipeline.stop()
+
+    assert state["actions_taken"] == ["enriched", "decided"]
+    assert state["query_attempts"] == 3
+    stats = pipeline.get_stats()["stages"]
+    assert stats["legal_research"]["processed"] == 1
+    assert stats["adjudication"]["p50_service_ms"] is not None
+
+
+@pytest.mark.asyncio
+async def test_stage_failure_routes_to_human_review():
+    """Verify a crashing stage hands the dispute to human review"""
+    async def crash(state):
+        raise RuntimeError("boom")
+
+    pipeline = StagedPipeline([
+        Stage("adjudication", crash, lambda s: DONE, 1, 10),
+        Stage("human_review", step("reviewed"), lambda s: DONE, 1, 10)
+    ], entry="adjudication")
+    try:
+        state = await pipeline.process(make_state("disp_1"))
+    finally:
+        await pipeline.stop()
+
+    assert state["actions_taken"] == ["reviewed"]
+    assert "boom" in state["error"]
+    assert pipeline.get_stats()["stages"]["adjudication"]["failed"] == 1
+
+
+@pytest.mark.asyncio
+async def test_saturated_stage_applies_backpressure():
+    """Verify a slow stage's full queue stalls upstream instead of growing"""
+    gate = asyncio.Event()
+
+    async def slow(state):
+        await gate.wait()
+        return state
+
+    pipeline = StagedPipeline([
+        Stage("enrichment", step("enriched"), lambda s: "adjudication", 1, 1),
+        Stage("adjudication", slow, lambda s: DONE, 1, 1)
+    ], entry="enrichment")
+    tasks = [asyncio.create_task(pipeline.process(make_state(f"disp_{i}"))) for i in range(6)]
+    await asyncio.sleep(0.05)
+
+    stats = pipeline.get_stats()["stages"]
+    assert stats["adjudication"]["busy_workers"] == 1
+    assert stats["adjudication"]["queue_depth"] == 1
+    assert stats["enrichment"]["queue_depth"] == 1
+    assert not any(task.done() for task in tasks)
+
+    gate.set()
+    results = await asyncio.gather(*tasks)
+    await pipeline.stop()
+    assert sorted(state["dispute_id"] for state in results) == [f"disp_{i}" for i in range(6)]
@@ -0,0 +1,111 @@
+"""Unit tests for health-aware email provider routing"""
+import asyncio
+import pytest
+from unittest.mock import AsyncMock
+from app.tools.health_window import HealthWindow
+from app.tools.unified_email_service import UnifiedEmailService
+
+
+MESSAGE = {
+    "to_email": "customer@example.com",
+    "dispute_id": "disp_123",
+    "customer_name": "Customer",
+    "decision": "accept",
+    "reasoning": "Merchant failed to provide evidence",
+    "amount": 150.0,
+    "currency": "USD"
+}
+
+
+def _provider(result=None, delay=0.0, error=None):
+    provider = AsyncMock(spec=["send_dispute_decision"])
+
+    async def send(**kwargs):
+        await asyncio.sleep(delay)
+        if error:
+            raise error
+        return dict(result or {"success": True})
+
+    provider.send_dispute_decision = AsyncMock(side_effect=send)
+    return provider
+
+
+def _service(*providers):
+    service = UnifiedEmailService()
+    service.providers = list(providers)
+    service.hedge_enabled = False
+    return service
+
+
+def test_health_window_percentiles():
+    """Verify success rate and p95 come from recorded samples"""
+    window = HealthWindow()
+    for i in range(100):
+        window.record(i % 10 != 0, (i + 1) / 1000)
+
+    assert window.success_rate() == pytest.approx(0.9)
+    assert window.percentile(95) == pytest.approx(0.095, abs=0.002)
+
+
+@pytest.mark.asyncio
+async def test_unhealthy_provider_ranked_last():
+    """Verify a provider failing in the recent window loses its first slot"""
+    flaky = _provider(result={"success": False, "error": "503"})
+    healthy = _provider()
+    service = _service(("Flaky", flaky), ("Healthy", healthy))
+
+    for _ in range(service.MIN_SAMPLES):
+        result = await service.send_dispute_decision(**MESSAGE)
+        assert result["provider"] == "Healthy"
+
+    assert [name for name, _ in service.ranked_providers()] == ["Healthy", "Flaky"]
+
+
+@pytest.mark.asyncio
+async def test_open_circuit_skips_provider_without_calling_it():
+    """Verify a tripped breaker fails fast instead of paying the provider timeout"""
+    down = _provider(error=ConnectionError("refused"))
+    backup = _provider()
+    service = _service(("Down", down), ("Backup", backup))
+
+    for _ in range(3):
+        await service.send_dispute_decision(**MESSAGE)
+    calls_before = down.send_dispute_decision.await_count
+
+    result = await service.send_dispute_decision(**MESSAGE)
+
+    assert result["provider"] == "Backup"
+    assert down.send_dispute_decision.await_count == calls_before
+    stats = service.get_provider_stats()
+    assert stats["providers"]["Down"]["circuit_breaker"]["state"] == "open"
+
+
+@pytest.mark.asyncio
+async def test_hedged_send_uses_faster_provider():
+    """Verify a hedge to the second provider wins when the first is slow"""
+    slow = _provider(delay=0.5)
+    fast = _provider()
+    service = _service(("Slow", slow), ("Fast", fast))
+    service.hedge_enabled = True
+    service.provider_timeout = 0.05
+
+    result = await service.send_dispute_decision(**MESSAGE)
+
+    assert result["provider"] == "Fast"
+    assert service.get_provider_stats()["hedging"]["won"] == 1
+
+
+@pytest.mark.asyncio
+async def test_hedged_send_falls_over_on_fast_primary_failure():
+    """Verify a primary failing before the hedge delay still tries the secondary"""
+    down = _provider(error=ConnectionError("refused"))
+    backup = _provider()
+    service = _service(("Down", down), ("Backup", backup))
+    service.hedge_enabled = True
+    service.provider_timeout = 0.5
+
+    result = await service.send_dispute_decision(**MESSAGE)
+
+    assert result["provider"] == "Backup"
+    assert backup.send_dispute_decision.await_count == 1
+    assert service.get_provider_stats()["hedging"]["started"] == 0